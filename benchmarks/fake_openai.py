@@ -0,0 +1,121 @@
+import aiohttp.web
+import asyncio
+import json
+import random
+import re
+
+from lib import profanity
+
+
+MESSAGE_PATTERN = re.compile(r"^\d+\. (\".*\")$", re.MULTILINE)
+
+
+class FakeCompletionServer:
+    """A class to represent a local stand-in for the chat completion API.
+
+    Arguments:
+        latency: The median number of seconds a completion takes.
+        jitter: The log-normal sigma applied to the latency, 0 for none.
+        error_rate: The fraction of completions answered with a server error.
+        policy: How verdicts are chosen, "lexicon", "yes", "no" or "random".
+        seed: The seed of the random number generator.
+
+    Attributes:
+        latency: The median number of seconds a completion takes.
+        jitter: The log-normal sigma applied to the latency, 0 for none.
+        error_rate: The fraction of completions answered with a server error.
+        policy: How verdicts are chosen, "lexicon", "yes", "no" or "random".
+        random: The random number generator.
+        completions: The number of completion requests received.
+        errors: The number of completion requests answered with an error.
+        runner: The aiohttp runner, or None if the server is not started.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.3,
+        jitter: float = 0.5,
+        error_rate: float = 0.0,
+        policy: str = "lexicon",
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.policy = policy
+        self.random = random.Random(seed)
+        self.completions = 0
+        self.errors = 0
+        self.runner: aiohttp.web.AppRunner | None = None
+
+    def verdict(self, message: str) -> str:
+        """Returns the verdict the server gives a single message."""
+        if self.policy == "yes":
+            return "YES"
+
+        if self.policy == "no":
+            return "NO"
+
+        if self.policy == "random":
+            return self.random.choice(["YES", "NO"])
+
+        verdict = profanity.DEFAULT_MATCHER.scan(message, whole_words=False)
+
+        return "YES" if verdict is profanity.Verdict.PROFANE else "NO"
+
+    def respond(self, prompt: str) -> str:
+        """Returns the completion for a prompt."""
+        messages = [json.loads(match) for match in MESSAGE_PATTERN.findall(prompt)]
+
+        if not messages:
+            return self.verdict(prompt)
+
+        return json.dumps([self.verdict(message) for message in messages])
+
+    async def handle(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        """Handles a chat completion request."""
+        self.completions += 1
+        body = await request.json()
+        delay = self.latency * (
+            self.random.lognormvariate(0, self.jitter) if self.jitter else 1
+        )
+
+        await asyncio.sleep(delay)
+
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return aiohttp.web.json_response({"error": "fake error"}, status=500)
+
+        return aiohttp.web.json_response(
+            {
+                "choices": [
+                    {
+                        "message": {
+                            "role": "assistant",
+                            "content": self.respond(body["messages"][-1]["content"]),
+                        }
+                    }
+                ]
+            }
+        )
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts the server and returns its API base URL."""
+        app = aiohttp.web.Application()
+        app.router.add_post("/v1/chat/completions", self.handle)
+
+        self.runner = aiohttp.web.AppRunner(app)
+        await self.runner.setup()
+
+        site = aiohttp.web.TCPSite(self.runner, host, port)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+
+        return f"http://{host}:{port}/v1"
+
+    async def close(self) -> None:
+        """Stops the server."""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
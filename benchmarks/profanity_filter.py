@@ -0,0 +1,302 @@
+"""Replays a synthetic message stream through the profanity filter.
+
+Usage:
+    python -m benchmarks.profanity_filter [--messages N] [--rate N] ...
+
+The filter talks to a local FakeCompletionServer, so no network access or
+API key is needed. Results are printed as JSON.
+"""
+
+import argparse
+import asyncio
+import hikari
+import json
+import os
+import random
+import statistics
+import time
+import types
+
+from benchmarks.fake_openai import FakeCompletionServer
+from datetime import datetime, timezone
+from lib import moderation
+from unittest.mock import AsyncMock
+
+CLEAN_MESSAGES = [
+    "gg",
+    "lol",
+    "anyone up for a match tonight?",
+    "good morning everyone",
+    "that was a great stream",
+    "brb getting food",
+    "can someone help me with the quest",
+    "nice one",
+    "😂😂😂",
+    "https://youtu.be/dQw4w9WgXcQ",
+]
+AMBIGUOUS_MESSAGES = [
+    "that boss fight was hell",
+    "damn that was close",
+    "what a crap patch",
+    "first class ticket",
+    "i'm going to kill this level",
+]
+PROFANE_MESSAGES = [
+    "shit happens",
+    "what the fuck was that",
+    "you absolute bastard",
+    "this is bullshit",
+]
+
+
+class FakeSettings:
+    """A settings collection that has the filter enabled for every guild."""
+
+    async def find_one(self, query: dict, projection: dict | None = None) -> dict:
+        return {"guild_id": query["guild_id"], "profanity_filter": True}
+
+
+def build_bot() -> types.SimpleNamespace:
+    """Builds the parts of a bot the profanity filter uses."""
+    rest = types.SimpleNamespace(
+        delete_message=AsyncMock(), delete_messages=AsyncMock()
+    )
+    moderation_log = types.SimpleNamespace(insert_many=AsyncMock())
+    d = types.SimpleNamespace(
+        mongo_database=types.SimpleNamespace(
+            settings=FakeSettings(), moderation_log=moderation_log
+        )
+    )
+
+    cache = types.SimpleNamespace(
+        get_thread=lambda channel_id: None,
+        get_guild_channel=lambda channel_id: None,
+        get_me=lambda: None,
+    )
+
+    return types.SimpleNamespace(d=d, rest=rest, cache=cache)
+
+
+def build_events(
+    count: int,
+    guilds: int,
+    channels: int,
+    ambiguous: float,
+    profane: float,
+    seed: int,
+    raid: float = 0.0,
+) -> list[types.SimpleNamespace]:
+    """Builds a stream of synthetic guild message create events.
+
+    A raid sends the given fraction of every message to guild 1.
+    """
+    rng = random.Random(seed)
+    base_id = hikari.Snowflake.from_datetime(datetime.now(timezone.utc))
+    events = []
+
+    for index in range(count):
+        roll = rng.random()
+
+        if roll < profane:
+            content = rng.choice(PROFANE_MESSAGES)
+        elif roll < profane + ambiguous:
+            content = f"{rng.choice(AMBIGUOUS_MESSAGES)} {rng.randrange(50)}"
+        else:
+            content = rng.choice(CLEAN_MESSAGES)
+
+        if rng.random() < raid:
+            guild_id = hikari.Snowflake(1)
+        else:
+            guild_id = hikari.Snowflake(rng.randrange(guilds) + 1)
+
+        channel_id = hikari.Snowflake(guild_id * 1000 + rng.randrange(channels))
+        author = types.SimpleNamespace(
+            id=hikari.Snowflake(rng.randrange(1000) + 1), is_bot=False
+        )
+        message = types.SimpleNamespace(
+            id=hikari.Snowflake(base_id + index),
+            content=content,
+            author=author,
+            webhook_id=None,
+            attachments=[],
+            embeds=[],
+        )
+
+        events.append(
+            types.SimpleNamespace(
+                guild_id=guild_id,
+                channel_id=channel_id,
+                message_id=message.id,
+                message=message,
+                member=types.SimpleNamespace(role_ids=[]),
+                author_id=author.id,
+                is_bot=False,
+                is_webhook=False,
+            )
+        )
+
+    return events
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Returns a percentile of a list of values."""
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run(arguments: argparse.Namespace) -> dict:
+    """Runs the benchmark and returns its report."""
+    server = FakeCompletionServer(
+        arguments.latency,
+        arguments.jitter,
+        arguments.error_rate,
+        arguments.policy,
+        seed=arguments.seed,
+    )
+    os.environ["OPENAI_API_BASE"] = await server.start()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    if arguments.model:
+        os.environ["PROFANITY_MODEL"] = arguments.model
+
+    # Imported here so the filter picks up the environment set above.
+    from src.extensions import profanity_filter
+
+    bot = build_bot()
+    profanity_filter.plugin._app = bot
+
+    await profanity_filter.start_profanity_filter(None)
+
+    started: dict[int, float] = {}
+    finished: dict[int, float] = {}
+    queued: set[int] = set()
+    queue = bot.d.profanity_queue
+    handler, put = queue.handler, queue.put
+
+    async def timed_handler(message: moderation.Message) -> None:
+        try:
+            await handler(message)
+        finally:
+            finished[message.message_id] = time.perf_counter()
+
+    def tracked_put(message: moderation.Message) -> bool:
+        queued.add(message.message_id)
+        return put(message)
+
+    async def dispatch(event: types.SimpleNamespace) -> None:
+        started[event.message.id] = time.perf_counter()
+        await profanity_filter.detect_profanity_on_message(event)
+
+        if event.message.id not in queued:
+            finished[event.message.id] = time.perf_counter()
+
+    queue.handler, queue.put = timed_handler, tracked_put
+
+    events = build_events(
+        arguments.messages,
+        arguments.guilds,
+        arguments.channels,
+        arguments.ambiguous,
+        arguments.profane,
+        arguments.seed,
+        arguments.raid,
+    )
+    guilds = {event.message.id: event.guild_id for event in events}
+    interval = 1 / arguments.rate if arguments.rate else 0
+    tasks = []
+    start = time.perf_counter()
+
+    for index, event in enumerate(events):
+        tasks.append(asyncio.create_task(dispatch(event)))
+
+        if interval:
+            await asyncio.sleep(
+                max(0, start + (index + 1) * interval - time.perf_counter())
+            )
+        elif index % 100 == 0:
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+    await queue.queue.join()
+    elapsed = time.perf_counter() - start
+
+    await profanity_filter.stop_profanity_filter(None)
+    await server.close()
+
+    latencies = [
+        finished[message_id] - started[message_id]
+        for message_id in finished
+        if message_id in started
+    ]
+    quiet_latencies = [
+        finished[message_id] - started[message_id]
+        for message_id in finished
+        if message_id in started and guilds[message_id] != 1
+    ]
+    deleter = bot.d.profanity_deleter
+
+    return {
+        "messages": len(events),
+        "processed": len(latencies),
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(len(events) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else 0,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "quiet_guild_p99_ms": round(percentile(quiet_latencies, 0.99) * 1000, 3),
+        "completions": server.completions,
+        "completion_errors": server.errors,
+        "deleted": deleter.deleted,
+        "delete_requests": deleter.bulk_requests + deleter.single_requests,
+        "audit_records": bot.d.profanity_audit.written,
+        "audit_writes": bot.d.mongo_database.moderation_log.insert_many.await_count,
+        "queue": queue.metrics(),
+        "verdict_cache": {
+            "hits": bot.d.profanity_verdicts.hits,
+            "misses": bot.d.profanity_verdicts.misses,
+        },
+        "repeats": {
+            "profane": bot.d.profanity_repeats.profane_repeats,
+            "clean": bot.d.profanity_repeats.clean_repeats,
+        },
+        "breaker": bot.d.openai_breaker.metrics(),
+        "budget": bot.d.openai_budget.metrics(),
+        "skipped": dict(
+            bot.d.profanity_content_rules.skipped + bot.d.profanity_guild_rules.skipped
+        ),
+        "unmoderated": dict(bot.d.profanity_unmoderated),
+    }
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=0, help="0 for unthrottled")
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--ambiguous", type=float, default=0.2)
+    parser.add_argument("--profane", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--policy",
+        choices=("lexicon", "yes", "no", "random"),
+        default="lexicon",
+        help="how the fake LLM chooses verdicts",
+    )
+    parser.add_argument(
+        "--raid", type=float, default=0.0, help="fraction of messages sent to guild 1"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", help="path of a local profanity model")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(run(parse_arguments())), indent=4))
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+
+import motor.motor_asyncio as motor
+
+from datetime import datetime, timezone
+from lib import buffering, moderation
+from pymongo.errors import PyMongoError
+
+
+FLUSH_SIZE = 100
+FLUSH_DELAY = 5.0
+RETENTION = 30 * 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+async def create_indexes(
+    collection: motor.AsyncIOMotorCollection, retention: int = RETENTION
+) -> None:
+    """Creates the indexes of the audit log collection.
+
+    Records expire retention seconds after they are created.
+
+    Arguments:
+        collection: The mongo collection.
+        retention: The number of seconds records are kept for.
+
+    Returns:
+        None.
+    """
+    await collection.create_index("created_at", expireAfterSeconds=retention)
+    await collection.create_index([("guild_id", 1), ("created_at", -1)])
+
+
+def build_record(message: moderation.Message, source: str) -> dict:
+    """Builds the audit record of a deleted message.
+
+    Arguments:
+        message: The deleted message.
+        source: The stage of the pipeline that flagged the message.
+
+    Returns:
+        The record.
+    """
+    return {
+        "guild_id": str(message.guild_id),
+        "channel_id": str(message.channel_id),
+        "message_id": str(message.message_id),
+        "content": message.raw_content,
+        "source": source,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+class AuditLog:
+    """A class to represent a buffered sink of moderation audit records.
+
+    Records are held in memory and written together with insert_many once
+    flush_size of them are buffered or flush_delay seconds after the first
+    one, whichever comes first. Records that fail to write are logged and
+    dropped rather than retried.
+
+    Arguments:
+        collection: The mongo collection records are written to.
+        flush_size: The number of buffered records that triggers a flush.
+        flush_delay: The number of seconds a record may wait to be written.
+
+    Attributes:
+        collection: The mongo collection records are written to.
+        flush_size: The number of buffered records that triggers a flush.
+        flush_delay: The number of seconds a record may wait to be written.
+        buffer: The records waiting to be written.
+        flushes: The scheduled flush and in-flight writes.
+        written: The number of records written.
+        failed: The number of records that failed to write.
+    """
+
+    def __init__(
+        self,
+        collection: motor.AsyncIOMotorCollection,
+        flush_size: int = FLUSH_SIZE,
+        flush_delay: float = FLUSH_DELAY,
+    ) -> None:
+        self.collection = collection
+        self.flush_size = flush_size
+        self.flush_delay = flush_delay
+        self.buffer: list[dict] = []
+        self.flushes = buffering.FlushScheduler(flush_delay)
+        self.written = 0
+        self.failed = 0
+
+    def record(self, record: dict) -> None:
+        """Buffers a record to be written.
+
+        Arguments:
+            record: The record to write.
+
+        Returns:
+            None.
+        """
+        self.buffer.append(record)
+
+        if len(self.buffer) >= self.flush_size:
+            self.flush()
+        else:
+            self.flushes.schedule(self.flush)
+
+    def flush(self) -> None:
+        """Writes the buffered records."""
+        self.flushes.cancel()
+
+        if not self.buffer:
+            return
+
+        records, self.buffer = self.buffer, []
+        self.flushes.start(self._write(records))
+
+    async def close(self) -> None:
+        """Writes the buffered records and waits for every write to finish."""
+        self.flush()
+        await self.flushes.wait()
+
+    async def _write(self, records: list[dict]) -> None:
+        """Inserts records in a single unordered request."""
+        try:
+            await self.collection.insert_many(records, ordered=False)
+        except PyMongoError:
+            self.failed += len(records)
+            logger.exception("Failed to write %d audit records", len(records))
+        else:
+            self.written += len(records)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import typing
+
+
+class FlushScheduler:
+    """A class to represent the scheduled flushes and in-flight writes of a buffer.
+
+    Buffered sinks hold items in memory and write them together, either once
+    enough items are buffered or delay seconds after the first one arrived.
+    The scheduler keeps at most one timer per buffer, keyed by the arguments
+    its flush is called with, and a reference to every write until it
+    finishes. Sinks with a single buffer flush with no arguments.
+
+    Arguments:
+        delay: The number of seconds an item may wait to be flushed.
+
+    Attributes:
+        delay: The number of seconds an item may wait to be flushed.
+        timers: A mapping of flush arguments to their scheduled flush.
+        tasks: The in-flight writes.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.timers: dict[tuple, asyncio.TimerHandle] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    def schedule(self, flush: typing.Callable[..., None], *args: typing.Any) -> None:
+        """Schedules a flush after the delay unless one is already scheduled.
+
+        Arguments:
+            flush: The function that flushes the buffer.
+            *args: The arguments to call it with.
+
+        Returns:
+            None.
+        """
+        if args not in self.timers:
+            self.timers[args] = asyncio.get_running_loop().call_later(
+                self.delay, flush, *args
+            )
+
+    def cancel(self, *args: typing.Any) -> None:
+        """Cancels the scheduled flush with the given arguments, if any."""
+        timer = self.timers.pop(args, None)
+
+        if timer is not None:
+            timer.cancel()
+
+    def start(self, write: typing.Coroutine) -> None:
+        """Runs a write in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(write)
+
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def wait(self) -> None:
+        """Waits for every in-flight write to finish."""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import numpy
+import sys
+import typing
+import zipfile
+import zlib
+
+
+FEATURES = 2**18
+NGRAM_SIZES = (2, 3, 4)
+PROFANE_THRESHOLD = 0.9
+CLEAN_THRESHOLD = 0.1
+DEGRADED_THRESHOLD = 0.5
+POOL_WORKERS = 2
+SCORING_ERRORS = (concurrent.futures.BrokenExecutor, RuntimeError, ValueError)
+
+logger = logging.getLogger(__name__)
+
+
+def ngram_features(
+    content: str,
+    features: int = FEATURES,
+    ngram_sizes: typing.Iterable[int] = NGRAM_SIZES,
+) -> list[int]:
+    """Hashes the character n-grams of some content into feature indices.
+
+    CRC32 is used so that indices are stable across processes.
+
+    Arguments:
+        content: The normalized content.
+        features: The number of hashed features.
+        ngram_sizes: The n-gram sizes to extract.
+
+    Returns:
+        The feature index of every n-gram in the content.
+    """
+    padded = f" {content} "
+    encoded = padded.encode()
+
+    return [
+        zlib.crc32(encoded[start : start + size]) % features
+        for size in ngram_sizes
+        for start in range(len(encoded) - size + 1)
+    ]
+
+
+def vectorize(
+    contents: typing.Sequence[str],
+    features: int = FEATURES,
+    ngram_sizes: typing.Iterable[int] = NGRAM_SIZES,
+) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """Builds a sparse feature matrix for a batch of contents.
+
+    Arguments:
+        contents: The normalized contents.
+        features: The number of hashed features.
+        ngram_sizes: The n-gram sizes to extract.
+
+    Returns:
+        The row indices, column indices and values of the non-zero entries.
+        Each row is L1 normalized.
+    """
+    rows: list[int] = []
+    columns: list[int] = []
+    values: list[float] = []
+
+    for row, content in enumerate(contents):
+        indices = ngram_features(content, features, ngram_sizes)
+
+        rows.extend([row] * len(indices))
+        columns.extend(indices)
+        values.extend([1 / len(indices)] * len(indices))
+
+    return (
+        numpy.asarray(rows, dtype=numpy.int64),
+        numpy.asarray(columns, dtype=numpy.int64),
+        numpy.asarray(values, dtype=numpy.float32),
+    )
+
+
+class Model:
+    """A class to represent a logistic regression over hashed character n-grams.
+
+    Arguments:
+        weights: The weight of each hashed feature.
+        bias: The bias term.
+        ngram_sizes: The n-gram sizes the model was trained on.
+
+    Attributes:
+        weights: The weight of each hashed feature.
+        bias: The bias term.
+        ngram_sizes: The n-gram sizes the model was trained on.
+    """
+
+    def __init__(
+        self,
+        weights: numpy.ndarray,
+        bias: float = 0.0,
+        ngram_sizes: typing.Iterable[int] = NGRAM_SIZES,
+    ) -> None:
+        self.weights = numpy.asarray(weights, dtype=numpy.float32)
+        self.bias = float(bias)
+        self.ngram_sizes = tuple(int(size) for size in ngram_sizes)
+
+    @classmethod
+    def load(cls, path: str) -> Model:
+        """Loads a model saved with save, raising ValueError if it is malformed."""
+        try:
+            with numpy.load(path) as data:
+                model = cls(data["weights"], data["bias"], data["ngram_sizes"])
+        except (KeyError, TypeError, zipfile.BadZipFile) as exception:
+            raise ValueError(f"{path} is not a saved model") from exception
+
+        if (
+            model.weights.ndim != 1
+            or not len(model.weights)
+            or not numpy.isfinite(model.weights).all()
+            or not model.ngram_sizes
+            or min(model.ngram_sizes) < 1
+        ):
+            raise ValueError(f"{path} is not a valid model")
+
+        return model
+
+    def save(self, path: str) -> None:
+        """Saves the model as a compressed NumPy archive."""
+        numpy.savez_compressed(
+            path,
+            weights=self.weights.astype(numpy.float16),
+            bias=numpy.float32(self.bias),
+            ngram_sizes=numpy.asarray(self.ngram_sizes),
+        )
+
+    def score(self, contents: typing.Sequence[str]) -> numpy.ndarray:
+        """Scores a batch of contents in one vectorized pass.
+
+        Arguments:
+            contents: The normalized contents.
+
+        Returns:
+            The probability that each content contains profanity.
+        """
+        rows, columns, values = vectorize(contents, len(self.weights), self.ngram_sizes)
+
+        return self.predict(rows, columns, values, len(contents))
+
+    def predict(
+        self,
+        rows: numpy.ndarray,
+        columns: numpy.ndarray,
+        values: numpy.ndarray,
+        count: int,
+    ) -> numpy.ndarray:
+        """Returns the probabilities of a feature matrix built by vectorize."""
+        logits = (
+            numpy.bincount(
+                rows, weights=self.weights[columns] * values, minlength=count
+            )
+            + self.bias
+        )
+
+        return 1 / (1 + numpy.exp(-logits))
+
+
+def train(
+    contents: typing.Sequence[str],
+    labels: typing.Sequence[bool],
+    features: int = FEATURES,
+    epochs: int = 200,
+    learning_rate: float = 5.0,
+    l2: float = 1e-6,
+) -> Model:
+    """Trains a model with full-batch gradient descent.
+
+    Arguments:
+        contents: The normalized training contents.
+        labels: Whether each content contains profanity.
+        features: The number of hashed features.
+        epochs: The number of gradient steps.
+        learning_rate: The gradient step size.
+        l2: The L2 regularization strength.
+
+    Returns:
+        The trained model.
+    """
+    rows, columns, values = vectorize(contents, features)
+    targets = numpy.asarray(labels, dtype=numpy.float32)
+    model = Model(numpy.zeros(features, dtype=numpy.float32))
+
+    for _ in range(epochs):
+        errors = model.predict(rows, columns, values, len(contents)) - targets
+        gradient = numpy.bincount(
+            columns, weights=errors[rows] * values, minlength=features
+        ) / len(contents)
+
+        model.weights -= learning_rate * (gradient + l2 * model.weights)
+        model.bias -= learning_rate * float(errors.mean())
+
+    return model
+
+
+worker_model: Model | None = None
+
+
+def load_worker_model(path: str) -> None:
+    """Loads the model into a pool worker process."""
+    global worker_model
+    worker_model = Model.load(path)
+
+
+def score_in_worker(contents: list[str]) -> list[float]:
+    """Scores contents with the model loaded in a pool worker process."""
+    return worker_model.score(contents).tolist()
+
+
+class ClassifierPool:
+    """A class to represent a process pool that scores contents with a model.
+
+    Scoring runs in worker processes so that it never blocks the event loop.
+    The model is loaded once up front, so a missing or malformed model fails
+    when the pool is created rather than in every worker. Workers are started
+    from a fork server rather than forked from the bot, which by then runs an
+    event loop and client threads that a forked child would inherit.
+
+    Arguments:
+        path: The path of the saved model.
+        workers: The number of worker processes.
+
+    Attributes:
+        executor: The process pool every worker has loaded the model into.
+        failed: The number of batches that failed to score.
+    """
+
+    def __init__(self, path: str, workers: int = POOL_WORKERS) -> None:
+        Model.load(path)
+
+        self.failed = 0
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=load_worker_model,
+            initargs=(path,),
+        )
+
+    async def score(self, contents: list[str]) -> list[float]:
+        """Scores a batch of contents in a worker process.
+
+        Arguments:
+            contents: The normalized contents.
+
+        Returns:
+            The probability that each content contains profanity.
+
+        Raises:
+            One of SCORING_ERRORS if the batch could not be scored.
+        """
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, score_in_worker, contents
+            )
+        except SCORING_ERRORS:
+            self.failed += 1
+            logger.exception("Failed to score %d contents", len(contents))
+            raise
+
+    def close(self) -> None:
+        """Shuts the pool down."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    # Trains a model from a file of tab-separated "label<TAB>content" lines,
+    # where the label is 1 for profane content and 0 for clean content.
+    from lib import profanity
+
+    with open(sys.argv[1], encoding="utf-8") as file:
+        samples = [line.rstrip("\n").split("\t", 1) for line in file if "\t" in line]
+
+    model = train(
+        [profanity.normalize(content) for _, content in samples],
+        [label == "1" for label, _ in samples],
+    )
+    model.save(sys.argv[2])
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import hikari
+import logging
+import math
+
+from datetime import datetime, timedelta, timezone
+from lib import buffering
+from lightbulb.utils import permissions
+
+
+BULK_DELETE_LIMIT = 100
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+DELETE_DELAY = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+def is_bulk_deletable(message_id: hikari.Snowflake) -> bool:
+    """Returns whether a message is recent enough to be bulk deleted.
+
+    Arguments:
+        message_id: The ID of the message.
+
+    Returns:
+        True if the message is younger than the bulk delete age limit.
+    """
+    created_at = hikari.Snowflake(message_id).created_at
+
+    return datetime.now(timezone.utc) - created_at < BULK_DELETE_MAX_AGE
+
+
+class ChannelPermissions:
+    """A class to represent the bot's memoized permissions in each channel.
+
+    Permissions are worked out from the gateway cache the first time a
+    channel is checked. Threads use the permissions of their parent channel.
+    Channels or members missing from the cache are not memoized and are
+    assumed to allow deletion, leaving the REST call to decide.
+
+    Attributes:
+        permissions: A mapping of channel IDs to the bot's permissions there.
+        guild_channels: A mapping of guild IDs to their memoized channel IDs.
+        skipped: The number of checks that found deletion impossible.
+    """
+
+    def __init__(self) -> None:
+        self.permissions: dict[hikari.Snowflake, hikari.Permissions] = {}
+        self.guild_channels: dict[hikari.Snowflake, set[hikari.Snowflake]] = {}
+        self.skipped = 0
+
+    def can_delete(
+        self,
+        cache: hikari.api.Cache,
+        guild_id: hikari.Snowflake,
+        channel_id: hikari.Snowflake,
+    ) -> bool:
+        """Returns whether the bot can delete other users' messages in a channel.
+
+        Arguments:
+            cache: The gateway cache.
+            guild_id: The ID of the guild.
+            channel_id: The ID of the channel or thread.
+
+        Returns:
+            False if the bot lacks MANAGE_MESSAGES in the channel, otherwise True.
+        """
+        thread = cache.get_thread(channel_id)
+
+        if thread is not None:
+            channel_id = thread.parent_id
+
+        channel_permissions = self.permissions.get(channel_id)
+
+        if channel_permissions is None:
+            channel = cache.get_guild_channel(channel_id)
+            me = cache.get_me()
+            member = me and cache.get_member(guild_id, me.id)
+
+            if not isinstance(channel, hikari.PermissibleGuildChannel) or not member:
+                return True
+
+            channel_permissions = permissions.permissions_in(channel, member)
+            self.permissions[channel_id] = channel_permissions
+            self.guild_channels.setdefault(guild_id, set()).add(channel_id)
+
+        if hikari.Permissions.MANAGE_MESSAGES not in channel_permissions:
+            self.skipped += 1
+            return False
+
+        return True
+
+    def invalidate_channel(self, channel_id: hikari.Snowflake) -> None:
+        """Forgets the bot's permissions in a channel."""
+        self.permissions.pop(channel_id, None)
+
+    def invalidate_guild(self, guild_id: hikari.Snowflake) -> None:
+        """Forgets the bot's permissions in every channel of a guild."""
+        for channel_id in self.guild_channels.pop(guild_id, ()):
+            self.permissions.pop(channel_id, None)
+
+
+class DeletionCoalescer:
+    """A class to represent a coalescer of message deletions by channel.
+
+    Deletions requested for a channel within a short window are issued
+    together as bulk deletes of up to 100 messages. Messages too old for
+    the bulk delete endpoint are deleted one at a time.
+
+    Arguments:
+        rest: The REST client used to delete messages.
+        delay: The number of seconds to collect deletions for a channel.
+
+    Attributes:
+        rest: The REST client used to delete messages.
+        delay: The number of seconds to collect deletions for a channel.
+        pending: A mapping of channel IDs to the message IDs to delete.
+        flushes: The scheduled flush of each channel and in-flight deletions.
+        deleted: The number of messages deleted.
+        bulk_requests: The number of bulk delete requests issued.
+        single_requests: The number of single delete requests issued.
+    """
+
+    def __init__(
+        self, rest: hikari.api.RESTClient, delay: float = DELETE_DELAY
+    ) -> None:
+        self.rest = rest
+        self.delay = delay
+        self.pending: dict[hikari.Snowflake, set[hikari.Snowflake]] = {}
+        self.flushes = buffering.FlushScheduler(delay)
+        self.deleted = 0
+        self.bulk_requests = 0
+        self.single_requests = 0
+
+    def delete(
+        self, channel_id: hikari.Snowflake, message_id: hikari.Snowflake
+    ) -> None:
+        """Schedules a message for deletion.
+
+        Arguments:
+            channel_id: The ID of the channel the message was sent in.
+            message_id: The ID of the message to delete.
+
+        Returns:
+            None.
+        """
+        self.pending.setdefault(channel_id, set()).add(message_id)
+        self.flushes.schedule(self.flush, channel_id)
+
+    def flush(self, channel_id: hikari.Snowflake) -> None:
+        """Issues the pending deletions for a channel."""
+        self.flushes.cancel(channel_id)
+
+        message_ids = self.pending.pop(channel_id, None)
+
+        if not message_ids:
+            return
+
+        self.flushes.start(self._delete(channel_id, sorted(message_ids)))
+
+    async def close(self) -> None:
+        """Issues every pending deletion and waits for them to finish."""
+        for channel_id in list(self.pending):
+            self.flush(channel_id)
+
+        await self.flushes.wait()
+
+    async def _delete(
+        self, channel_id: hikari.Snowflake, message_ids: list[hikari.Snowflake]
+    ) -> None:
+        """Deletes messages from a channel with as few requests as possible."""
+        recent, old = [], []
+
+        for message_id in message_ids:
+            (recent if is_bulk_deletable(message_id) else old).append(message_id)
+
+        if len(recent) == 1:
+            old += recent
+            recent = []
+
+        try:
+            if recent:
+                self.bulk_requests += math.ceil(len(recent) / BULK_DELETE_LIMIT)
+                await self.rest.delete_messages(channel_id, recent)
+                self.deleted += len(recent)
+
+            for message_id in old:
+                self.single_requests += 1
+
+                try:
+                    await self.rest.delete_message(channel_id, message_id)
+                except hikari.NotFoundError:
+                    continue
+
+                self.deleted += 1
+        except hikari.HikariError:
+            logger.exception("Failed to delete messages in channel %s", channel_id)
@@ -0,0 +1,740 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import enum
+import hashlib
+import logging
+import random
+import time
+import typing
+
+from lib import buffering
+
+
+BATCH_SIZE = 20
+BATCH_DELAY = 0.05
+VERDICT_CACHE_SIZE = 50_000
+VERDICT_CACHE_TTL = 3600.0
+QUEUE_SIZE = 1000
+QUEUE_WORKERS = 64
+MAX_FALLBACKS = 64
+SAMPLE_RATE = 0.1
+GUILD_WEIGHT = 1.0
+GUILD_MAX_IN_FLIGHT = 16
+CONTENT_TRACKER_SIZE = 10_000
+REPEAT_WINDOW_SIZE = 32
+REPEAT_WINDOW_TTL = 30.0
+REPEAT_WINDOW_CHANNELS = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+class Message:
+    """A class to represent a message awaiting moderation.
+
+    Arguments:
+        guild_id: The ID of the guild the message was sent in.
+        channel_id: The ID of the channel the message was sent in.
+        message_id: The ID of the message.
+        content: The normalized content of the message.
+        raw_content: The content of the message as it was sent.
+
+    Attributes:
+        guild_id: The ID of the guild the message was sent in.
+        channel_id: The ID of the channel the message was sent in.
+        message_id: The ID of the message.
+        content: The normalized content of the message.
+        raw_content: The content of the message as it was sent.
+    """
+
+    def __init__(
+        self,
+        guild_id: int,
+        channel_id: int,
+        message_id: int,
+        content: str,
+        raw_content: str,
+    ) -> None:
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.content = content
+        self.raw_content = raw_content
+
+
+class Batcher:
+    """A class to represent a stage that classifies items in micro-batches.
+
+    Items are collected into a window that is flushed once it holds max_size
+    items or once max_delay seconds have passed since its first item arrived.
+
+    Arguments:
+        handler: The coroutine function that classifies a whole window.
+        max_size: The maximum number of items in a window.
+        max_delay: The maximum number of seconds an item waits for its window.
+
+    Attributes:
+        handler: The coroutine function that classifies a whole window.
+        max_size: The maximum number of items in a window.
+        max_delay: The maximum number of seconds an item waits for its window.
+        pending: The items and futures of the window being collected.
+        flushes: The scheduled flush and in-flight window classifications.
+    """
+
+    def __init__(
+        self,
+        handler: typing.Callable[[list], typing.Awaitable[list]],
+        max_size: int = BATCH_SIZE,
+        max_delay: float = BATCH_DELAY,
+    ) -> None:
+        self.handler = handler
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.pending: list[tuple[typing.Any, asyncio.Future]] = []
+        self.flushes = buffering.FlushScheduler(max_delay)
+
+    async def submit(self, item: typing.Any) -> typing.Any:
+        """Adds an item to the current window and waits for its result.
+
+        Arguments:
+            item: The item to classify.
+
+        Returns:
+            The result the handler produced for the item.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        self.pending.append((item, future))
+
+        if len(self.pending) >= self.max_size:
+            self.flush()
+        else:
+            self.flushes.schedule(self.flush)
+
+        return await future
+
+    def flush(self) -> None:
+        """Sends the current window to the handler."""
+        self.flushes.cancel()
+
+        if not self.pending:
+            return
+
+        window, self.pending = self.pending, []
+        self.flushes.start(self._run(window))
+
+    async def close(self) -> None:
+        """Flushes the current window and waits for every window to finish."""
+        self.flush()
+        await self.flushes.wait()
+
+    async def _run(self, window: list[tuple[typing.Any, asyncio.Future]]) -> None:
+        """Classifies a window and fans the results back out to its waiters."""
+        try:
+            results = await self.handler([item for item, _ in window])
+        except Exception as exception:
+            for _, future in window:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+
+        for (_, future), result in zip(window, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class VerdictCache:
+    """A class to represent a bounded LRU cache of moderation verdicts.
+
+    Verdicts are keyed by a hash of the normalized message content, so the
+    same content resolves to the same entry no matter which guild posted it.
+
+    Arguments:
+        max_size: The maximum number of verdicts to hold.
+        ttl: The number of seconds a verdict stays valid.
+
+    Attributes:
+        max_size: The maximum number of verdicts to hold.
+        ttl: The number of seconds a verdict stays valid.
+        entries: A mapping of content hashes to (expiry time, verdict) pairs.
+        hits: The number of lookups that found a valid verdict.
+        misses: The number of lookups that did not.
+        evictions: The number of verdicts removed to stay under max_size.
+    """
+
+    def __init__(
+        self, max_size: int = VERDICT_CACHE_SIZE, ttl: float = VERDICT_CACHE_TTL
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: collections.OrderedDict[
+            bytes, tuple[float, bool]
+        ] = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(content: str) -> bytes:
+        """Returns the cache key of some message content."""
+        normalized = " ".join(content.casefold().split())
+
+        return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
+    def get(self, content: str) -> bool | None:
+        """Returns the cached verdict, or None if it is missing or expired."""
+        key = self.key(content)
+        entry = self.entries.get(key)
+
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[1]
+
+    def set(self, content: str, verdict: bool) -> None:
+        """Caches a verdict, evicting the least recently used ones if full."""
+        key = self.key(content)
+
+        self.entries[key] = (time.monotonic() + self.ttl, verdict)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class OverloadPolicy(enum.Enum):
+    """What a moderation queue does with a new item when it is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    SAMPLE = "sample"
+    FALLBACK = "fallback"
+
+
+class FairQueue:
+    """A class to represent a bounded queue shared fairly between flows.
+
+    Items are grouped into flows by a key, such as the guild they belong to,
+    and taken from the flows by deficit round robin. Each time a flow comes
+    round it earns credit equal to its weight and may take one item per unit
+    of credit, so a flow with twice the weight is served twice as often. A
+    flow with as many items in flight as the cap allows is passed over until
+    one of them is done.
+
+    Arguments:
+        max_size: The maximum number of queued items across every flow.
+        key: Returns the flow an item belongs to.
+        weights: A mapping of flow keys to their weight.
+        default_weight: The weight of flows missing from the weights.
+        max_in_flight: The maximum number of items a flow may have in flight.
+        max_fallbacks: The maximum number of fallback handlers running at once.
+
+    Attributes:
+        max_size: The maximum number of queued items across every flow.
+        key: Returns the flow an item belongs to.
+        weights: A mapping of flow keys to their weight.
+        default_weight: The weight of flows missing from the weights.
+        max_in_flight: The maximum number of items a flow may have in flight.
+        flows: A mapping of flow keys to their queued items.
+        active: The keys of flows with queued items, in round robin order.
+        deficits: A mapping of flow keys to their unspent credit.
+        in_flight: The number of items each flow has in flight.
+    """
+
+    def __init__(
+        self,
+        max_size: int = QUEUE_SIZE,
+        key: typing.Callable[[typing.Any], typing.Hashable] = lambda item: None,
+        weights: dict[typing.Hashable, float] | None = None,
+        default_weight: float = GUILD_WEIGHT,
+        max_in_flight: int = GUILD_MAX_IN_FLIGHT,
+    ) -> None:
+        if default_weight <= 0 or any(
+            weight <= 0 for weight in (weights or {}).values()
+        ):
+            raise ValueError("Flow weights must be positive.")
+
+        self.max_size = max_size
+        self.key = key
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self.max_in_flight = max_in_flight
+        self.flows: dict[typing.Hashable, collections.deque] = {}
+        self.active: collections.deque[typing.Hashable] = collections.deque()
+        self.deficits: collections.Counter = collections.Counter()
+        self.in_flight: collections.Counter = collections.Counter()
+        self.size = 0
+        self.unfinished = 0
+        self.finished = asyncio.Event()
+        self.finished.set()
+        self.getters: collections.deque[asyncio.Future] = collections.deque()
+
+    def qsize(self) -> int:
+        """Returns the number of queued items."""
+        return self.size
+
+    def full(self) -> bool:
+        """Returns whether the queue is full."""
+        return self.size >= self.max_size
+
+    def depths(self) -> dict[str, int]:
+        """Returns the number of queued items of each flow."""
+        return {str(key): len(flow) for key, flow in self.flows.items()}
+
+    def put_nowait(self, item: typing.Any) -> None:
+        """Adds an item to the end of its flow.
+
+        Raises:
+            asyncio.QueueFull: If the queue is full.
+        """
+        if self.full():
+            raise asyncio.QueueFull
+
+        key = self.key(item)
+        flow = self.flows.get(key)
+
+        if flow is None:
+            flow = self.flows[key] = collections.deque()
+            self.active.append(key)
+
+        flow.append(item)
+        self.size += 1
+        self.unfinished += 1
+        self.finished.clear()
+        self._wake()
+
+    def get_nowait(self) -> typing.Any:
+        """Takes the next item due to be processed.
+
+        Raises:
+            asyncio.QueueEmpty: If no flow has an item that may be taken.
+        """
+        if all(self.in_flight[key] >= self.max_in_flight for key in self.active):
+            raise asyncio.QueueEmpty
+
+        while True:
+            key = self.active[0]
+
+            if self.in_flight[key] >= self.max_in_flight:
+                self.active.rotate(-1)
+                continue
+
+            if self.deficits[key] < 1:
+                self.deficits[key] += self.weights.get(key, self.default_weight)
+
+            if self.deficits[key] < 1:
+                self.active.rotate(-1)
+                continue
+
+            self.deficits[key] -= 1
+            self.in_flight[key] += 1
+            item = self._pop(key)
+
+            # Move on to the next flow once this one has spent its credit.
+            if key in self.flows and self.deficits[key] < 1:
+                self.active.rotate(-1)
+
+            return item
+
+    async def get(self) -> typing.Any:
+        """Takes the next item due to be processed, waiting for one if needed."""
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+
+            getter = asyncio.get_running_loop().create_future()
+            self.getters.append(getter)
+
+            try:
+                await getter
+            except asyncio.CancelledError:
+                # Pass a wake up this getter received on to another one.
+                if getter.done() and not getter.cancelled():
+                    self._wake()
+
+                raise
+
+    def drop_oldest(self) -> typing.Any:
+        """Discards the oldest item of the deepest flow.
+
+        The deepest flow pays for overload, so a burst from one flow does not
+        push out the items of others.
+
+        Raises:
+            asyncio.QueueEmpty: If the queue is empty.
+        """
+        if not self.flows:
+            raise asyncio.QueueEmpty
+
+        key = max(self.flows, key=lambda key: len(self.flows[key]))
+        item = self._pop(key)
+        self.task_done(item, taken=False)
+
+        return item
+
+    def task_done(self, item: typing.Any, taken: bool = True) -> None:
+        """Marks an item as done, freeing its flow's in-flight slot.
+
+        Arguments:
+            item: The item that is done.
+            taken: Whether the item was taken with get rather than dropped.
+        """
+        if taken:
+            key = self.key(item)
+            self.in_flight[key] -= 1
+
+            if not self.in_flight[key]:
+                del self.in_flight[key]
+
+            self._wake()
+
+        self.unfinished -= 1
+
+        if not self.unfinished:
+            self.finished.set()
+
+    async def join(self) -> None:
+        """Waits until every queued item is done."""
+        await self.finished.wait()
+
+    def _pop(self, key: typing.Hashable) -> typing.Any:
+        """Removes the first item of a flow, retiring the flow once empty."""
+        flow = self.flows[key]
+        item = flow.popleft()
+        self.size -= 1
+
+        if not flow:
+            del self.flows[key]
+            del self.deficits[key]
+            self.active.remove(key)
+
+        return item
+
+    def _wake(self) -> None:
+        """Wakes the longest waiting getter."""
+        while self.getters:
+            getter = self.getters.popleft()
+
+            if not getter.done():
+                getter.set_result(None)
+                return
+
+
+class ModerationQueue:
+    """A class to represent a bounded fair queue drained by a fixed worker pool.
+
+    Items are shared between workers by a FairQueue, so one busy guild cannot
+    take every worker while quieter guilds wait. When the queue is full, new
+    items are handled according to the overload policy. DROP_OLDEST discards
+    the oldest queued item to make room. SAMPLE does the same for a random
+    fraction of new items and drops the rest. FALLBACK hands the new item to
+    the fallback handler instead of queueing it, running at most max_fallbacks
+    of them at once and dropping new items beyond that. Items are dropped from
+    whichever flow has the most queued.
+
+    Arguments:
+        handler: The coroutine function that processes a queued item.
+        max_size: The maximum number of queued items.
+        workers: The number of workers draining the queue.
+        policy: The overload policy.
+        fallback: The coroutine function used by the FALLBACK policy.
+        sample_rate: The fraction of new items admitted by the SAMPLE policy.
+        key: Returns the flow an item belongs to.
+        weights: A mapping of flow keys to their weight.
+        max_in_flight: The maximum number of items a flow may have in flight.
+        max_fallbacks: The maximum number of fallback handlers running at once.
+
+    Attributes:
+        handler: The coroutine function that processes a queued item.
+        queue: The underlying fair queue.
+        workers: The number of workers draining the queue.
+        policy: The overload policy.
+        fallback: The coroutine function used by the FALLBACK policy.
+        sample_rate: The fraction of new items admitted by the SAMPLE policy.
+        max_fallbacks: The maximum number of fallback handlers running at once.
+        tasks: The running worker and fallback tasks.
+        fallback_tasks: The running fallback tasks.
+        queued: The number of items accepted into the queue.
+        dropped: The number of items discarded without processing.
+        processed: The number of items the workers finished.
+        failed: The number of items whose handler raised.
+        fallbacks: The number of items handed to the fallback handler.
+    """
+
+    def __init__(
+        self,
+        handler: typing.Callable[[typing.Any], typing.Awaitable[None]],
+        max_size: int = QUEUE_SIZE,
+        workers: int = QUEUE_WORKERS,
+        policy: OverloadPolicy = OverloadPolicy.DROP_OLDEST,
+        fallback: typing.Callable[[typing.Any], typing.Awaitable[None]] | None = None,
+        sample_rate: float = SAMPLE_RATE,
+        key: typing.Callable[[typing.Any], typing.Hashable] = lambda item: None,
+        weights: dict[typing.Hashable, float] | None = None,
+        max_in_flight: int = GUILD_MAX_IN_FLIGHT,
+        max_fallbacks: int = MAX_FALLBACKS,
+    ) -> None:
+        if policy is OverloadPolicy.FALLBACK and fallback is None:
+            raise ValueError("The FALLBACK policy requires a fallback handler.")
+
+        self.handler = handler
+        self.queue = FairQueue(max_size, key, weights, max_in_flight=max_in_flight)
+        self.workers = workers
+        self.policy = policy
+        self.fallback = fallback
+        self.sample_rate = sample_rate
+        self.max_fallbacks = max_fallbacks
+        self.tasks: set[asyncio.Task] = set()
+        self.fallback_tasks: set[asyncio.Task] = set()
+        self.queued = 0
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+        self.fallbacks = 0
+
+    def start(self) -> None:
+        """Starts the worker pool."""
+        for _ in range(self.workers):
+            self._track(asyncio.create_task(self._work()))
+
+    async def close(self) -> None:
+        """Stops the worker pool, discarding any items still queued."""
+        for task in self.tasks:
+            task.cancel()
+
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def put(self, item: typing.Any) -> bool:
+        """Offers an item to the queue without waiting.
+
+        Arguments:
+            item: The item to process.
+
+        Returns:
+            True if the item was queued, otherwise False.
+        """
+        if self.queue.full():
+            if self.policy is OverloadPolicy.FALLBACK:
+                if len(self.fallback_tasks) >= self.max_fallbacks:
+                    self.dropped += 1
+                    return False
+
+                task = asyncio.create_task(self._fall_back(item))
+
+                self.fallbacks += 1
+                self.fallback_tasks.add(task)
+                task.add_done_callback(self.fallback_tasks.discard)
+                self._track(task)
+                return False
+
+            if (
+                self.policy is OverloadPolicy.SAMPLE
+                and random.random() >= self.sample_rate
+            ):
+                self.dropped += 1
+                return False
+
+            self.queue.drop_oldest()
+            self.dropped += 1
+
+        self.queue.put_nowait(item)
+        self.queued += 1
+
+        return True
+
+    def metrics(self) -> dict[str, typing.Any]:
+        """Returns the queue counters and the depth of each flow."""
+        return {
+            "depth": self.queue.qsize(),
+            "depths": self.queue.depths(),
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "failed": self.failed,
+            "fallbacks": self.fallbacks,
+        }
+
+    def _track(self, task: asyncio.Task) -> None:
+        """Keeps a reference to a task until it finishes."""
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _fall_back(self, item: typing.Any) -> None:
+        """Processes an item with the fallback handler."""
+        try:
+            await self.fallback(item)
+        except Exception:
+            self.failed += 1
+            logger.exception("Failed to process an item with the fallback handler")
+
+    async def _work(self) -> None:
+        """Processes queued items until cancelled."""
+        while True:
+            item = await self.queue.get()
+
+            try:
+                await self.handler(item)
+            except Exception:
+                self.failed += 1
+                logger.exception("Failed to process a queued item")
+            else:
+                self.processed += 1
+            finally:
+                self.queue.task_done(item)
+
+
+class ContentTracker:
+    """A class to represent a bounded map of recently seen message contents.
+
+    Only a hash of each message's normalized content is kept, and the least
+    recently seen messages are forgotten once max_size is reached.
+
+    Arguments:
+        max_size: The maximum number of messages to remember.
+
+    Attributes:
+        max_size: The maximum number of messages to remember.
+        hashes: A mapping of message IDs to the hash of their content.
+    """
+
+    def __init__(self, max_size: int = CONTENT_TRACKER_SIZE) -> None:
+        self.max_size = max_size
+        self.hashes: collections.OrderedDict[int, int] = collections.OrderedDict()
+
+    def update(self, message_id: int, content: str) -> bool:
+        """Records the content of a message.
+
+        Arguments:
+            message_id: The ID of the message.
+            content: The normalized content of the message.
+
+        Returns:
+            True if the message is new or its content changed, otherwise False.
+        """
+        content_hash = hash(content)
+        changed = self.hashes.get(message_id) != content_hash
+
+        self.hashes[message_id] = content_hash
+        self.hashes.move_to_end(message_id)
+
+        if len(self.hashes) > self.max_size:
+            self.hashes.popitem(last=False)
+
+        return changed
+
+
+class RepeatWindow:
+    """A class to represent the verdicts of recent messages in each channel.
+
+    Each channel keeps a sliding window of the hashes and verdicts of its
+    latest messages, so repeats posted during a spam raid are resolved
+    without classifying them again. A window holds at most window_size
+    entries, each expiring after ttl seconds, and only the max_channels most
+    recently active channels are kept.
+
+    Arguments:
+        window_size: The maximum number of entries per channel.
+        ttl: The number of seconds an entry stays in the window.
+        max_channels: The maximum number of channels to keep windows for.
+
+    Attributes:
+        window_size: The maximum number of entries per channel.
+        ttl: The number of seconds an entry stays in the window.
+        max_channels: The maximum number of channels to keep windows for.
+        windows: A mapping of channel IDs to their (expiry time, content
+            hash, verdict) entries, oldest first.
+        profane_repeats: The number of lookups that found a profane verdict.
+        clean_repeats: The number of lookups that found a clean verdict.
+    """
+
+    def __init__(
+        self,
+        window_size: int = REPEAT_WINDOW_SIZE,
+        ttl: float = REPEAT_WINDOW_TTL,
+        max_channels: int = REPEAT_WINDOW_CHANNELS,
+    ) -> None:
+        self.window_size = window_size
+        self.ttl = ttl
+        self.max_channels = max_channels
+        self.windows: collections.OrderedDict[
+            int, collections.deque[tuple[float, int, bool]]
+        ] = collections.OrderedDict()
+        self.profane_repeats = 0
+        self.clean_repeats = 0
+
+    def get(self, channel_id: int, content: str) -> bool | None:
+        """Returns the verdict of a repeat of recent content in a channel.
+
+        Arguments:
+            channel_id: The ID of the channel.
+            content: The normalized content of the message.
+
+        Returns:
+            The verdict of the latest matching entry, or None if there is none.
+        """
+        window = self._expire(channel_id)
+
+        if window is None:
+            return None
+
+        content_hash = hash(content)
+
+        for _, entry_hash, verdict in reversed(window):
+            if entry_hash == content_hash:
+                if verdict:
+                    self.profane_repeats += 1
+                else:
+                    self.clean_repeats += 1
+
+                return verdict
+
+        return None
+
+    def add(self, channel_id: int, content: str, verdict: bool) -> None:
+        """Records the verdict of a message in its channel's window.
+
+        Arguments:
+            channel_id: The ID of the channel.
+            content: The normalized content of the message.
+            verdict: Whether the content contains profanity.
+        """
+        window = self.windows.get(channel_id)
+
+        if window is None:
+            window = self.windows[channel_id] = collections.deque(
+                maxlen=self.window_size
+            )
+
+            if len(self.windows) > self.max_channels:
+                self.windows.popitem(last=False)
+
+        self.windows.move_to_end(channel_id)
+        window.append((time.monotonic() + self.ttl, hash(content), verdict))
+
+    def _expire(self, channel_id: int) -> collections.deque | None:
+        """Removes the expired entries of a channel and returns its window."""
+        window = self.windows.get(channel_id)
+
+        if window is None:
+            return None
+
+        now = time.monotonic()
+
+        while window and window[0][0] <= now:
+            window.popleft()
+
+        if not window:
+            del self.windows[channel_id]
+            return None
+
+        return window
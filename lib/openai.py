@@ -1,20 +1,477 @@
-import openai
+import aiohttp
+import asyncio
+import collections
+import enum
+import json
+import math
+import random
+import time
+import typing
 
 
-def prompt(message: str) -> str:
-    """Prompts ChatGPT and returns its response.
+API_BASE = "https://api.openai.com/v1"
+MODEL = "gpt-3.5-turbo"
+MAX_CONCURRENCY = 16
+REQUEST_TIMEOUT = 10.0
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 5
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_SLOW_CALL = 5.0
+BREAKER_RESET_TIMEOUT = 30.0
+CHARACTERS_PER_TOKEN = 4
+PROMPT_TOKEN_PRICE = 0.0015 / 1000
+TOKEN_BUDGET = 100_000
+GUILD_TOKEN_BUDGET = 10_000
+BUDGET_SAMPLE_RATE = 0.1
+SPEND_RATE_WINDOW = 60.0
+CLASSIFY_PROMPT = """
+Determine which of these messages contain profanity.
+
+Expected Response: a JSON array containing YES or NO for each message, in order.
+
+Messages:
+{messages}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens text is encoded as, without a tokenizer."""
+    return len(text) // CHARACTERS_PER_TOKEN + 1
+
+
+def estimate_cost(text: str) -> float:
+    """Estimates the price in US dollars of sending text in a prompt."""
+    return estimate_tokens(text) * PROMPT_TOKEN_PRICE
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class BreakerState(enum.Enum):
+    """The state of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """A class to represent a circuit breaker around a remote call.
+
+    The breaker records whether each of the last window calls failed, where
+    a call that raised or took longer than slow_call seconds counts as a
+    failure. Once the failure rate reaches failure_rate it opens and rejects
+    calls for reset_timeout seconds, then half-opens to let a single probe
+    through. A successful probe closes it again, a failed one reopens it.
+
+    Arguments:
+        window: The number of recent calls the failure rate is measured over.
+        min_calls: The number of calls needed before the breaker can open.
+        failure_rate: The failure rate at which the breaker opens.
+        slow_call: The number of seconds after which a call counts as failed.
+        reset_timeout: The number of seconds the breaker stays open.
+
+    Attributes:
+        min_calls: The number of calls needed before the breaker can open.
+        failure_rate: The failure rate at which the breaker opens.
+        slow_call: The number of seconds after which a call counts as failed.
+        reset_timeout: The number of seconds the breaker stays open.
+        state: The current state of the breaker.
+        outcomes: Whether each recent call failed.
+        latencies: The latency of each recent call.
+        opened_at: The time the breaker last opened.
+        probing: Whether a half-open probe is in flight.
+    """
+
+    def __init__(
+        self,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call: float = BREAKER_SLOW_CALL,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self.outcomes: collections.deque[bool] = collections.deque(maxlen=window)
+        self.latencies: collections.deque[float] = collections.deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self) -> bool:
+        """Returns whether a call may go through, half-opening if it is time."""
+        if self.state is BreakerState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+
+            self.state = BreakerState.HALF_OPEN
+            self.probing = False
+
+        if self.state is BreakerState.HALF_OPEN:
+            if self.probing:
+                return False
+
+            self.probing = True
+
+        return True
+
+    def record(self, failed: bool, latency: float) -> None:
+        """Records the outcome of a call and updates the state."""
+        self.outcomes.append(failed)
+        self.latencies.append(latency)
+
+        if self.state is BreakerState.HALF_OPEN:
+            self.probing = False
+
+            if failed:
+                self._open()
+            else:
+                self.state = BreakerState.CLOSED
+                self.outcomes.clear()
+
+            return
+
+        if (
+            len(self.outcomes) >= self.min_calls
+            and sum(self.outcomes) / len(self.outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        """Opens the breaker."""
+        self.state = BreakerState.OPEN
+        self.opened_at = time.monotonic()
+        self.outcomes.clear()
+
+    async def call(
+        self, function: typing.Callable[..., typing.Awaitable], *args: typing.Any
+    ) -> typing.Any:
+        """Calls a coroutine function through the breaker.
+
+        Arguments:
+            function: The coroutine function to call.
+            args: The arguments to call it with.
+
+        Returns:
+            The result of the call.
+
+        Raises:
+            CircuitOpenError: The breaker is rejecting calls.
+        """
+        if not self.allow():
+            raise CircuitOpenError("The circuit breaker is open.")
+
+        start = time.monotonic()
+
+        try:
+            result = await function(*args)
+        except asyncio.CancelledError:
+            self.probing = False
+            raise
+        except Exception:
+            self.record(True, time.monotonic() - start)
+            raise
+
+        latency = time.monotonic() - start
+        self.record(latency > self.slow_call, latency)
+
+        return result
+
+    def metrics(self) -> dict[str, typing.Any]:
+        """Returns the state, failure rate and mean latency of recent calls."""
+        return {
+            "state": self.state.value,
+            "failure_rate": sum(self.outcomes) / len(self.outcomes)
+            if self.outcomes
+            else 0.0,
+            "latency": sum(self.latencies) / len(self.latencies)
+            if self.latencies
+            else 0.0,
+        }
+
+
+class TokenBucket:
+    """A class to represent a bucket of tokens refilled at a steady rate.
+
+    Arguments:
+        rate: The number of tokens added per second.
+        capacity: The maximum number of tokens the bucket holds.
+
+    Attributes:
+        rate: The number of tokens added per second.
+        capacity: The maximum number of tokens the bucket holds.
+        tokens: The number of tokens in the bucket.
+        updated_at: The time the bucket was last refilled.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self) -> float:
+        """Adds the tokens earned since the last refill and returns the total."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+        return self.tokens
+
+
+class SpendRate:
+    """A class to represent an exponentially decaying rate of spend.
 
     Arguments:
-        message: The message to send to the model.
+        window: The number of seconds the rate is averaged over.
 
-    Returns:
-        The response from the model.
+    Attributes:
+        window: The number of seconds the rate is averaged over.
+        rate: The spend per second as of updated_at.
+        updated_at: The time the rate was last updated.
     """
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "user", "content": message},
-        ],
-    )
-
-    return response["choices"][0]["message"]["content"]
+
+    def __init__(self, window: float = SPEND_RATE_WINDOW) -> None:
+        self.window = window
+        self.rate = 0.0
+        self.updated_at = time.monotonic()
+
+    def add(self, amount: float) -> None:
+        """Records some spend."""
+        self.rate = self.current() + amount / self.window
+        self.updated_at = time.monotonic()
+
+    def current(self) -> float:
+        """Returns the current spend per second."""
+        elapsed = time.monotonic() - self.updated_at
+
+        return self.rate * math.exp(-elapsed / self.window)
+
+
+class BudgetPolicy(enum.Enum):
+    """What a budget does with a guild's messages once its bucket is empty."""
+
+    SKIP = "skip"
+    SAMPLE = "sample"
+
+
+class Budget:
+    """A class to represent a budget of prompt tokens sent to the LLM.
+
+    Every message is charged its estimated prompt tokens against a global
+    bucket and a bucket of its guild, both refilled per minute. A message is
+    only sent if both buckets can pay for it. Once a guild's bucket is empty
+    its messages are handled by its policy: SKIP turns them all away, while
+    SAMPLE still lets a fraction through as long as the global bucket can pay.
+
+    Arguments:
+        tokens_per_minute: The global number of tokens per minute.
+        guild_tokens_per_minute: The number of tokens per minute of each guild.
+        policies: A mapping of guild IDs to their policy.
+        default_policy: The policy of guilds missing from the policies.
+        sample_rate: The fraction of messages the SAMPLE policy lets through.
+
+    Attributes:
+        guild_tokens_per_minute: The number of tokens per minute of each guild.
+        policies: A mapping of guild IDs to their policy.
+        default_policy: The policy of guilds missing from the policies.
+        sample_rate: The fraction of messages the SAMPLE policy lets through.
+        bucket: The global bucket.
+        guild_buckets: A mapping of guild IDs to their bucket.
+        spend: The global spend rate.
+        guild_spend: A mapping of guild IDs to their spend rate.
+        spent: The total number of tokens spent.
+        sampled: The number of messages let through by the SAMPLE policy.
+        denied: The number of messages turned away.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: float = TOKEN_BUDGET,
+        guild_tokens_per_minute: float = GUILD_TOKEN_BUDGET,
+        policies: dict[int, BudgetPolicy] | None = None,
+        default_policy: BudgetPolicy = BudgetPolicy.SKIP,
+        sample_rate: float = BUDGET_SAMPLE_RATE,
+    ) -> None:
+        self.guild_tokens_per_minute = guild_tokens_per_minute
+        self.policies = policies or {}
+        self.default_policy = default_policy
+        self.sample_rate = sample_rate
+        self.bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self.guild_buckets: dict[int, TokenBucket] = {}
+        self.spend = SpendRate()
+        self.guild_spend: dict[int, SpendRate] = {}
+        self.spent = 0
+        self.sampled = 0
+        self.denied = 0
+
+    def allow(self, guild_id: int, content: str) -> bool:
+        """Charges the budget for sending content, if it can pay for it.
+
+        Arguments:
+            guild_id: The ID of the guild the content was sent in.
+            content: The content to send.
+
+        Returns:
+            True if the content may be sent, otherwise False.
+        """
+        tokens = estimate_tokens(content)
+        guild_bucket = self.guild_buckets.get(guild_id)
+
+        if guild_bucket is None:
+            guild_bucket = self.guild_buckets[guild_id] = TokenBucket(
+                self.guild_tokens_per_minute / 60, self.guild_tokens_per_minute
+            )
+
+        if self.bucket.refill() < tokens:
+            self.denied += 1
+            return False
+
+        if guild_bucket.refill() < tokens:
+            policy = self.policies.get(guild_id, self.default_policy)
+
+            if policy is BudgetPolicy.SKIP or random.random() >= self.sample_rate:
+                self.denied += 1
+                return False
+
+            self.sampled += 1
+        else:
+            guild_bucket.tokens -= tokens
+
+        self.bucket.tokens -= tokens
+        self.spent += tokens
+        self.spend.add(tokens)
+        self.guild_spend.setdefault(guild_id, SpendRate()).add(tokens)
+
+        return True
+
+    def forget(self, guild_id: int) -> None:
+        """Removes the bucket and spend rate of a guild."""
+        self.guild_buckets.pop(guild_id, None)
+        self.guild_spend.pop(guild_id, None)
+
+    def metrics(self) -> dict[str, typing.Any]:
+        """Returns the spend counters and tokens per minute being spent."""
+        return {
+            "spent": self.spent,
+            "sampled": self.sampled,
+            "denied": self.denied,
+            "tokens_per_minute": round(self.spend.current() * 60, 1),
+            "cost_per_minute": round(self.spend.current() * 60 * PROMPT_TOKEN_PRICE, 6),
+            "guild_tokens_per_minute": {
+                str(guild_id): round(rate.current() * 60, 1)
+                for guild_id, rate in self.guild_spend.items()
+            },
+        }
+
+
+CLASSIFIER_ERRORS = (
+    CircuitOpenError,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ValueError,
+)
+
+
+class Client:
+    """A class to represent a non-blocking ChatGPT client.
+
+    Arguments:
+        api_key: The OpenAI secret key.
+        base_url: The base URL of the chat completion API.
+        max_concurrency: The maximum number of requests in flight at once.
+        timeout: The number of seconds a single request may take.
+
+    Attributes:
+        api_key: The OpenAI secret key.
+        base_url: The base URL of the chat completion API.
+        semaphore: The semaphore bounding the number of requests in flight.
+        timeout: The timeout applied to each request.
+        session: The shared HTTP session, or None if the client is not started.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = API_BASE,
+        max_concurrency: int = MAX_CONCURRENCY,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        """Opens the shared HTTP session if it is not already open."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+            )
+
+    async def close(self) -> None:
+        """Closes the shared HTTP session."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def prompt(self, message: str) -> str:
+        """Prompts ChatGPT and returns its response.
+
+        Arguments:
+            message: The message to send to the model.
+
+        Returns:
+            The response from the model.
+        """
+        await self.start()
+
+        async with self.semaphore:
+            async with self.session.post(
+                f"{self.base_url}/chat/completions",
+                json={
+                    "model": MODEL,
+                    "messages": [
+                        {"role": "user", "content": message},
+                    ],
+                },
+            ) as response:
+                response.raise_for_status()
+                body = await response.json()
+
+        return body["choices"][0]["message"]["content"]
+
+    async def classify(self, messages: list[str]) -> list[bool]:
+        """Classifies a batch of messages for profanity with a single request.
+
+        Arguments:
+            messages: The messages to classify.
+
+        Returns:
+            True for each message that contains profanity, otherwise False.
+
+        Raises:
+            ValueError: The response did not contain one verdict per message.
+        """
+        response = await self.prompt(
+            CLASSIFY_PROMPT.format(
+                messages="\n".join(
+                    f"{index}. {json.dumps(message)}"
+                    for index, message in enumerate(messages, 1)
+                )
+            )
+        )
+        verdicts = json.loads(response)
+
+        if not isinstance(verdicts, list) or len(verdicts) != len(messages):
+            raise ValueError(f"Expected {len(messages)} verdicts, got: {response}")
+
+        return [str(verdict).upper() == "YES" for verdict in verdicts]
@@ -1,33 +1,417 @@
+import collections
+import enum
+import functools
 import hikari
+import re
+import time
+import typing
+import unicodedata
 
 import motor.motor_asyncio as motor
 
+from pymongo import ReturnDocument
+
+
+SETTINGS_TTL = 300.0
+BLOCKED_TERMS = (
+    "asshole",
+    "bastard",
+    "bitch",
+    "bollocks",
+    "bullshit",
+    "cock",
+    "cunt",
+    "dick",
+    "dickhead",
+    "fuck",
+    "fucker",
+    "fucking",
+    "motherfucker",
+    "piss",
+    "pussy",
+    "shit",
+    "slut",
+    "twat",
+    "wanker",
+    "whore",
+)
+SUSPECT_TERMS = (
+    "ass",
+    "crap",
+    "damn",
+    "hell",
+    "hoe",
+    "kill",
+    "nazi",
+    "porn",
+    "sex",
+    "tits",
+)
+
+NORMALIZE_CACHE_SIZE = 16_384
+NORMALIZE_CACHE_MAX_LENGTH = 256
+ZERO_WIDTH_CHARACTERS = "\u00ad\u180e\u200b\u200c\u200d\u200e\u200f\u2060\ufeff"
+CONFUSABLES = {
+    # Cyrillic
+    "а": "a",
+    "в": "b",
+    "е": "e",
+    "ё": "e",
+    "к": "k",
+    "м": "m",
+    "н": "h",
+    "о": "o",
+    "р": "p",
+    "с": "c",
+    "т": "t",
+    "у": "y",
+    "х": "x",
+    "і": "i",
+    "ї": "i",
+    "ј": "j",
+    "ѕ": "s",
+    "ԁ": "d",
+    "ԛ": "q",
+    "ԝ": "w",
+    # Greek
+    "α": "a",
+    "β": "b",
+    "ε": "e",
+    "η": "n",
+    "ι": "i",
+    "κ": "k",
+    "ν": "v",
+    "ο": "o",
+    "ρ": "p",
+    "τ": "t",
+    "υ": "u",
+    "χ": "x",
+    # Symbols
+    "@": "a",
+    "$": "s",
+}
+NORMALIZE_TABLE = str.maketrans(
+    {
+        **CONFUSABLES,
+        **{character: None for character in ZERO_WIDTH_CHARACTERS},
+    }
+)
+REPEATED_CHARACTERS = re.compile(r"(.)\1{2,}", re.DOTALL)
+LEET_TABLE = str.maketrans("013457", "oieast")
+LEET_PUNCTUATION = re.compile(r"(?<=\w)[!|](?=\w)")
+
+
+def normalize(content: str) -> str:
+    """Normalizes message content so that evasive variants compare equal.
+
+    The content is NFKD normalized with its combining marks stripped, so
+    accented letters fold to their base letter, then recomposed and
+    casefolded. Zero-width characters are stripped, confusable characters are
+    folded to their Latin lookalikes and runs of three or more of the same
+    character are collapsed to one. Digits are left alone, so that the
+    content sent to the classifiers keeps its numbers. Only
+    short contents, which repeat far more often than long ones, are cached,
+    so the cache holds at most NORMALIZE_CACHE_SIZE * NORMALIZE_CACHE_MAX_LENGTH
+    characters.
+
+    Arguments:
+        content: The content to normalize.
+
+    Returns:
+        The normalized content.
+    """
+    if len(content) > NORMALIZE_CACHE_MAX_LENGTH:
+        return normalize_uncached(content)
+
+    return normalize_cached(content)
+
+
+def normalize_uncached(content: str) -> str:
+    """Normalizes message content without caching the result."""
+    content = "".join(
+        character
+        for character in unicodedata.normalize("NFKD", content)
+        if not unicodedata.combining(character)
+    )
+    content = unicodedata.normalize("NFC", content).casefold()
+    content = content.translate(NORMALIZE_TABLE)
+
+    return REPEATED_CHARACTERS.sub(r"\1", content)
+
+
+normalize_cached = functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)(normalize_uncached)
+
+
+def fold_leet(content: str) -> str:
+    """Folds leetspeak in normalized content to the letters it stands for.
+
+    Digits are folded wherever they appear, while "!" and "|" are only folded
+    inside words, so that trailing punctuation still ends a word.
+
+    Arguments:
+        content: The normalized content.
+
+    Returns:
+        The folded content, which is the same length as the input.
+    """
+    return LEET_PUNCTUATION.sub("i", content).translate(LEET_TABLE)
+
+
+class Verdict(enum.Enum):
+    """The outcome of scanning a message against a lexicon."""
+
+    CLEAN = "clean"
+    AMBIGUOUS = "ambiguous"
+    PROFANE = "profane"
+
+
+class Matcher:
+    """A class to represent a compiled Aho-Corasick automaton over a lexicon.
+
+    Blocked terms found as whole words make a message profane, and suspect
+    terms found as whole words make it ambiguous, since they need context to
+    be judged. Blocked terms found inside other words also make it ambiguous,
+    while suspect terms inside other words, such as "hell" in "hello", are
+    ignored. Terms and content are both folded with fold_leet, so "sh1t"
+    matches "shit".
+
+    Arguments:
+        blocked_terms: The terms that are profane on their own.
+        suspect_terms: The terms that may or may not be profane in context.
+
+    Attributes:
+        transitions: The goto function of each automaton state.
+        failures: The failure link of each automaton state.
+        outputs: The (term length, blocked) pairs that end at each state.
+    """
+
+    def __init__(
+        self,
+        blocked_terms: typing.Iterable[str] = BLOCKED_TERMS,
+        suspect_terms: typing.Iterable[str] = SUSPECT_TERMS,
+    ) -> None:
+        self.transitions: list[dict[str, int]] = [{}]
+        self.failures: list[int] = [0]
+        self.outputs: list[list[tuple[int, bool]]] = [[]]
+
+        for term in suspect_terms:
+            self._add(term, False)
+
+        for term in blocked_terms:
+            self._add(term, True)
+
+        self._link()
+
+    def _add(self, term: str, blocked: bool) -> None:
+        """Adds a term to the trie underlying the automaton."""
+        term = fold_leet(normalize(term))
+        state = 0
+
+        if not term:
+            return
+
+        for character in term:
+            if character not in self.transitions[state]:
+                self.transitions.append({})
+                self.failures.append(0)
+                self.outputs.append([])
+                self.transitions[state][character] = len(self.transitions) - 1
+
+            state = self.transitions[state][character]
+
+        self.outputs[state].append((len(term), blocked))
+
+    def _link(self) -> None:
+        """Computes failure links breadth first and merges their outputs."""
+        queue = collections.deque(self.transitions[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for character, child in self.transitions[state].items():
+                failure = self.failures[state]
+
+                while failure and character not in self.transitions[failure]:
+                    failure = self.failures[failure]
+
+                link = self.transitions[failure].get(character, 0)
+
+                self.failures[child] = link if link != child else 0
+                self.outputs[child] = self.outputs[child] + self.outputs[link]
+                queue.append(child)
+
+    def scan(self, content: str, whole_words: bool = True) -> Verdict:
+        """Scans content for lexicon terms in a single pass.
+
+        Arguments:
+            content: The content to scan.
+            whole_words: Whether blocked terms must be whole words to count.
+
+        Returns:
+            The verdict for the content.
+        """
+        content = fold_leet(content.lower())
+        verdict = Verdict.CLEAN
+        state = 0
+
+        for index, character in enumerate(content):
+            while state and character not in self.transitions[state]:
+                state = self.failures[state]
+
+            state = self.transitions[state].get(character, 0)
+
+            for length, blocked in self.outputs[state]:
+                start = index - length + 1
+                end = index + 1
+                whole_word = (start == 0 or not content[start - 1].isalnum()) and (
+                    end == len(content) or not content[end].isalnum()
+                )
+
+                if blocked and (whole_word or not whole_words):
+                    return Verdict.PROFANE
+
+                if blocked or whole_word:
+                    verdict = Verdict.AMBIGUOUS
+
+        return verdict
+
+
+DEFAULT_MATCHER = Matcher()
+
+
+class GuildMatchers:
+    """A class to represent the matchers compiled from each guild's word lists.
+
+    Each guild's banned terms are added to the default blocked terms and its
+    allowed terms are removed from the default lexicon. Every term is
+    normalized the same way as message content before it is compared or
+    compiled. Guilds without custom lists share the default matcher.
+
+    Attributes:
+        matchers: A mapping of guild IDs to their compiled matcher.
+    """
+
+    def __init__(self) -> None:
+        self.matchers: dict[str, Matcher] = {}
+
+    def get(self, guild_id: hikari.Snowflake) -> Matcher | None:
+        """Returns the compiled matcher of a guild, or None if it is not loaded."""
+        return self.matchers.get(str(guild_id))
+
+    def compile(
+        self,
+        guild_id: hikari.Snowflake,
+        banned_words: typing.Iterable[str],
+        allowed_words: typing.Iterable[str],
+    ) -> Matcher:
+        """Compiles and caches the matcher of a guild.
+
+        Arguments:
+            guild_id: The ID of the guild.
+            banned_words: The guild's banned terms.
+            allowed_words: The guild's allowed terms.
+
+        Returns:
+            The compiled matcher.
+        """
+        banned = {normalize(word) for word in banned_words}
+        allowed = {normalize(word) for word in allowed_words}
+
+        if banned or allowed:
+            matcher = Matcher(
+                (banned | {normalize(term) for term in BLOCKED_TERMS}) - allowed,
+                {normalize(term) for term in SUSPECT_TERMS} - allowed - banned,
+            )
+        else:
+            matcher = DEFAULT_MATCHER
+
+        self.matchers[str(guild_id)] = matcher
+
+        return matcher
+
+    def invalidate(self, guild_id: hikari.Snowflake) -> None:
+        """Removes the compiled matcher of a guild."""
+        self.matchers.pop(str(guild_id), None)
+
+
+class SettingsCache:
+    """A class to represent an in-memory cache of per-guild filter settings.
+
+    Arguments:
+        ttl: The number of seconds a cached setting stays valid.
+
+    Attributes:
+        ttl: The number of seconds a cached setting stays valid.
+        entries: A mapping of guild IDs to (expiry time, enabled) pairs.
+    """
+
+    def __init__(self, ttl: float = SETTINGS_TTL) -> None:
+        self.ttl = ttl
+        self.entries: dict[str, tuple[float, bool]] = {}
+
+    def get(self, guild_id: hikari.Snowflake) -> bool | None:
+        """Returns the cached setting, or None if it is missing or expired."""
+        entry = self.entries.get(str(guild_id))
+
+        if entry is None:
+            return None
+
+        if entry[0] <= time.monotonic():
+            del self.entries[str(guild_id)]
+            return None
+
+        return entry[1]
+
+    def set(self, guild_id: hikari.Snowflake, enabled: bool) -> None:
+        """Caches the setting for a guild."""
+        self.entries[str(guild_id)] = (time.monotonic() + self.ttl, enabled)
+
+    def invalidate(self, guild_id: hikari.Snowflake) -> None:
+        """Removes the cached setting for a guild."""
+        self.entries.pop(str(guild_id), None)
+
 
 async def is_filter_enabled(
-    collection: motor.AsyncIOMotorCollection, guild_id: hikari.Snowflake
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    cache: SettingsCache | None = None,
 ) -> bool:
     """Checks if the profanity filter is enabled for the specific guild.
 
     Arguments:
         collection: The mongo collection.
         guild_id: The ID of the guild to check.
+        cache: The settings cache to consult before querying the collection.
 
     Returns:
         True if it is enabled, otherwise False.
     """
+    if cache is not None:
+        enabled = cache.get(guild_id)
+
+        if enabled is not None:
+            return enabled
+
     document = await collection.find_one({"guild_id": str(guild_id)})
+    enabled = document.get("profanity_filter", False) if document is not None else False
+
+    if cache is not None:
+        cache.set(guild_id, enabled)
 
-    return document.get("profanity_filter", False) if document is not None else False
+    return enabled
 
 
 async def enable_filter(
-    collection: motor.AsyncIOMotorCollection, guild_id: hikari.Snowflake
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    cache: SettingsCache | None = None,
 ) -> None:
     """Enables the profanity filter for the specified guild.
 
     Arguments:
         collection: The mongo collection.
         guild_id: The ID of the guild to enable the filter for.
+        cache: The settings cache to write the new setting through to.
 
     Returns:
         None.
@@ -36,15 +420,21 @@ async def enable_filter(
         {"guild_id": str(guild_id)}, {"$set": {"profanity_filter": True}}, upsert=True
     )
 
+    if cache is not None:
+        cache.set(guild_id, True)
+
 
 async def disable_filter(
-    collection: motor.AsyncIOMotorCollection, guild_id: hikari.Snowflake
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    cache: SettingsCache | None = None,
 ) -> None:
     """Disables the profanity filter for the specified guild.
 
     Arguments:
         collection: The mongo collection.
         guild_id: The ID of the guild to disable the filter for.
+        cache: The settings cache to write the new setting through to.
 
     Returns:
         None.
@@ -52,3 +442,167 @@ async def disable_filter(
     await collection.update_one(
         {"guild_id": str(guild_id)}, {"$set": {"profanity_filter": False}}, upsert=True
     )
+
+    if cache is not None:
+        cache.set(guild_id, False)
+
+
+async def get_matcher(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    matchers: GuildMatchers,
+) -> Matcher:
+    """Gets the matcher of a guild, loading its word lists on first use.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        matchers: The compiled guild matchers.
+
+    Returns:
+        The guild's matcher.
+    """
+    matcher = matchers.get(guild_id)
+
+    if matcher is None:
+        document = await collection.find_one(
+            {"guild_id": str(guild_id)}, {"banned_words": 1, "allowed_words": 1}
+        )
+        matcher = compile_word_lists(matchers, guild_id, document)
+
+    return matcher
+
+
+def compile_word_lists(
+    matchers: GuildMatchers, guild_id: hikari.Snowflake, document: dict | None
+) -> Matcher:
+    """Compiles the word lists of a guild's settings document.
+
+    Arguments:
+        matchers: The compiled guild matchers.
+        guild_id: The ID of the guild.
+        document: The guild's settings document, or None if it has none.
+
+    Returns:
+        The guild's matcher.
+    """
+    document = document or {}
+
+    return matchers.compile(
+        guild_id, document.get("banned_words", []), document.get("allowed_words", [])
+    )
+
+
+async def update_word_lists(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    update: dict,
+    matchers: GuildMatchers | None = None,
+) -> dict:
+    """Updates the word lists of a guild and rebuilds only that guild's matcher.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        update: The update to apply to the guild's settings document.
+        matchers: The compiled guild matchers to rebuild the matcher in.
+
+    Returns:
+        The guild's updated word lists.
+    """
+    document = await collection.find_one_and_update(
+        {"guild_id": str(guild_id)},
+        update,
+        projection={"banned_words": 1, "allowed_words": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+    if matchers is not None:
+        compile_word_lists(matchers, guild_id, document)
+
+    return {
+        "banned_words": document.get("banned_words", []),
+        "allowed_words": document.get("allowed_words", []),
+    }
+
+
+async def ban_word(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    word: str,
+    matchers: GuildMatchers | None = None,
+) -> dict:
+    """Adds a term to a guild's banned words.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        word: The term to ban.
+        matchers: The compiled guild matchers to rebuild the matcher in.
+
+    Returns:
+        The guild's updated word lists.
+    """
+    word = normalize(word.strip())
+
+    return await update_word_lists(
+        collection,
+        guild_id,
+        {"$addToSet": {"banned_words": word}, "$pull": {"allowed_words": word}},
+        matchers,
+    )
+
+
+async def allow_word(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    word: str,
+    matchers: GuildMatchers | None = None,
+) -> dict:
+    """Adds a term to a guild's allowed words.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        word: The term to allow.
+        matchers: The compiled guild matchers to rebuild the matcher in.
+
+    Returns:
+        The guild's updated word lists.
+    """
+    word = normalize(word.strip())
+
+    return await update_word_lists(
+        collection,
+        guild_id,
+        {"$addToSet": {"allowed_words": word}, "$pull": {"banned_words": word}},
+        matchers,
+    )
+
+
+async def remove_word(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    word: str,
+    matchers: GuildMatchers | None = None,
+) -> dict:
+    """Removes a term from both of a guild's word lists.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        word: The term to remove.
+        matchers: The compiled guild matchers to rebuild the matcher in.
+
+    Returns:
+        The guild's updated word lists.
+    """
+    word = normalize(word.strip())
+
+    return await update_word_lists(
+        collection,
+        guild_id,
+        {"$pull": {"banned_words": word, "allowed_words": word}},
+        matchers,
+    )
@@ -1,6 +1,7 @@
 import hikari
 import lightbulb
 
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
 from hikari.components import ButtonStyle
 from lightbulb.utils.nav import (
@@ -100,6 +101,118 @@ async def info(
     )
 
 
+class LazyNavigator(ButtonNavigator):
+    """A class to represent a button navigator that loads pages on demand.
+
+    Pages are pulled from an asynchronous iterator the first time the next
+    button moves past the last loaded page, so only the pages a user actually
+    views are ever built.
+
+    Arguments:
+        pages: The pages to navigate through.
+        buttons: The buttons to navigate with.
+        timeout: The number of seconds until the buttons stop working.
+
+    Attributes:
+        source: The pages that have not been loaded yet.
+        pages: The pages loaded so far.
+        exhausted: Whether every page has been loaded.
+    """
+
+    def __init__(
+        self,
+        pages: AsyncIterator[hikari.Embed],
+        buttons: list[Button],
+        timeout: float = 120,
+    ) -> None:
+        super().__init__([None], buttons=buttons, timeout=timeout)
+        self.source = pages
+        self.pages: list[hikari.Embed] = []
+        self.exhausted = False
+
+    async def load_page(self) -> bool:
+        """Loads the next page.
+
+        Returns:
+            True if a page was loaded, False if there are no more pages.
+        """
+        if self.exhausted:
+            return False
+
+        try:
+            page = await anext(self.source)
+        except StopAsyncIteration:
+            self.exhausted = True
+            return False
+
+        self.pages.append(page)
+
+        return True
+
+    async def run(self, context: lightbulb.Context) -> None:
+        """Loads the first page and runs the navigator.
+
+        Arguments:
+            context: The command context.
+
+        Returns:
+            None.
+        """
+        if not self.pages and not await self.load_page():
+            raise ValueError("You cannot pass fewer than 1 page to the navigator.")
+
+        await super().run(context)
+
+
+async def lazy_next_page(navigator: LazyNavigator, _: hikari.Event) -> None:
+    """Moves a lazy navigator to the next page, wrapping once every page is loaded."""
+    if navigator.current_page_index + 1 < len(navigator.pages):
+        navigator.current_page_index += 1
+    elif await navigator.load_page():
+        navigator.current_page_index += 1
+    else:
+        navigator.current_page_index = 0
+
+
+async def lazy_prev_page(navigator: LazyNavigator, _: hikari.Event) -> None:
+    """Moves a lazy navigator to the previous page, wrapping once every page is loaded."""
+    if navigator.current_page_index > 0:
+        navigator.current_page_index -= 1
+    elif navigator.exhausted:
+        navigator.current_page_index = len(navigator.pages) - 1
+
+
+def build_page(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+    embed_title: str,
+    embed_description: str,
+    index: int,
+    content: str,
+) -> hikari.Embed:
+    """Builds a page of a paginated info embed.
+
+    Arguments:
+        context: The command context.
+        embed_title: The title of the embed.
+        embed_description: The description of the embed.
+        index: The number of the page.
+        content: The content of the page.
+
+    Returns:
+        The built page.
+    """
+    embed = build_embed(
+        embed_title,
+        f"{embed_description} {content}",
+        context.app.get_me().avatar_url,
+        INFO_MESSAGE_COLOUR,
+    )
+
+    embed.set_footer(f"Page {index}")
+
+    return embed
+
+
 async def paginated_info(
     context: lightbulb.SlashContext | lightbulb.PrefixContext,
     embed_title: str,
@@ -121,16 +234,7 @@ async def paginated_info(
     @paginator.embed_factory()
     def paginated_embed_structure(index: int, content: str):
         """Specify how the paginated embed gets built."""
-        embed = build_embed(
-            embed_title,
-            f"{embed_description} {content}",
-            context.app.get_me().avatar_url,
-            INFO_MESSAGE_COLOUR,
-        )
-
-        embed.set_footer(f"Page {index}")
-
-        return embed
+        return build_page(context, embed_title, embed_description, index, content)
 
     for line in embed_lines:
         paginator.add_line(line)
@@ -143,6 +247,44 @@ async def paginated_info(
     await ButtonNavigator(paginator.build_pages(), buttons=buttons).run(context)
 
 
+async def lazy_paginated_info(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+    embed_title: str,
+    embed_description: str,
+    embed_pages: AsyncIterator[list[str]],
+) -> None:
+    """Sends formatted response using a paginated info embed built page by page.
+
+    Unlike paginated_info, the lines are taken one page at a time, and the
+    next page is only requested when the user navigates to it.
+
+    Arguments:
+        context: The command context.
+        embed_title: The title of the embed.
+        embed_description: The description of the embed.
+        embed_pages: The lines of each page.
+
+    Returns:
+        None.
+    """
+
+    async def build_pages() -> AsyncIterator[hikari.Embed]:
+        """Builds a page from each batch of lines."""
+        index = 1
+
+        async for lines in embed_pages:
+            content = "```" + "\n".join(lines) + "```"
+            yield build_page(context, embed_title, embed_description, index, content)
+            index += 1
+
+    buttons = [
+        Button("Previous", False, ButtonStyle.PRIMARY, "previous", lazy_prev_page),
+        Button("Next", False, ButtonStyle.PRIMARY, "next", lazy_next_page),
+    ]
+
+    await LazyNavigator(build_pages(), buttons=buttons).run(context)
+
+
 async def error(
     context: lightbulb.SlashContext | lightbulb.PrefixContext, embed_description: str
 ) -> None:
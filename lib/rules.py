@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import collections
+import hikari
+import re
+import typing
+
+import motor.motor_asyncio as motor
+
+from pymongo import ReturnDocument
+
+
+CUSTOM_EMOJI_PATTERN = re.compile(r"<a?:\w+:\d+>")
+UNICODE_EMOJI_PATTERN = re.compile(
+    "[\U0001F000-\U0001FAFF\u2190-\u21FF\u2600-\u27BF\u2B00-\u2BFF"
+    "\u3030\u303D\u3297\u3299\uFE0F\u200D\u20E3]"
+)
+LINK_PATTERN = re.compile(r"<?https?://\S+>?")
+RULE_FIELDS = {
+    "ignored_channels": 1,
+    "ignored_roles": 1,
+    "min_length": 1,
+    "ignore_bots": 1,
+}
+
+
+class RuleSet:
+    """A class to represent the skip rules configured for a guild.
+
+    Arguments:
+        ignored_channels: The IDs of channels that are never moderated.
+        ignored_roles: The IDs of roles whose members are never moderated.
+        min_length: The content length below which messages are not moderated.
+        ignore_bots: Whether messages from bots are not moderated.
+
+    Attributes:
+        ignored_channels: The IDs of channels that are never moderated.
+        ignored_roles: The IDs of roles whose members are never moderated.
+        min_length: The content length below which messages are not moderated.
+        ignore_bots: Whether messages from bots are not moderated.
+    """
+
+    def __init__(
+        self,
+        ignored_channels: typing.Iterable[int] = (),
+        ignored_roles: typing.Iterable[int] = (),
+        min_length: int = 0,
+        ignore_bots: bool = True,
+    ) -> None:
+        self.ignored_channels = frozenset(int(id) for id in ignored_channels)
+        self.ignored_roles = frozenset(int(id) for id in ignored_roles)
+        self.min_length = min_length
+        self.ignore_bots = ignore_bots
+
+    @classmethod
+    def from_document(cls, document: dict | None) -> RuleSet:
+        """Builds a rule set from a guild's settings document."""
+        document = document or {}
+
+        return cls(
+            document.get("ignored_channels", []),
+            document.get("ignored_roles", []),
+            document.get("min_length", 0),
+            document.get("ignore_bots", True),
+        )
+
+
+DEFAULT_RULE_SET = RuleSet()
+
+
+class Rule:
+    """A class to represent a named condition under which a message is skipped.
+
+    Arguments:
+        name: The name of the rule.
+        predicate: Returns True if the message should be skipped.
+
+    Attributes:
+        name: The name of the rule.
+        predicate: Returns True if the message should be skipped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        predicate: typing.Callable[[hikari.GuildMessageCreateEvent, RuleSet], bool],
+    ) -> None:
+        self.name = name
+        self.predicate = predicate
+
+
+def has_no_text(content: str) -> bool:
+    """Returns whether content is empty, as with attachment-only messages."""
+    return not content.strip()
+
+
+def is_emoji_only(content: str) -> bool:
+    """Returns whether content only contains emoji."""
+    content = CUSTOM_EMOJI_PATTERN.sub("", content)
+
+    return not UNICODE_EMOJI_PATTERN.sub("", content).strip()
+
+
+def is_link_only(content: str) -> bool:
+    """Returns whether content only contains links."""
+    return not LINK_PATTERN.sub("", content).strip()
+
+
+def has_ignored_role(
+    event: hikari.GuildMessageCreateEvent | hikari.GuildMessageUpdateEvent,
+    rule_set: RuleSet,
+) -> bool:
+    """Returns whether the author of a message has an ignored role.
+
+    The member of an update event may be UNDEFINED as well as None, in which
+    case the author is treated as having no ignored role.
+    """
+    if not rule_set.ignored_roles or not event.member:
+        return False
+
+    return not rule_set.ignored_roles.isdisjoint(event.member.role_ids)
+
+
+CONTENT_RULES = (
+    Rule("webhook", lambda event, rule_set: event.is_webhook),
+    Rule("no_text", lambda event, rule_set: has_no_text(event.message.content or "")),
+    Rule("emoji_only", lambda event, rule_set: is_emoji_only(event.message.content)),
+    Rule("link_only", lambda event, rule_set: is_link_only(event.message.content)),
+)
+GUILD_RULES = (
+    Rule("bot_author", lambda event, rule_set: rule_set.ignore_bots and event.is_bot),
+    Rule(
+        "ignored_channel",
+        lambda event, rule_set: event.channel_id in rule_set.ignored_channels,
+    ),
+    Rule("ignored_role", has_ignored_role),
+    Rule(
+        "min_length",
+        lambda event, rule_set: len(event.message.content) < rule_set.min_length,
+    ),
+)
+
+
+class RuleEngine:
+    """A class to represent an ordered list of skip rules.
+
+    Arguments:
+        rules: The rules to evaluate, in order.
+
+    Attributes:
+        rules: The rules to evaluate, in order.
+        skipped: The number of messages skipped by each rule.
+    """
+
+    def __init__(self, rules: typing.Iterable[Rule]) -> None:
+        self.rules = tuple(rules)
+        self.skipped: collections.Counter[str] = collections.Counter()
+
+    def evaluate(
+        self,
+        event: hikari.GuildMessageCreateEvent,
+        rule_set: RuleSet = DEFAULT_RULE_SET,
+    ) -> str | None:
+        """Evaluates the rules against a message.
+
+        Arguments:
+            event: The event of the message.
+            rule_set: The rule set of the guild the message was sent in.
+
+        Returns:
+            The name of the first rule that skips the message, otherwise None.
+        """
+        for rule in self.rules:
+            if rule.predicate(event, rule_set):
+                self.skipped[rule.name] += 1
+                return rule.name
+
+        return None
+
+
+class GuildRules:
+    """A class to represent the rule sets of each guild held in memory.
+
+    Attributes:
+        rule_sets: A mapping of guild IDs to their rule set.
+    """
+
+    def __init__(self) -> None:
+        self.rule_sets: dict[str, RuleSet] = {}
+
+    def get(self, guild_id: hikari.Snowflake) -> RuleSet | None:
+        """Returns the rule set of a guild, or None if it is not loaded."""
+        return self.rule_sets.get(str(guild_id))
+
+    def set(self, guild_id: hikari.Snowflake, document: dict | None) -> RuleSet:
+        """Builds and caches the rule set of a guild from its settings document."""
+        rule_set = RuleSet.from_document(document)
+        self.rule_sets[str(guild_id)] = rule_set
+
+        return rule_set
+
+    def invalidate(self, guild_id: hikari.Snowflake) -> None:
+        """Removes the rule set of a guild."""
+        self.rule_sets.pop(str(guild_id), None)
+
+
+async def get_rule_set(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    rules: GuildRules,
+) -> RuleSet:
+    """Gets the rule set of a guild, loading it on first use.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        rules: The rule sets held in memory.
+
+    Returns:
+        The guild's rule set.
+    """
+    rule_set = rules.get(guild_id)
+
+    if rule_set is None:
+        document = await collection.find_one({"guild_id": str(guild_id)}, RULE_FIELDS)
+        rule_set = rules.set(guild_id, document)
+
+    return rule_set
+
+
+async def update_rule_set(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    update: dict,
+    rules: GuildRules | None = None,
+) -> RuleSet:
+    """Updates the rule set of a guild and refreshes it in memory.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        update: The update to apply to the guild's settings document.
+        rules: The rule sets held in memory.
+
+    Returns:
+        The guild's updated rule set.
+    """
+    document = await collection.find_one_and_update(
+        {"guild_id": str(guild_id)},
+        update,
+        projection=RULE_FIELDS,
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+    if rules is not None:
+        return rules.set(guild_id, document)
+
+    return RuleSet.from_document(document)
+
+
+async def ignore_channel(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    channel_id: hikari.Snowflake,
+    ignored: bool,
+    rules: GuildRules | None = None,
+) -> RuleSet:
+    """Adds a channel to or removes it from a guild's ignored channels.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        channel_id: The ID of the channel.
+        ignored: Whether the channel should be ignored.
+        rules: The rule sets held in memory.
+
+    Returns:
+        The guild's updated rule set.
+    """
+    operator = "$addToSet" if ignored else "$pull"
+
+    return await update_rule_set(
+        collection,
+        guild_id,
+        {operator: {"ignored_channels": str(channel_id)}},
+        rules,
+    )
+
+
+async def ignore_role(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    role_id: hikari.Snowflake,
+    ignored: bool,
+    rules: GuildRules | None = None,
+) -> RuleSet:
+    """Adds a role to or removes it from a guild's ignored roles.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        role_id: The ID of the role.
+        ignored: Whether the role should be ignored.
+        rules: The rule sets held in memory.
+
+    Returns:
+        The guild's updated rule set.
+    """
+    operator = "$addToSet" if ignored else "$pull"
+
+    return await update_rule_set(
+        collection,
+        guild_id,
+        {operator: {"ignored_roles": str(role_id)}},
+        rules,
+    )
+
+
+async def set_min_length(
+    collection: motor.AsyncIOMotorCollection,
+    guild_id: hikari.Snowflake,
+    min_length: int,
+    rules: GuildRules | None = None,
+) -> RuleSet:
+    """Sets the minimum length of messages a guild moderates.
+
+    Arguments:
+        collection: The mongo collection.
+        guild_id: The ID of the guild.
+        min_length: The minimum content length.
+        rules: The rule sets held in memory.
+
+    Returns:
+        The guild's updated rule set.
+    """
+    return await update_rule_set(
+        collection, guild_id, {"$set": {"min_length": min_length}}, rules
+    )
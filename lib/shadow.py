@@ -0,0 +1,282 @@
+import asyncio
+import collections
+import json
+import logging
+import os
+import random
+import statistics
+import time
+import typing
+
+from lib import classifier, profanity
+
+
+SAMPLE_RATE = 0.01
+REPORT_PATH = "shadow_report.json"
+REPORT_EVERY = 100
+MAX_PENDING = 100
+LATENCY_SAMPLES = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+class Backend:
+    """A class to represent a candidate classifier evaluated in shadow mode.
+
+    Arguments:
+        name: The name of the backend.
+        classify: Returns whether each of a list of contents sent in a guild
+            contains profanity.
+        cost: Returns the estimated price in US dollars of classifying a content.
+
+    Attributes:
+        name: The name of the backend.
+        classify: Returns whether each of a list of contents sent in a guild
+            contains profanity.
+        cost: Returns the estimated price in US dollars of classifying a content.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        classify: typing.Callable[[list[str], int], typing.Awaitable[list[bool]]],
+        cost: typing.Callable[[str], float] = lambda content: 0.0,
+    ) -> None:
+        self.name = name
+        self.classify = classify
+        self.cost = cost
+
+
+def lexicon_backend(matchers: profanity.GuildMatchers) -> Backend:
+    """Returns a backend that flags a guild's blocked terms, even inside other words."""
+
+    async def classify(contents: list[str], guild_id: int) -> list[bool]:
+        matcher = matchers.get(guild_id) or profanity.DEFAULT_MATCHER
+
+        return [
+            matcher.scan(content, whole_words=False) is profanity.Verdict.PROFANE
+            for content in contents
+        ]
+
+    return Backend("lexicon", classify)
+
+
+def model_backend(pool: classifier.ClassifierPool, threshold: float = 0.5) -> Backend:
+    """Returns a backend that flags contents the local model scores highly."""
+
+    async def classify(contents: list[str], guild_id: int) -> list[bool]:
+        return [score >= threshold for score in await pool.score(contents)]
+
+    return Backend("model", classify)
+
+
+class BackendStats:
+    """A class to represent the running results of one backend.
+
+    Attributes:
+        calls: The number of contents classified.
+        errors: The number of classifications that raised.
+        confusion: The number of verdicts for each pair of primary and
+            backend verdicts, keyed as "primary/backend".
+        latencies: The most recent classification latencies in seconds.
+        cost: The estimated total price in US dollars.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.confusion: collections.Counter[str] = collections.Counter()
+        self.latencies: collections.deque[float] = collections.deque(
+            maxlen=LATENCY_SAMPLES
+        )
+        self.cost = 0.0
+
+    def record(
+        self, primary: bool | None, profane: bool, latency: float, cost: float
+    ) -> None:
+        """Records one classification.
+
+        Arguments:
+            primary: The verdict of the primary backend, or None for the
+                primary backend itself or if it failed.
+            profane: The verdict of this backend.
+            latency: The time the classification took in seconds.
+            cost: The estimated price of the classification in US dollars.
+        """
+        self.calls += 1
+        self.latencies.append(latency)
+        self.cost += cost
+
+        if primary is not None:
+            self.confusion[f"{label(primary)}/{label(profane)}"] += 1
+
+    def report(self) -> dict[str, typing.Any]:
+        """Returns the results as a JSON serializable dict."""
+        latencies = sorted(self.latencies)
+        compared = sum(self.confusion.values())
+        agreed = self.confusion["profane/profane"] + self.confusion["clean/clean"]
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "agreement": round(agreed / compared, 4) if compared else None,
+            "confusion": dict(self.confusion),
+            "latency_p50_ms": round(statistics.median(latencies) * 1000, 3)
+            if latencies
+            else None,
+            "latency_p99_ms": round(
+                latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000,
+                3,
+            )
+            if latencies
+            else None,
+            "cost": round(self.cost, 6),
+        }
+
+
+def label(profane: bool) -> str:
+    """Returns the name of a verdict."""
+    return "profane" if profane else "clean"
+
+
+class ShadowEvaluator:
+    """A class to represent candidate backends run alongside the primary one.
+
+    A sample of every content that reaches the moderation pipeline is sent to
+    the primary backend and every candidate in the background. Sampling
+    happens before any prefilter or local model can settle the content, so
+    the sample is not biased towards the contents they are unsure about, and
+    sample_rate bounds the cost of the extra primary calls. The candidates'
+    verdicts are only compared with the primary verdict and never acted on.
+    Results are written to a JSON report every few samples and when the
+    evaluator is closed.
+
+    Arguments:
+        primary_backend: The backend whose verdicts candidates are compared to.
+        backends: The candidate backends.
+        sample_rate: The fraction of contents sent to the backends.
+        path: The path of the report.
+        max_pending: The maximum number of samples being evaluated at once.
+
+    Attributes:
+        primary_backend: The backend whose verdicts candidates are compared to.
+        backends: The candidate backends.
+        sample_rate: The fraction of contents sent to the backends.
+        path: The path of the report.
+        max_pending: The maximum number of samples being evaluated at once.
+        primary: The results of the primary backend on sampled contents.
+        stats: A mapping of backend names to their results.
+        tasks: The running evaluations.
+        sampled: The number of contents sent to the backends.
+        evaluated: The number of samples every candidate has finished.
+        skipped: The number of samples skipped because too many were pending.
+    """
+
+    def __init__(
+        self,
+        primary_backend: Backend,
+        backends: typing.Iterable[Backend],
+        sample_rate: float = SAMPLE_RATE,
+        path: str = REPORT_PATH,
+        max_pending: int = MAX_PENDING,
+    ) -> None:
+        self.primary_backend = primary_backend
+        self.backends = tuple(backends)
+        self.sample_rate = sample_rate
+        self.path = path
+        self.max_pending = max_pending
+        self.primary = BackendStats()
+        self.stats = {backend.name: BackendStats() for backend in self.backends}
+        self.tasks: set[asyncio.Task] = set()
+        self.sampled = 0
+        self.evaluated = 0
+        self.skipped = 0
+
+    def sample(self, content: str, guild_id: int) -> bool:
+        """Offers a content for shadow evaluation without waiting.
+
+        Arguments:
+            content: The content to classify.
+            guild_id: The ID of the guild the content was sent in.
+
+        Returns:
+            True if the content was sampled, otherwise False.
+        """
+        if random.random() >= self.sample_rate:
+            return False
+
+        if len(self.tasks) >= self.max_pending:
+            self.skipped += 1
+            return False
+
+        self.sampled += 1
+
+        task = asyncio.create_task(self._evaluate(content, guild_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+        return True
+
+    def report(self) -> dict[str, typing.Any]:
+        """Returns the results of every backend."""
+        return {
+            "sampled": self.sampled,
+            "evaluated": self.evaluated,
+            "skipped": self.skipped,
+            "primary": self.primary.report(),
+            "backends": {name: stats.report() for name, stats in self.stats.items()},
+        }
+
+    def write(self) -> None:
+        """Writes the report, replacing the previous one atomically."""
+        temporary_path = f"{self.path}.tmp"
+
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=4)
+
+        os.replace(temporary_path, self.path)
+
+    async def close(self) -> None:
+        """Waits for pending evaluations and writes the final report."""
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.write()
+
+    async def _evaluate(self, content: str, guild_id: int) -> None:
+        """Runs the primary and every candidate backend on a sampled content."""
+        primary, *results = await asyncio.gather(
+            self._run(self.primary_backend, self.primary, content, guild_id),
+            *(
+                self._run(backend, self.stats[backend.name], content, guild_id)
+                for backend in self.backends
+            ),
+        )
+
+        verdict = None
+
+        if primary is not None:
+            verdict = primary[0]
+            self.primary.record(None, *primary)
+
+        for backend, result in zip(self.backends, results):
+            if result is not None:
+                self.stats[backend.name].record(verdict, *result)
+
+        self.evaluated += 1
+
+        if self.evaluated % REPORT_EVERY == 0:
+            self.write()
+
+    async def _run(
+        self, backend: Backend, stats: BackendStats, content: str, guild_id: int
+    ) -> tuple[bool, float, float] | None:
+        """Runs one backend, returning its verdict, latency and cost, if it succeeds."""
+        start = time.perf_counter()
+
+        try:
+            [profane] = await backend.classify([content], guild_id)
+        except Exception:
+            stats.errors += 1
+            logger.exception("Shadow backend %s failed", backend.name)
+            return None
+
+        return profane, time.perf_counter() - start, backend.cost(content)
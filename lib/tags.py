@@ -1,8 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import collections
 import hikari
+import logging
 
 import motor.motor_asyncio as motor
 
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
+from lib import buffering
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+
+CACHE_GUILDS = 1000
+CACHE_TAGS_PER_GUILD = 200
+USAGE_FLUSH_DELAY = 10.0
+USAGE_FLUSH_SIZE = 1000
+PAGE_SIZE = 10
+INDEX_GUILDS = 1000
+AUTOCOMPLETE_LIMIT = 25
+DUPLICATE_KEY_ERROR = 11000
+
+logger = logging.getLogger(__name__)
 
 
 class Tag:
@@ -31,10 +53,431 @@ class Tag:
         self.uses = document["uses"]
 
 
+class TagCache:
+    """A class to represent a bounded in-memory cache of tags by guild.
+
+    Guilds and the tags within each guild are both evicted least recently
+    used first, so memory is bounded by max_guilds * max_tags_per_guild tags.
+
+    Arguments:
+        max_guilds: The maximum number of guilds to cache tags for.
+        max_tags_per_guild: The maximum number of tags to cache per guild.
+
+    Attributes:
+        max_guilds: The maximum number of guilds to cache tags for.
+        max_tags_per_guild: The maximum number of tags to cache per guild.
+        guilds: A mapping of guild IDs to a mapping of tag names to tags.
+        hits: The number of lookups that found a cached tag.
+        misses: The number of lookups that did not.
+    """
+
+    def __init__(
+        self,
+        max_guilds: int = CACHE_GUILDS,
+        max_tags_per_guild: int = CACHE_TAGS_PER_GUILD,
+    ) -> None:
+        self.max_guilds = max_guilds
+        self.max_tags_per_guild = max_tags_per_guild
+        self.guilds: collections.OrderedDict[
+            str, collections.OrderedDict[str, Tag]
+        ] = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> Tag | None:
+        """Returns a cached tag, or None if it is not cached."""
+        guild_tags = self.guilds.get(str(tag_guild_id))
+        tag = guild_tags.get(tag_name) if guild_tags is not None else None
+
+        if tag is None:
+            self.misses += 1
+            return None
+
+        self.guilds.move_to_end(str(tag_guild_id))
+        guild_tags.move_to_end(tag_name)
+        self.hits += 1
+
+        return tag
+
+    def peek(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> Tag | None:
+        """Returns a cached tag without counting the lookup or refreshing it."""
+        return self.guilds.get(str(tag_guild_id), {}).get(tag_name)
+
+    def set(self, tag: Tag) -> None:
+        """Caches a tag, evicting the least recently used ones if full."""
+        guild_tags = self.guilds.get(str(tag.guild_id))
+
+        if guild_tags is None:
+            guild_tags = self.guilds[str(tag.guild_id)] = collections.OrderedDict()
+
+            if len(self.guilds) > self.max_guilds:
+                self.guilds.popitem(last=False)
+
+        self.guilds.move_to_end(str(tag.guild_id))
+        guild_tags[tag.name] = tag
+        guild_tags.move_to_end(tag.name)
+
+        if len(guild_tags) > self.max_tags_per_guild:
+            guild_tags.popitem(last=False)
+
+    def invalidate(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> None:
+        """Removes a cached tag."""
+        guild_tags = self.guilds.get(str(tag_guild_id))
+
+        if guild_tags is not None:
+            guild_tags.pop(tag_name, None)
+
+    def invalidate_guild(self, tag_guild_id: hikari.Snowflake) -> None:
+        """Removes every cached tag of a guild."""
+        self.guilds.pop(str(tag_guild_id), None)
+
+    def metrics(self) -> dict[str, int | float]:
+        """Returns the hit rate and size of the cache."""
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "guilds": len(self.guilds),
+            "tags": sum(len(guild_tags) for guild_tags in self.guilds.values()),
+        }
+
+
+class NameIndex:
+    """A class to represent an in-memory index of tag names by guild.
+
+    A guild's names are loaded once, the first time the guild is searched,
+    and kept sorted by their casefolded form, so a prefix search is a binary
+    search followed by a scan of at most limit names. Guilds are evicted least
+    recently used first. Names added or removed while a guild is loading mark
+    the loaded names as stale, so they are loaded again on the next search.
+
+    Arguments:
+        collection: The mongo collection names are loaded from.
+        max_guilds: The maximum number of guilds to index names for.
+        limit: The maximum number of names a search returns.
+
+    Attributes:
+        collection: The mongo collection names are loaded from.
+        max_guilds: The maximum number of guilds to index names for.
+        limit: The maximum number of names a search returns.
+        guilds: A mapping of guild IDs to sorted (casefolded name, name) pairs.
+        loading: A mapping of guild IDs to the loads in progress.
+        stale: The guild IDs whose loads in progress are out of date.
+    """
+
+    def __init__(
+        self,
+        collection: motor.AsyncIOMotorCollection,
+        max_guilds: int = INDEX_GUILDS,
+        limit: int = AUTOCOMPLETE_LIMIT,
+    ) -> None:
+        self.collection = collection
+        self.max_guilds = max_guilds
+        self.limit = limit
+        self.guilds: collections.OrderedDict[
+            str, list[tuple[str, str]]
+        ] = collections.OrderedDict()
+        self.loading: dict[str, asyncio.Task] = {}
+        self.stale: set[str] = set()
+
+    async def search(self, prefix: str, tag_guild_id: hikari.Snowflake) -> list[str]:
+        """Returns the names of a guild's tags that start with a prefix.
+
+        Arguments:
+            prefix: The prefix to match, ignoring case.
+            tag_guild_id: The guild ID of the tags.
+
+        Returns:
+            Up to limit tag names in name order.
+        """
+        guild_id = str(tag_guild_id)
+        names = self.guilds.get(guild_id)
+
+        if names is None:
+            names = await self._load(guild_id)
+        else:
+            self.guilds.move_to_end(guild_id)
+
+        key = prefix.casefold()
+        start = bisect.bisect_left(names, (key,))
+        results = []
+
+        for index in range(start, min(start + self.limit, len(names))):
+            name_key, name = names[index]
+
+            if not name_key.startswith(key):
+                break
+
+            results.append(name)
+
+        return results
+
+    def add(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> None:
+        """Adds a name to an indexed guild."""
+        names = self._names(str(tag_guild_id))
+
+        if names is None:
+            return
+
+        entry = (tag_name.casefold(), tag_name)
+        index = bisect.bisect_left(names, entry)
+
+        if index == len(names) or names[index] != entry:
+            names.insert(index, entry)
+
+    def remove(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> None:
+        """Removes a name from an indexed guild."""
+        names = self._names(str(tag_guild_id))
+
+        if names is None:
+            return
+
+        entry = (tag_name.casefold(), tag_name)
+        index = bisect.bisect_left(names, entry)
+
+        if index < len(names) and names[index] == entry:
+            del names[index]
+
+    def invalidate_guild(self, tag_guild_id: hikari.Snowflake) -> None:
+        """Removes every indexed name of a guild."""
+        if str(tag_guild_id) in self.loading:
+            self.stale.add(str(tag_guild_id))
+
+        self.guilds.pop(str(tag_guild_id), None)
+
+    def _names(self, guild_id: str) -> list[tuple[str, str]] | None:
+        """Returns the indexed names of a guild about to change."""
+        if guild_id in self.loading:
+            self.stale.add(guild_id)
+
+        return self.guilds.get(guild_id)
+
+    async def _load(self, guild_id: str) -> list[tuple[str, str]]:
+        """Loads the names of a guild, sharing the load with concurrent searches."""
+        task = self.loading.get(guild_id)
+
+        if task is None:
+            self.stale.discard(guild_id)
+            task = self.loading[guild_id] = asyncio.create_task(self._fetch(guild_id))
+            task.add_done_callback(lambda _: self.loading.pop(guild_id, None))
+
+        return await asyncio.shield(task)
+
+    async def _fetch(self, guild_id: str) -> list[tuple[str, str]]:
+        """Queries the names of a guild and indexes them unless they went stale."""
+        cursor = self.collection.find({"guild_id": guild_id}, {"name": 1, "_id": 0})
+        names = sorted(
+            [
+                (document["name"].casefold(), document["name"])
+                async for document in cursor
+            ]
+        )
+
+        if guild_id in self.stale:
+            self.stale.discard(guild_id)
+            return names
+
+        self.guilds[guild_id] = names
+
+        if len(self.guilds) > self.max_guilds:
+            self.guilds.popitem(last=False)
+
+        return names
+
+
+class UsageCounter:
+    """A class to represent tag uses waiting to be written to the database.
+
+    Uses are counted in memory per tag and written together as a single
+    unordered bulk_write of $inc updates, flush_delay seconds after the first
+    pending use or once flush_size tags have pending uses. Cached tags are
+    updated as their uses are written, so a tag's uses are the stored uses
+    plus its pending uses.
+
+    Arguments:
+        collection: The mongo collection.
+        cache: The tag cache to keep current.
+        flush_delay: The number of seconds a use may wait to be written.
+        flush_size: The number of tags with pending uses that triggers a flush.
+
+    Attributes:
+        collection: The mongo collection.
+        cache: The tag cache to keep current.
+        flush_delay: The number of seconds a use may wait to be written.
+        flush_size: The number of tags with pending uses that triggers a flush.
+        counts: A mapping of (guild ID, tag name) pairs to their pending uses.
+        flushes: The scheduled flush and in-flight writes.
+        written: The number of uses written.
+        failed: The number of uses that failed to write.
+    """
+
+    def __init__(
+        self,
+        collection: motor.AsyncIOMotorCollection,
+        cache: TagCache | None = None,
+        flush_delay: float = USAGE_FLUSH_DELAY,
+        flush_size: int = USAGE_FLUSH_SIZE,
+    ) -> None:
+        self.collection = collection
+        self.cache = cache
+        self.flush_delay = flush_delay
+        self.flush_size = flush_size
+        self.counts: collections.Counter[tuple[str, str]] = collections.Counter()
+        self.flushes = buffering.FlushScheduler(flush_delay)
+        self.written = 0
+        self.failed = 0
+
+    def increment(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> None:
+        """Counts a use of a tag without waiting for it to be written.
+
+        Arguments:
+            tag_name: The name of the tag.
+            tag_guild_id: The guild ID of the tag.
+
+        Returns:
+            None.
+        """
+        self.counts[(str(tag_guild_id), tag_name)] += 1
+
+        if len(self.counts) >= self.flush_size:
+            self.flush()
+        else:
+            self.flushes.schedule(self.flush)
+
+    def pending(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> int:
+        """Returns the number of uses of a tag waiting to be written."""
+        return self.counts.get((str(tag_guild_id), tag_name), 0)
+
+    def discard(self, tag_name: str, tag_guild_id: hikari.Snowflake) -> None:
+        """Drops the pending uses of a deleted tag."""
+        self.counts.pop((str(tag_guild_id), tag_name), None)
+
+    def discard_guild(self, tag_guild_id: hikari.Snowflake) -> None:
+        """Drops the pending uses of every tag of a guild."""
+        for key in [key for key in self.counts if key[0] == str(tag_guild_id)]:
+            del self.counts[key]
+
+    def flush(self) -> None:
+        """Writes the pending uses."""
+        self.flushes.cancel()
+
+        if not self.counts:
+            return
+
+        counts, self.counts = self.counts, collections.Counter()
+
+        if self.cache is not None:
+            for (guild_id, tag_name), uses in counts.items():
+                tag = self.cache.peek(tag_name, guild_id)
+
+                if tag is not None:
+                    tag.uses += uses
+
+        self.flushes.start(self._write(counts))
+
+    async def close(self) -> None:
+        """Writes the pending uses and waits for every write to finish."""
+        self.flush()
+        await self.flushes.wait()
+
+    async def _write(self, counts: collections.Counter[tuple[str, str]]) -> None:
+        """Increments the uses of every tag in a single request."""
+        operations = [
+            UpdateOne(
+                {"name": tag_name, "guild_id": guild_id}, {"$inc": {"uses": uses}}
+            )
+            for (guild_id, tag_name), uses in counts.items()
+        ]
+
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except PyMongoError:
+            self.failed += sum(counts.values())
+            logger.exception("Failed to write uses of %d tags", len(counts))
+        else:
+            self.written += sum(counts.values())
+
+
+async def remove_duplicate_tags(collection: motor.AsyncIOMotorCollection) -> int:
+    """Removes tags that share a name within a guild, keeping the oldest.
+
+    Duplicates can only have been left behind by concurrent creates from
+    before the unique name index existed.
+
+    Arguments:
+        collection: The mongo collection.
+
+    Returns:
+        The number of tags removed.
+    """
+    cursor = collection.aggregate(
+        [
+            {"$sort": {"created_at": 1}},
+            {
+                "$group": {
+                    "_id": {"guild_id": "$guild_id", "name": "$name"},
+                    "ids": {"$push": "$_id"},
+                }
+            },
+            {"$match": {"ids.1": {"$exists": True}}},
+        ],
+        allowDiskUse=True,
+    )
+    duplicate_ids = [
+        duplicate_id async for group in cursor for duplicate_id in group["ids"][1:]
+    ]
+
+    if duplicate_ids:
+        await collection.delete_many({"_id": {"$in": duplicate_ids}})
+        logger.warning("Removed %d duplicate tags", len(duplicate_ids))
+
+    return len(duplicate_ids)
+
+
+async def create_indexes(collection: motor.AsyncIOMotorCollection) -> bool:
+    """Creates the indexes of the tags collection.
+
+    Tag names are unique within a guild. If building the name index fails on
+    duplicates left behind by older creates, they are removed and the build
+    is retried. The name index also serves guild listings sorted by name, and
+    the author index serves listings of an author's tags.
+
+    Arguments:
+        collection: The mongo collection.
+
+    Returns:
+        True if the unique name index exists, otherwise False.
+    """
+    name_index = [("guild_id", 1), ("name", 1)]
+
+    try:
+        try:
+            await collection.create_index(name_index, unique=True)
+        except OperationFailure as error:
+            if error.code != DUPLICATE_KEY_ERROR:
+                raise
+
+            await remove_duplicate_tags(collection)
+            await collection.create_index(name_index, unique=True)
+    except PyMongoError:
+        logger.exception("Failed to create the unique tag name index")
+        return False
+
+    try:
+        await collection.create_index([("guild_id", 1), ("author_id", 1), ("name", 1)])
+    except PyMongoError:
+        logger.exception("Failed to create the tag author index")
+
+    return True
+
+
 async def get_tag(
     collection: motor.AsyncIOMotorCollection,
     tag_name: str,
     tag_guild_id: hikari.Snowflake,
+    cache: TagCache | None = None,
 ) -> Tag | None:
     """Gets a tag.
 
@@ -42,54 +485,134 @@ async def get_tag(
         collection: The mongo collection.
         tag_name: The name of the tag.
         tag_guild_id: The guild ID of the tag.
+        cache: The tag cache to read from and populate.
 
     Returns:
         The Tag object otherwise None.
     """
+    if cache is not None:
+        tag = cache.get(tag_name, tag_guild_id)
+
+        if tag is not None:
+            return tag
+
     document = await collection.find_one(
         {"name": tag_name, "guild_id": str(tag_guild_id)}
     )
 
-    return Tag(document) if document is not None else None
+    if document is None:
+        return None
+
+    tag = Tag(document)
+
+    if cache is not None:
+        cache.set(tag)
+
+    return tag
+
+
+def build_filter(
+    tag_guild_id: hikari.Snowflake, tag_author_id: hikari.Snowflake | None = None
+) -> dict:
+    """Builds the query matching the tags of a guild, or of an author in a guild.
+
+    Arguments:
+        tag_guild_id: The guild ID of the tags.
+        tag_author_id: The author ID of the tags, if any.
+
+    Returns:
+        The query.
+    """
+    query = {"guild_id": str(tag_guild_id)}
+
+    if tag_author_id is not None:
+        query["author_id"] = str(tag_author_id)
+
+    return query
 
 
-async def get_tags(
-    collection: motor.AsyncIOMotorCollection, tag_guild_id: hikari.Snowflake
-) -> list[Tag]:
-    """Gets multiple tags.
+async def count_tags(
+    collection: motor.AsyncIOMotorCollection,
+    tag_guild_id: hikari.Snowflake,
+    tag_author_id: hikari.Snowflake | None = None,
+) -> int:
+    """Counts the tags of a guild, or of an author in a guild.
+
+    Arguments:
+        collection: The mongo collection.
+        tag_guild_id: The guild ID of the tags.
+        tag_author_id: The author ID of the tags, if any.
+
+    Returns:
+        The number of tags.
+    """
+    return await collection.count_documents(build_filter(tag_guild_id, tag_author_id))
+
+
+async def get_tag_names(
+    collection: motor.AsyncIOMotorCollection,
+    tag_guild_id: hikari.Snowflake,
+    tag_author_id: hikari.Snowflake | None = None,
+    after: str | None = None,
+    limit: int = PAGE_SIZE,
+) -> list[str]:
+    """Gets a page of tag names in name order.
+
+    Only names are projected, and pages are continued from the last name of
+    the previous page rather than skipped to, so each page is a range scan of
+    the indexes from create_indexes.
 
     Arguments:
         collection: The mongo collection.
         tag_guild_id: The guild ID of the tags.
+        tag_author_id: The author ID of the tags, if any.
+        after: The last name of the previous page, if any.
+        limit: The maximum number of names to get.
 
     Returns:
-        A list of Tag objects.
+        A list of tag names.
     """
-    cursor = collection.find({"guild_id": str(tag_guild_id)})
+    query = build_filter(tag_guild_id, tag_author_id)
 
-    return [Tag(document) async for document in cursor]
+    if after is not None:
+        query["name"] = {"$gt": after}
 
+    cursor = collection.find(query, {"name": 1, "_id": 0}).sort("name", 1).limit(limit)
 
-async def get_tags_by_author(
+    return [document["name"] async for document in cursor]
+
+
+async def iter_tag_names(
     collection: motor.AsyncIOMotorCollection,
     tag_guild_id: hikari.Snowflake,
-    tag_author_id: hikari.Snowflake,
-) -> list[Tag]:
-    """Gets multiple tags authored by a specific user.
+    tag_author_id: hikari.Snowflake | None = None,
+    page_size: int = PAGE_SIZE,
+) -> AsyncIterator[list[str]]:
+    """Yields pages of tag names, querying each page only when it is requested.
 
     Arguments:
         collection: The mongo collection.
         tag_guild_id: The guild ID of the tags.
-        tag_author_id: The author ID of the tags.
+        tag_author_id: The author ID of the tags, if any.
+        page_size: The number of names in each page.
 
     Returns:
-        A list of Tag objects.
+        An asynchronous iterator of lists of tag names.
     """
-    cursor = collection.find(
-        {"guild_id": str(tag_guild_id), "author_id": str(tag_author_id)}
-    )
+    after = None
+
+    while True:
+        names = await get_tag_names(
+            collection, tag_guild_id, tag_author_id, after, page_size
+        )
 
-    return [Tag(document) async for document in cursor]
+        if names:
+            yield names
+
+        if len(names) < page_size:
+            return
+
+        after = names[-1]
 
 
 async def create_tag(
@@ -98,32 +621,51 @@ async def create_tag(
     tag_content: str,
     tag_guild_id: hikari.Snowflake,
     tag_author_id: hikari.Snowflake,
-) -> None:
+    cache: TagCache | None = None,
+    names: NameIndex | None = None,
+) -> bool:
     """Creates a new tag.
 
+    Relies on the unique index from create_indexes to reject duplicates, so
+    creating a tag takes a single round trip and concurrent creates cannot
+    both succeed. Until that index exists, callers must check for an existing
+    tag first.
+
     Arguments:
         collection: The mongo collection.
         tag_name: The name of the tag.
         tag_content: The content of the tag.
         tag_guild_id: The guild ID of the tag.
         tag_author_id: The author ID of the tag.
+        cache: The tag cache to write through to.
+        names: The name index to add the tag to.
 
     Returns:
-        None.
+        True if the tag was created, False if a tag with the name exists.
     """
     creation_time = datetime.now(timezone.utc)
+    document = {
+        "name": tag_name,
+        "content": tag_content,
+        "guild_id": str(tag_guild_id),
+        "author_id": str(tag_author_id),
+        "created_at": creation_time,
+        "modified_at": creation_time,
+        "uses": 0,
+    }
 
-    await collection.insert_one(
-        {
-            "name": tag_name,
-            "content": tag_content,
-            "guild_id": str(tag_guild_id),
-            "author_id": str(tag_author_id),
-            "created_at": creation_time,
-            "modified_at": creation_time,
-            "uses": 0,
-        }
-    )
+    try:
+        await collection.insert_one(document)
+    except DuplicateKeyError:
+        return False
+
+    if cache is not None:
+        cache.set(Tag(document))
+
+    if names is not None:
+        names.add(tag_name, tag_guild_id)
+
+    return True
 
 
 async def edit_tag(
@@ -131,6 +673,7 @@ async def edit_tag(
     tag_name: str,
     tag_content: str,
     tag_guild_id: hikari.Snowflake,
+    cache: TagCache | None = None,
 ) -> None:
     """Edits an existing tag.
 
@@ -139,6 +682,7 @@ async def edit_tag(
         tag_name: The name of the tag.
         tag_content: The new content of the tag.
         tag_guild_id: The guild ID of the tag.
+        cache: The tag cache to write through to.
 
     Returns:
         None.
@@ -150,11 +694,19 @@ async def edit_tag(
         {"$set": {"content": tag_content, "modified_at": modification_time}},
     )
 
+    tag = cache.peek(tag_name, tag_guild_id) if cache is not None else None
+
+    if tag is not None:
+        tag.content = tag_content
+        tag.modified_date = modification_time
+
 
 async def delete_tag(
     collection: motor.AsyncIOMotorCollection,
     tag_name: str,
     tag_guild_id: hikari.Snowflake,
+    cache: TagCache | None = None,
+    names: NameIndex | None = None,
 ) -> None:
     """Deletes an existing tag.
 
@@ -162,44 +714,42 @@ async def delete_tag(
         collection: The mongo collection.
         tag_name: The name of the tag.
         tag_guild_id: The guild ID of the tag.
+        cache: The tag cache to write through to.
+        names: The name index to remove the tag from.
 
     Returns:
         None.
     """
     await collection.delete_one({"name": tag_name, "guild_id": str(tag_guild_id)})
 
+    if cache is not None:
+        cache.invalidate(tag_name, tag_guild_id)
+
+    if names is not None:
+        names.remove(tag_name, tag_guild_id)
+
 
 async def delete_all_tags(
-    collection: motor.AsyncIOMotorCollection, tag_guild_id: hikari.Snowflake
+    collection: motor.AsyncIOMotorCollection,
+    tag_guild_id: hikari.Snowflake,
+    cache: TagCache | None = None,
+    names: NameIndex | None = None,
 ) -> None:
     """Deletes all tags for a guild.
 
     Arguments:
         collection: The mongo collection.
         tag_guild_id: The guild ID of the tag.
+        cache: The tag cache to write through to.
+        names: The name index to remove the tags from.
 
     Returns:
         None.
     """
     await collection.delete_many({"guild_id": str(tag_guild_id)})
 
+    if cache is not None:
+        cache.invalidate_guild(tag_guild_id)
 
-async def increment_tag(
-    collection: motor.AsyncIOMotorCollection,
-    tag_name: str,
-    tag_guild_id: hikari.Snowflake,
-) -> None:
-    """Increments a tags uses by 1.
-
-    Arguments:
-        collection: The mongo collection.
-        tag_name: The name of the tag.
-        tag_guild_id: The guild ID of the tag.
-
-    Returns:
-        None.
-    """
-    await collection.update_one(
-        {"name": tag_name, "guild_id": str(tag_guild_id)},
-        {"$inc": {"uses": 1}},
-    )
+    if names is not None:
+        names.invalidate_guild(tag_guild_id)
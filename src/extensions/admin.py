@@ -52,18 +52,20 @@ async def handle_error(
         await responses.error(context, "You cannot use this command in DMs.")
         return True
 
-    raise error
+    elif exceptions.evaluate_exception(error, lightbulb.MissingRequiredPermission):
+        await responses.error(context, "You don't have permission to use this command.")
+        return True
 
+    raise error
 
-@plugin.listener(hikari.StartingEvent)
-async def open_database_connection(event: hikari.StartingEvent) -> None:
-    """Connect to MongoDB when the bot starts up."""
-    connect_database(plugin.bot)
 
+@plugin.listener(hikari.StoppedEvent)
+async def close_database_connection(event: hikari.StoppedEvent) -> None:
+    """Disconnect from MongoDB once the bot has stopped.
 
-@plugin.listener(hikari.StoppingEvent)
-async def close_database_connection(event: hikari.StoppingEvent) -> None:
-    """Disconnect from MongoDB when the bot stops."""
+    This waits for StoppedEvent so that StoppingEvent listeners can still
+    flush pending writes.
+    """
     disconnect_database(plugin.bot)
 
 
@@ -74,5 +76,12 @@ async def on_command_error(event: lightbulb.CommandErrorEvent) -> bool | None:
 
 
 def load(bot: lightbulb.BotApp) -> None:
-    """Loads the admin plugin."""
+    """Loads the admin plugin and connects to MongoDB.
+
+    The connection is opened here rather than on StartingEvent so that it
+    exists before any extension's StartingEvent listener runs, whatever order
+    the extensions are loaded in. Motor only binds to the event loop on the
+    first operation, so connecting before the bot runs is safe.
+    """
+    connect_database(bot)
     bot.add_plugin(plugin)
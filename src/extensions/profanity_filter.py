@@ -1,11 +1,358 @@
+import asyncio
+import collections
+import functools
 import hikari
 import lightbulb
+import operator
+import os
 
-from lib import openai, profanity, responses
+from lib import (
+    audit,
+    classifier,
+    deletion,
+    moderation,
+    openai,
+    profanity,
+    responses,
+    rules,
+    shadow,
+)
 
 
 plugin = lightbulb.Plugin("Profanity Filter")
 
+BATCH_SIZE = int(os.getenv("PROFANITY_BATCH_SIZE", moderation.BATCH_SIZE))
+BATCH_DELAY = float(os.getenv("PROFANITY_BATCH_DELAY", moderation.BATCH_DELAY))
+QUEUE_SIZE = int(os.getenv("PROFANITY_QUEUE_SIZE", moderation.QUEUE_SIZE))
+QUEUE_WORKERS = int(os.getenv("PROFANITY_QUEUE_WORKERS", moderation.QUEUE_WORKERS))
+GUILD_MAX_IN_FLIGHT = int(
+    os.getenv("PROFANITY_GUILD_MAX_IN_FLIGHT", moderation.GUILD_MAX_IN_FLIGHT)
+)
+GUILD_WEIGHTS = {
+    int(guild_id): float(weight)
+    for guild_id, weight in (
+        pair.split(":")
+        for pair in os.getenv("PROFANITY_GUILD_WEIGHTS", "").split(",")
+        if pair
+    )
+}
+TOKEN_BUDGET = float(os.getenv("PROFANITY_TOKEN_BUDGET", openai.TOKEN_BUDGET))
+GUILD_TOKEN_BUDGET = float(
+    os.getenv("PROFANITY_GUILD_TOKEN_BUDGET", openai.GUILD_TOKEN_BUDGET)
+)
+BUDGET_POLICY = openai.BudgetPolicy(
+    os.getenv("PROFANITY_BUDGET_POLICY", openai.BudgetPolicy.SKIP.value)
+)
+GUILD_BUDGET_POLICIES = {
+    int(guild_id): openai.BudgetPolicy(policy)
+    for guild_id, policy in (
+        pair.split(":")
+        for pair in os.getenv("PROFANITY_GUILD_BUDGET_POLICIES", "").split(",")
+        if pair
+    )
+}
+MODEL_PATH = os.getenv("PROFANITY_MODEL")
+LOCAL_BATCH_SIZE = 64
+LOCAL_BATCH_DELAY = 0.005
+SHADOW_SAMPLE_RATE = float(os.getenv("PROFANITY_SHADOW_SAMPLE_RATE", 0))
+SHADOW_BACKENDS = os.getenv("PROFANITY_SHADOW_BACKENDS", "lexicon,model").split(",")
+SHADOW_REPORT = os.getenv("PROFANITY_SHADOW_REPORT", shadow.REPORT_PATH)
+OVERLOAD_POLICY = moderation.OverloadPolicy(
+    os.getenv("PROFANITY_OVERLOAD_POLICY", moderation.OverloadPolicy.FALLBACK.value)
+)
+
+
+@plugin.listener(hikari.StartingEvent)
+async def start_profanity_filter(event: hikari.StartingEvent) -> None:
+    """Set up the moderation pipeline when the bot starts up."""
+    plugin.bot.d.profanity_settings = profanity.SettingsCache()
+    plugin.bot.d.profanity_verdicts = moderation.VerdictCache()
+    plugin.bot.d.profanity_contents = moderation.ContentTracker()
+    plugin.bot.d.profanity_repeats = moderation.RepeatWindow()
+    plugin.bot.d.profanity_permissions = deletion.ChannelPermissions()
+    plugin.bot.d.profanity_matchers = profanity.GuildMatchers()
+    plugin.bot.d.profanity_rules = rules.GuildRules()
+    plugin.bot.d.profanity_content_rules = rules.RuleEngine(rules.CONTENT_RULES)
+    plugin.bot.d.profanity_guild_rules = rules.RuleEngine(rules.GUILD_RULES)
+    plugin.bot.d.openai_client = openai.Client(
+        os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_API_BASE", openai.API_BASE)
+    )
+
+    plugin.bot.d.openai_breaker = openai.CircuitBreaker()
+    plugin.bot.d.openai_budget = openai.Budget(
+        TOKEN_BUDGET, GUILD_TOKEN_BUDGET, GUILD_BUDGET_POLICIES, BUDGET_POLICY
+    )
+    plugin.bot.d.profanity_batcher = moderation.Batcher(
+        functools.partial(
+            plugin.bot.d.openai_breaker.call, plugin.bot.d.openai_client.classify
+        ),
+        BATCH_SIZE,
+        BATCH_DELAY,
+    )
+
+    plugin.bot.d.profanity_pool = None
+    plugin.bot.d.profanity_local_batcher = None
+
+    if MODEL_PATH:
+        plugin.bot.d.profanity_pool = classifier.ClassifierPool(MODEL_PATH)
+        plugin.bot.d.profanity_local_batcher = moderation.Batcher(
+            plugin.bot.d.profanity_pool.score, LOCAL_BATCH_SIZE, LOCAL_BATCH_DELAY
+        )
+
+    plugin.bot.d.profanity_shadow = None
+
+    if SHADOW_SAMPLE_RATE:
+        backends = []
+
+        if "lexicon" in SHADOW_BACKENDS:
+            backends.append(shadow.lexicon_backend(plugin.bot.d.profanity_matchers))
+
+        if "model" in SHADOW_BACKENDS and plugin.bot.d.profanity_pool is not None:
+            backends.append(shadow.model_backend(plugin.bot.d.profanity_pool))
+
+        plugin.bot.d.profanity_shadow = shadow.ShadowEvaluator(
+            shadow.Backend("llm", classify_sample, openai.estimate_cost),
+            backends,
+            SHADOW_SAMPLE_RATE,
+            SHADOW_REPORT,
+        )
+
+    plugin.bot.d.profanity_deleter = deletion.DeletionCoalescer(plugin.bot.rest)
+    plugin.bot.d.profanity_audit = audit.AuditLog(
+        plugin.bot.d.mongo_database.moderation_log
+    )
+    plugin.bot.d.profanity_unmoderated = collections.Counter()
+    plugin.bot.d.profanity_queue = moderation.ModerationQueue(
+        moderate,
+        QUEUE_SIZE,
+        QUEUE_WORKERS,
+        OVERLOAD_POLICY,
+        moderate_locally,
+        key=operator.attrgetter("guild_id"),
+        weights=GUILD_WEIGHTS,
+        max_in_flight=GUILD_MAX_IN_FLIGHT,
+    )
+
+    await plugin.bot.d.openai_client.start()
+    plugin.bot.d.profanity_queue.start()
+
+
+@plugin.listener(hikari.StartedEvent)
+async def create_audit_indexes(event: hikari.StartedEvent) -> None:
+    """Creates the indexes of the moderation audit log once the bot has started.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    await audit.create_indexes(plugin.bot.d.mongo_database.moderation_log)
+
+
+@plugin.listener(hikari.StoppingEvent)
+async def stop_profanity_filter(event: hikari.StoppingEvent) -> None:
+    """Shut down the moderation pipeline when the bot stops."""
+    await plugin.bot.d.profanity_queue.close()
+    await plugin.bot.d.profanity_batcher.close()
+
+    if plugin.bot.d.profanity_shadow is not None:
+        await plugin.bot.d.profanity_shadow.close()
+
+    if plugin.bot.d.profanity_pool is not None:
+        await plugin.bot.d.profanity_local_batcher.close()
+        plugin.bot.d.profanity_pool.close()
+
+    await plugin.bot.d.profanity_deleter.close()
+    await plugin.bot.d.profanity_audit.close()
+    await plugin.bot.d.openai_client.close()
+
+
+async def score_locally(content: str) -> float | None:
+    """Scores content with the local model, if one is loaded.
+
+    Arguments:
+        content: The content to score.
+
+    Returns:
+        The probability that the content contains profanity, or None if no
+        model is loaded or the model could not score the content.
+    """
+    if plugin.bot.d.profanity_local_batcher is None:
+        return None
+
+    try:
+        return await plugin.bot.d.profanity_local_batcher.submit(content)
+    except classifier.SCORING_ERRORS:
+        return None
+
+
+def judge_score(probability: float | None) -> bool | None:
+    """Returns the verdict of a local model score, or None if it is not confident."""
+    if probability is None:
+        return None
+
+    if probability >= classifier.PROFANE_THRESHOLD:
+        return True
+
+    if probability <= classifier.CLEAN_THRESHOLD:
+        return False
+
+    return None
+
+
+def check_degraded(probability: float | None, reason: str) -> bool:
+    """Checks content that could not be classified confidently.
+
+    The lexicon has already let the content through, so the only signal left
+    is the local model, whose score flags the content at the lower
+    DEGRADED_THRESHOLD. Content without a score is left up and counted as
+    unmoderated under reason, rather than silently treated as clean.
+
+    Arguments:
+        probability: The local model score of the content, if any.
+        reason: Why the content could not be classified, such as "budget".
+
+    Returns:
+        True if the content should be deleted, otherwise False.
+    """
+    if probability is not None:
+        return probability >= classifier.DEGRADED_THRESHOLD
+
+    plugin.bot.d.profanity_unmoderated[reason] += 1
+
+    return False
+
+
+async def classify(content: str, guild_id: hikari.Snowflake) -> bool:
+    """Classifies content the lexicon did not flag, reusing cached verdicts.
+
+    Content is scored by the local model first, if one is loaded, and only
+    sent to the LLM when the model is not confident. If the LLM is
+    unavailable or the token budget is spent, check_degraded is used
+    instead.
+
+    Arguments:
+        content: The content to classify.
+        guild_id: The ID of the guild the content was sent in.
+
+    Returns:
+        True if the content contains profanity, otherwise False.
+    """
+    verdicts = plugin.bot.d.profanity_verdicts
+    profane = verdicts.get(content)
+
+    if profane is not None:
+        return profane
+
+    probability = await score_locally(content)
+    profane = judge_score(probability)
+
+    if profane is not None:
+        verdicts.set(content, profane)
+        return profane
+
+    if not plugin.bot.d.openai_budget.allow(guild_id, content):
+        return check_degraded(probability, "budget")
+
+    try:
+        profane = await plugin.bot.d.profanity_batcher.submit(content)
+    except openai.CLASSIFIER_ERRORS:
+        return check_degraded(probability, "classifier_error")
+
+    verdicts.set(content, profane)
+
+    return profane
+
+
+async def classify_sample(
+    contents: list[str], guild_id: hikari.Snowflake
+) -> list[bool]:
+    """Classifies contents sampled for shadow mode with the LLM.
+
+    Samples skip the token budget, since the sample rate already bounds
+    their cost.
+
+    Arguments:
+        contents: The sampled contents.
+        guild_id: The ID of the guild the contents were sent in.
+
+    Returns:
+        Whether each content contains profanity.
+    """
+    return list(
+        await asyncio.gather(
+            *(plugin.bot.d.profanity_batcher.submit(content) for content in contents)
+        )
+    )
+
+
+async def moderate(message: moderation.Message) -> None:
+    """Classifies a queued message and deletes it if it contains profanity.
+
+    Arguments:
+        message: The message to moderate.
+
+    Returns:
+        None.
+    """
+    profane = await classify(message.content, message.guild_id)
+    plugin.bot.d.profanity_repeats.add(message.channel_id, message.content, profane)
+
+    if profane:
+        remove_message(message, "classifier")
+
+
+async def moderate_locally(message: moderation.Message) -> None:
+    """Moderates a message the queue had no room for without calling the LLM.
+
+    A cached verdict is used if there is one. Otherwise the message is scored
+    by the local model, if one is loaded, and checked with check_degraded if
+    the model is not confident.
+
+    Arguments:
+        message: The message to moderate.
+
+    Returns:
+        None.
+    """
+    verdicts = plugin.bot.d.profanity_verdicts
+    profane = verdicts.get(message.content)
+
+    if profane is not None:
+        if profane:
+            remove_message(message, "cache")
+
+        return
+
+    probability = await score_locally(message.content)
+    profane = judge_score(probability)
+
+    if profane is not None:
+        verdicts.set(message.content, profane)
+
+        if profane:
+            remove_message(message, "model")
+
+        return
+
+    if check_degraded(probability, "overload"):
+        remove_message(message, "model")
+
+
+def remove_message(message: moderation.Message, source: str) -> None:
+    """Deletes a flagged message and records the deletion in the audit log.
+
+    Arguments:
+        message: The message to delete.
+        source: The stage of the pipeline that flagged the message.
+
+    Returns:
+        None.
+    """
+    plugin.bot.d.profanity_deleter.delete(message.channel_id, message.message_id)
+    plugin.bot.d.profanity_audit.record(audit.build_record(message, source))
+
 
 @plugin.listener(hikari.GuildMessageCreateEvent)
 async def detect_profanity_on_message(event: hikari.GuildMessageCreateEvent) -> None:
@@ -17,25 +364,98 @@ async def detect_profanity_on_message(event: hikari.GuildMessageCreateEvent) ->
         channel_id: The ID of the channel the message was sent in.
         guild_id: The ID of the guild the message was sent in.
 
+    Returns:
+        None.
+    """
+    await check_message(event)
+
+
+@plugin.listener(hikari.GuildMessageUpdateEvent)
+async def detect_profanity_on_edit(event: hikari.GuildMessageUpdateEvent) -> None:
+    """Checks an edited message for profanity. If it now contains profanity, delete it.
+
+    Edits that leave the normalized content unchanged, such as embed updates,
+    are not checked again.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    await check_message(event)
+
+
+async def check_message(
+    event: hikari.GuildMessageCreateEvent | hikari.GuildMessageUpdateEvent,
+) -> None:
+    """Runs a created or edited message through the moderation pipeline.
+
+    Trivial content, such as emoji or links only, is skipped by the content
+    rules. Messages with a blocked term as a whole word are deleted straight
+    away. Every other message is queued for the classifiers, since a message
+    with no lexicon hit may still be profane, so a lexicon miss is never taken
+    as a clean verdict on its own. Shadow mode samples messages before any
+    of these short-circuits.
+
+    Arguments:
+        event: The event of the message to check.
+
     Returns:
         None.
     """
     collection = plugin.bot.d.mongo_database.settings
+    settings = plugin.bot.d.profanity_settings
+
+    if plugin.bot.d.profanity_content_rules.evaluate(event) is not None:
+        return
 
-    response = openai.prompt(
-        f"""
-        Determine if this message contains profanity.
+    if not plugin.bot.d.profanity_permissions.can_delete(
+        plugin.bot.cache, event.guild_id, event.channel_id
+    ):
+        return
 
-        Expected Response: YES or NO
+    if not await profanity.is_filter_enabled(collection, event.guild_id, settings):
+        return
 
-        Message: "{event.message.content}"
-        """
+    rule_set = await rules.get_rule_set(
+        collection, event.guild_id, plugin.bot.d.profanity_rules
     )
 
-    if response == "YES" and await profanity.is_filter_enabled(
-        collection, event.guild_id
-    ):
-        await plugin.bot.rest.delete_message(event.channel_id, event.message.id)
+    if plugin.bot.d.profanity_guild_rules.evaluate(event, rule_set) is not None:
+        return
+
+    raw_content = event.message.content or ""
+    content = profanity.normalize(raw_content)
+
+    if not plugin.bot.d.profanity_contents.update(event.message.id, content):
+        return
+
+    message = moderation.Message(
+        event.guild_id, event.channel_id, event.message.id, content, raw_content
+    )
+    matcher = await profanity.get_matcher(
+        collection, event.guild_id, plugin.bot.d.profanity_matchers
+    )
+
+    if plugin.bot.d.profanity_shadow is not None:
+        plugin.bot.d.profanity_shadow.sample(content, event.guild_id)
+
+    repeats = plugin.bot.d.profanity_repeats
+    repeat = repeats.get(event.channel_id, content)
+
+    if repeat is not None:
+        if repeat:
+            remove_message(message, "repeat")
+
+        return
+
+    if matcher.scan(content) is profanity.Verdict.PROFANE:
+        repeats.add(event.channel_id, content, True)
+        remove_message(message, "lexicon")
+        return
+
+    plugin.bot.d.profanity_queue.put(message)
 
 
 @plugin.command
@@ -54,16 +474,17 @@ async def toggle_profanity_filter(
         None.
     """
     collection = plugin.bot.d.mongo_database.settings
+    settings = plugin.bot.d.profanity_settings
 
-    if await profanity.is_filter_enabled(collection, context.guild_id):
-        await profanity.disable_filter(collection, context.guild_id)
+    if await profanity.is_filter_enabled(collection, context.guild_id, settings):
+        await profanity.disable_filter(collection, context.guild_id, settings)
         await responses.info(
             context,
             "Filter disabled",
             f"Profanity will no longer be filtered from chat.",
         )
     else:
-        await profanity.enable_filter(collection, context.guild_id)
+        await profanity.enable_filter(collection, context.guild_id, settings)
         await responses.info(
             context,
             "Filter enabled",
@@ -71,6 +492,323 @@ async def toggle_profanity_filter(
         )
 
 
+@plugin.listener(hikari.GuildLeaveEvent)
+async def remove_guild_state(event: hikari.GuildLeaveEvent) -> None:
+    """Drops the cached moderation state of a guild when the bot leaves it.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    plugin.bot.d.profanity_matchers.invalidate(event.guild_id)
+    plugin.bot.d.profanity_rules.invalidate(event.guild_id)
+    plugin.bot.d.profanity_permissions.invalidate_guild(event.guild_id)
+    plugin.bot.d.openai_budget.forget(event.guild_id)
+
+
+@plugin.listener(hikari.GuildChannelUpdateEvent)
+@plugin.listener(hikari.GuildChannelDeleteEvent)
+async def invalidate_channel_permissions(
+    event: hikari.GuildChannelUpdateEvent | hikari.GuildChannelDeleteEvent,
+) -> None:
+    """Forgets the bot's permissions in a channel when its overwrites may change.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    plugin.bot.d.profanity_permissions.invalidate_channel(event.channel_id)
+
+
+@plugin.listener(hikari.RoleUpdateEvent)
+@plugin.listener(hikari.RoleDeleteEvent)
+@plugin.listener(hikari.GuildUpdateEvent)
+@plugin.listener(hikari.MemberUpdateEvent)
+async def invalidate_guild_permissions(
+    event: hikari.RoleUpdateEvent
+    | hikari.RoleDeleteEvent
+    | hikari.GuildUpdateEvent
+    | hikari.MemberUpdateEvent,
+) -> None:
+    """Forgets the bot's permissions in a guild when its roles may change.
+
+    Member updates are only acted on when the member is the bot.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    if isinstance(event, hikari.MemberUpdateEvent):
+        me = plugin.bot.get_me()
+
+        if me is None or event.user_id != me.id:
+            return
+
+    plugin.bot.d.profanity_permissions.invalidate_guild(event.guild_id)
+
+
+@plugin.command
+@lightbulb.add_checks(
+    lightbulb.guild_only,
+    lightbulb.has_guild_permissions(hikari.Permissions.MANAGE_GUILD),
+)
+@lightbulb.command("profanitywords", "Base of profanity word list command group")
+@lightbulb.implements(lightbulb.SlashCommandGroup, lightbulb.PrefixCommandGroup)
+async def profanity_words(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+) -> None:
+    """The profanitywords base command.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    pass
+
+
+@profanity_words.child
+@lightbulb.option("word", "The word to ban")
+@lightbulb.command("ban", "Bans a word in this server", inherit_checks=True)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def ban(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
+    """The profanitywords ban subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    word = context.options.word
+
+    await profanity.ban_word(
+        collection, context.guild_id, word, plugin.bot.d.profanity_matchers
+    )
+    await responses.info(
+        context, "Word banned", f"`{word}` will now be filtered from chat."
+    )
+
+
+@profanity_words.child
+@lightbulb.option("word", "The word to allow")
+@lightbulb.command("allow", "Allows a word in this server", inherit_checks=True)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def allow(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
+    """The profanitywords allow subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    word = context.options.word
+
+    await profanity.allow_word(
+        collection, context.guild_id, word, plugin.bot.d.profanity_matchers
+    )
+    await responses.info(
+        context, "Word allowed", f"`{word}` will no longer be flagged by the filter."
+    )
+
+
+@profanity_words.child
+@lightbulb.option("word", "The word to remove")
+@lightbulb.command(
+    "remove", "Removes a word from the server word lists", inherit_checks=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def remove(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
+    """The profanitywords remove subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    word = context.options.word
+
+    await profanity.remove_word(
+        collection, context.guild_id, word, plugin.bot.d.profanity_matchers
+    )
+    await responses.info(
+        context, "Word removed", f"`{word}` has been removed from the word lists."
+    )
+
+
+@plugin.command
+@lightbulb.add_checks(
+    lightbulb.guild_only,
+    lightbulb.has_guild_permissions(hikari.Permissions.MANAGE_GUILD),
+)
+@lightbulb.command("profanityrules", "Base of profanity filter rule command group")
+@lightbulb.implements(lightbulb.SlashCommandGroup, lightbulb.PrefixCommandGroup)
+async def profanity_rules(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+) -> None:
+    """The profanityrules base command.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    pass
+
+
+@profanity_rules.child
+@lightbulb.option("channel", "The channel to ignore", type=hikari.TextableGuildChannel)
+@lightbulb.command("ignorechannel", "Stops filtering a channel", inherit_checks=True)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def ignore_channel(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+) -> None:
+    """The profanityrules ignorechannel subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    channel = context.options.channel
+
+    await rules.ignore_channel(
+        collection, context.guild_id, channel.id, True, plugin.bot.d.profanity_rules
+    )
+    await responses.info(
+        context, "Channel ignored", f"<#{channel.id}> will no longer be filtered."
+    )
+
+
+@profanity_rules.child
+@lightbulb.option("channel", "The channel to filter", type=hikari.TextableGuildChannel)
+@lightbulb.command(
+    "unignorechannel", "Resumes filtering a channel", inherit_checks=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def unignore_channel(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+) -> None:
+    """The profanityrules unignorechannel subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    channel = context.options.channel
+
+    await rules.ignore_channel(
+        collection, context.guild_id, channel.id, False, plugin.bot.d.profanity_rules
+    )
+    await responses.info(
+        context, "Channel filtered", f"<#{channel.id}> will now be filtered."
+    )
+
+
+@profanity_rules.child
+@lightbulb.option("role", "The role to ignore", type=hikari.Role)
+@lightbulb.command(
+    "ignorerole", "Stops filtering members with a role", inherit_checks=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def ignore_role(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+) -> None:
+    """The profanityrules ignorerole subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    role = context.options.role
+
+    await rules.ignore_role(
+        collection, context.guild_id, role.id, True, plugin.bot.d.profanity_rules
+    )
+    await responses.info(
+        context,
+        "Role ignored",
+        f"Members with <@&{role.id}> will no longer be filtered.",
+    )
+
+
+@profanity_rules.child
+@lightbulb.option("role", "The role to filter", type=hikari.Role)
+@lightbulb.command(
+    "unignorerole", "Resumes filtering members with a role", inherit_checks=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def unignore_role(
+    context: lightbulb.SlashContext | lightbulb.PrefixContext,
+) -> None:
+    """The profanityrules unignorerole subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    role = context.options.role
+
+    await rules.ignore_role(
+        collection, context.guild_id, role.id, False, plugin.bot.d.profanity_rules
+    )
+    await responses.info(
+        context, "Role filtered", f"Members with <@&{role.id}> will now be filtered."
+    )
+
+
+@profanity_rules.child
+@lightbulb.option("length", "The minimum message length", type=int, min_value=0)
+@lightbulb.command(
+    "minlength", "Sets the shortest message length to filter", inherit_checks=True
+)
+@lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
+async def min_length(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
+    """The profanityrules minlength subcommand.
+
+    Arguments:
+        context: The command context.
+
+    Returns:
+        None.
+    """
+    collection = plugin.bot.d.mongo_database.settings
+    length = context.options.length
+
+    await rules.set_min_length(
+        collection, context.guild_id, length, plugin.bot.d.profanity_rules
+    )
+    await responses.info(
+        context,
+        "Minimum length set",
+        f"Messages shorter than {length} characters will no longer be filtered.",
+    )
+
+
 def load(bot: lightbulb.BotApp) -> None:
     """Loads the profanity filter plugin.
 
@@ -79,5 +817,11 @@ def load(bot: lightbulb.BotApp) -> None:
 
     Returns:
         None.
+
+    Raises:
+        OSError or ValueError if PROFANITY_MODEL is not a valid model.
     """
+    if MODEL_PATH:
+        classifier.Model.load(MODEL_PATH)
+
     bot.add_plugin(plugin)
@@ -1,11 +1,84 @@
 import hikari
 import lightbulb
+import logging
 
 from lib import responses, tags
 from lightbulb.utils import permissions
 
 
 plugin = lightbulb.Plugin("Tags")
+logger = logging.getLogger(__name__)
+
+
+@plugin.listener(hikari.StartingEvent)
+async def start_tags(event: hikari.StartingEvent) -> None:
+    """Creates the tag cache and usage counter when the bot starts up.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    plugin.bot.d.tag_cache = tags.TagCache()
+    plugin.bot.d.tag_names_unique = False
+    plugin.bot.d.tag_usage = tags.UsageCounter(
+        plugin.bot.d.mongo_database.tags, plugin.bot.d.tag_cache
+    )
+
+
+@plugin.listener(hikari.StartingEvent)
+async def start_tag_names(event: hikari.StartingEvent) -> None:
+    """Creates the tag name index used for autocomplete when the bot starts up.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    plugin.bot.d.tag_names = tags.NameIndex(plugin.bot.d.mongo_database.tags)
+
+
+@plugin.listener(hikari.StoppingEvent)
+async def stop_tags(event: hikari.StoppingEvent) -> None:
+    """Writes any pending tag uses and logs the tag cache metrics when the bot stops.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    await plugin.bot.d.tag_usage.close()
+
+    metrics = plugin.bot.d.tag_cache.metrics()
+    logger.info(
+        "Tag cache: %d hits, %d misses (%.1f%% hit rate), %d tags in %d guilds",
+        metrics["hits"],
+        metrics["misses"],
+        metrics["hit_rate"] * 100,
+        metrics["tags"],
+        metrics["guilds"],
+    )
+
+
+@plugin.listener(hikari.StartedEvent)
+async def create_tag_indexes(event: hikari.StartedEvent) -> None:
+    """Creates the indexes of the tags collection when the bot starts.
+
+    Until the unique name index is known to exist, tag creation checks for an
+    existing tag before inserting.
+
+    Arguments:
+        event: The event object.
+
+    Returns:
+        None.
+    """
+    plugin.bot.d.tag_names_unique = await tags.create_indexes(
+        plugin.bot.d.mongo_database.tags
+    )
 
 
 @plugin.listener(hikari.StartedEvent)
@@ -25,7 +98,10 @@ async def remove_old_tag_data(event: hikari.StartedEvent) -> None:
         try:
             await plugin.bot.rest.fetch_guild(int(guild_id))
         except:
-            await tags.delete_all_tags(collection, guild_id)
+            plugin.bot.d.tag_usage.discard_guild(guild_id)
+            await tags.delete_all_tags(
+                collection, guild_id, plugin.bot.d.tag_cache, plugin.bot.d.tag_names
+            )
 
 
 @plugin.listener(hikari.GuildLeaveEvent)
@@ -40,7 +116,10 @@ async def remove_all_guild_tag_data(event: hikari.GuildLeaveEvent) -> None:
     """
     collection = plugin.bot.d.mongo_database.tags
 
-    await tags.delete_all_tags(collection, event.get_guild().id)
+    plugin.bot.d.tag_usage.discard_guild(event.guild_id)
+    await tags.delete_all_tags(
+        collection, event.guild_id, plugin.bot.d.tag_cache, plugin.bot.d.tag_names
+    )
 
 
 @plugin.command
@@ -60,7 +139,7 @@ async def tag(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None
 
 
 @tag.child
-@lightbulb.option("name", "The name of the tag")
+@lightbulb.option("name", "The name of the tag", autocomplete=True)
 @lightbulb.command("show", "Shows the content of a tag", inherit_checks=True)
 @lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
 async def show(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
@@ -76,13 +155,13 @@ async def show(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
     tag_name = context.options.name
     tag_guild = context.get_guild()
 
-    tag = await tags.get_tag(collection, tag_name, tag_guild.id)
+    tag = await tags.get_tag(collection, tag_name, tag_guild.id, plugin.bot.d.tag_cache)
 
     if tag is None:
         await responses.error(context, "That tag does not exist.")
         return
 
-    await tags.increment_tag(collection, tag_name, tag_guild.id)
+    plugin.bot.d.tag_usage.increment(tag_name, tag_guild.id)
     await context.respond(tag.content)
 
 
@@ -106,12 +185,6 @@ async def create(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> N
     tag_guild = context.get_guild()
     tag_author = context.author
 
-    tag = await tags.get_tag(collection, tag_name, tag_guild.id)
-
-    if tag is not None:
-        await responses.error(context, "That tag already exists.")
-        return
-
     if len(tag_name) > 54:
         await responses.error(
             context, "The tag name must be less than 54 characters long."
@@ -124,9 +197,29 @@ async def create(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> N
         )
         return
 
-    await tags.create_tag(
-        collection, tag_name, tag_content, tag_guild.id, tag_author.id
+    if not plugin.bot.d.tag_names_unique:
+        tag = await tags.get_tag(
+            collection, tag_name, tag_guild.id, plugin.bot.d.tag_cache
+        )
+
+        if tag is not None:
+            await responses.error(context, "That tag already exists.")
+            return
+
+    created = await tags.create_tag(
+        collection,
+        tag_name,
+        tag_content,
+        tag_guild.id,
+        tag_author.id,
+        plugin.bot.d.tag_cache,
+        plugin.bot.d.tag_names,
     )
+
+    if not created:
+        await responses.error(context, "That tag already exists.")
+        return
+
     await responses.info(
         context,
         "Tag created",
@@ -136,7 +229,7 @@ async def create(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> N
 
 @tag.child
 @lightbulb.option("content", "The content of the tag")
-@lightbulb.option("name", "The name of the tag")
+@lightbulb.option("name", "The name of the tag", autocomplete=True)
 @lightbulb.command("edit", "Edits an existing tag", inherit_checks=True)
 @lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
 async def edit(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
@@ -154,7 +247,7 @@ async def edit(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
     tag_guild = context.get_guild()
     tag_editor = context.author
 
-    tag = await tags.get_tag(collection, tag_name, tag_guild.id)
+    tag = await tags.get_tag(collection, tag_name, tag_guild.id, plugin.bot.d.tag_cache)
 
     if tag is None:
         await responses.error(context, "That tag does not exist.")
@@ -164,7 +257,9 @@ async def edit(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
         await responses.error(context, "You don't have permission to edit that tag.")
         return
 
-    await tags.edit_tag(collection, tag_name, tag_content, tag_guild.id)
+    await tags.edit_tag(
+        collection, tag_name, tag_content, tag_guild.id, plugin.bot.d.tag_cache
+    )
     await responses.info(
         context,
         "Tag edited",
@@ -173,7 +268,7 @@ async def edit(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
 
 
 @tag.child
-@lightbulb.option("name", "The name of the tag")
+@lightbulb.option("name", "The name of the tag", autocomplete=True)
 @lightbulb.command("delete", "Deletes an existing tag", inherit_checks=True)
 @lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
 async def delete(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
@@ -190,7 +285,7 @@ async def delete(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> N
     tag_guild = context.get_guild()
     tag_deleter = tag_guild.get_member(context.author.id)
 
-    tag = await tags.get_tag(collection, tag_name, tag_guild.id)
+    tag = await tags.get_tag(collection, tag_name, tag_guild.id, plugin.bot.d.tag_cache)
 
     if tag is None:
         await responses.error(context, "That tag does not exist.")
@@ -204,7 +299,14 @@ async def delete(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> N
         await responses.error(context, "You don't have permission to delete that tag.")
         return
 
-    await tags.delete_tag(collection, tag_name, tag_guild.id)
+    plugin.bot.d.tag_usage.discard(tag_name, tag_guild.id)
+    await tags.delete_tag(
+        collection,
+        tag_name,
+        tag_guild.id,
+        plugin.bot.d.tag_cache,
+        plugin.bot.d.tag_names,
+    )
     await responses.info(
         context,
         "Tag deleted",
@@ -213,7 +315,7 @@ async def delete(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> N
 
 
 @tag.child
-@lightbulb.option("name", "The name of the tag")
+@lightbulb.option("name", "The name of the tag", autocomplete=True)
 @lightbulb.command("info", "Shows info about an existing tag", inherit_checks=True)
 @lightbulb.implements(lightbulb.SlashSubCommand, lightbulb.PrefixSubCommand)
 async def info(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> None:
@@ -229,7 +331,7 @@ async def info(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
     tag_name = context.options.name
     tag_guild = context.get_guild()
 
-    tag = await tags.get_tag(collection, tag_name, tag_guild.id)
+    tag = await tags.get_tag(collection, tag_name, tag_guild.id, plugin.bot.d.tag_cache)
 
     if tag is None:
         await responses.error(context, "That tag does not exist.")
@@ -243,7 +345,11 @@ async def info(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
         [
             responses.Field("Name", tag.name, True),
             responses.Field("Author", f"<@{tag.author_id}>", True),
-            responses.Field("Uses", tag.uses, True),
+            responses.Field(
+                "Uses",
+                tag.uses + plugin.bot.d.tag_usage.pending(tag_name, tag_guild.id),
+                True,
+            ),
             responses.Field("Created at", tag.created_date, True),
             responses.Field("Modified at", tag.modified_date, True),
         ],
@@ -252,6 +358,31 @@ async def info(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
     await context.respond(embed=embed)
 
 
+@show.autocomplete("name")
+@edit.autocomplete("name")
+@delete.autocomplete("name")
+@info.autocomplete("name")
+async def tag_name_autocomplete(
+    option: hikari.AutocompleteInteractionOption,
+    interaction: hikari.AutocompleteInteraction,
+) -> list[str]:
+    """Suggests the names of existing tags that start with what has been typed.
+
+    Arguments:
+        option: The option being autocompleted.
+        interaction: The autocomplete interaction.
+
+    Returns:
+        The suggested tag names.
+    """
+    if interaction.guild_id is None:
+        return []
+
+    return await plugin.bot.d.tag_names.search(
+        str(option.value or ""), interaction.guild_id
+    )
+
+
 @tag.child
 @lightbulb.option(
     "member", "The owner of the tags to view", type=hikari.Member, required=False
@@ -271,24 +402,23 @@ async def list(context: lightbulb.SlashContext | lightbulb.PrefixContext) -> Non
     tag_guild = context.get_guild()
     tag_author = context.options.member
 
-    if tag_author is not None:
-        tag_list = await tags.get_tags_by_author(
-            collection, tag_guild.id, tag_author.id
-        )
-    else:
-        tag_list = await tags.get_tags(collection, tag_guild.id)
-
-    tag_list_size = len(tag_list)
+    tag_author_id = tag_author.id if tag_author is not None else None
+    tag_count = await tags.count_tags(collection, tag_guild.id, tag_author_id)
 
-    if tag_list_size == 0:
+    if tag_count == 0:
         await responses.error(context, "There are no tags to show.")
         return
 
-    await responses.paginated_info(
+    await responses.lazy_paginated_info(
         context,
         "Tag list",
-        f"There are {tag_list_size} tags. Use `/tag show [tag]` to view its contents.",
-        [f"• {tag.name}" for tag in tag_list],
+        f"There are {tag_count} tags. Use `/tag show [tag]` to view its contents.",
+        (
+            [f"• {name}" for name in names]
+            async for names in tags.iter_tag_names(
+                collection, tag_guild.id, tag_author_id
+            )
+        ),
     )
 
 
@@ -0,0 +1,96 @@
+import asyncio
+import hikari
+import pytest
+
+from lib import audit, moderation
+from pymongo.errors import PyMongoError
+from unittest.mock import AsyncMock, MagicMock
+
+
+@pytest.fixture
+def mock_collection() -> MagicMock:
+    collection = MagicMock()
+    collection.insert_many = AsyncMock()
+    collection.create_index = AsyncMock()
+
+    return collection
+
+
+@pytest.fixture
+def mock_message() -> moderation.Message:
+    return moderation.Message(
+        hikari.Snowflake(1),
+        hikari.Snowflake(2),
+        hikari.Snowflake(3),
+        "content",
+        "Content",
+    )
+
+
+def test_build_record(mock_message: moderation.Message) -> None:
+    result = audit.build_record(mock_message, "lexicon")
+
+    assert result["guild_id"] == "1"
+    assert result["channel_id"] == "2"
+    assert result["message_id"] == "3"
+    assert result["content"] == "Content"
+    assert result["source"] == "lexicon"
+    assert result["created_at"].tzinfo is not None
+
+
+@pytest.mark.asyncio
+async def test_create_indexes(mock_collection: MagicMock) -> None:
+    await audit.create_indexes(mock_collection, retention=60)
+
+    assert mock_collection.create_index.await_args_list[0].args == ("created_at",)
+    assert mock_collection.create_index.await_args_list[0].kwargs == {
+        "expireAfterSeconds": 60
+    }
+
+
+@pytest.mark.asyncio
+async def test_audit_log_flushes_full_buffer(mock_collection: MagicMock) -> None:
+    audit_log = audit.AuditLog(mock_collection, flush_size=2, flush_delay=60)
+
+    audit_log.record({"a": 1})
+    audit_log.record({"b": 2})
+    await asyncio.sleep(0)
+
+    mock_collection.insert_many.assert_awaited_once_with(
+        [{"a": 1}, {"b": 2}], ordered=False
+    )
+    assert audit_log.written == 2
+    assert audit_log.flushes.timers == {}
+
+
+@pytest.mark.asyncio
+async def test_audit_log_flushes_after_delay(mock_collection: MagicMock) -> None:
+    audit_log = audit.AuditLog(mock_collection, flush_size=10, flush_delay=0.01)
+
+    audit_log.record({"a": 1})
+    await asyncio.sleep(0.05)
+
+    mock_collection.insert_many.assert_awaited_once_with([{"a": 1}], ordered=False)
+
+
+@pytest.mark.asyncio
+async def test_audit_log_close_flushes_buffer(mock_collection: MagicMock) -> None:
+    audit_log = audit.AuditLog(mock_collection, flush_size=10, flush_delay=60)
+
+    audit_log.record({"a": 1})
+    await audit_log.close()
+
+    mock_collection.insert_many.assert_awaited_once()
+    assert audit_log.written == 1
+
+
+@pytest.mark.asyncio
+async def test_audit_log_counts_failed_writes(mock_collection: MagicMock) -> None:
+    mock_collection.insert_many.side_effect = PyMongoError
+    audit_log = audit.AuditLog(mock_collection)
+
+    audit_log.record({"a": 1})
+    await audit_log.close()
+
+    assert audit_log.failed == 1
+    assert audit_log.written == 0
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+
+from lib import buffering
+from unittest.mock import MagicMock
+
+
+@pytest.mark.asyncio
+async def test_flush_scheduler_schedules_one_flush_per_key() -> None:
+    flushes = buffering.FlushScheduler(0.01)
+    flush = MagicMock()
+
+    flushes.schedule(flush, 1)
+    flushes.schedule(flush, 1)
+    flushes.schedule(flush, 2)
+    await asyncio.sleep(0.05)
+
+    assert sorted(call.args for call in flush.call_args_list) == [(1,), (2,)]
+
+
+@pytest.mark.asyncio
+async def test_flush_scheduler_cancel() -> None:
+    flushes = buffering.FlushScheduler(0.01)
+    flush = MagicMock()
+
+    flushes.schedule(flush)
+    flushes.cancel()
+    await asyncio.sleep(0.05)
+
+    flush.assert_not_called()
+    assert flushes.timers == {}
+
+
+@pytest.mark.asyncio
+async def test_flush_scheduler_wait_for_writes() -> None:
+    flushes = buffering.FlushScheduler(0.01)
+    written = []
+
+    async def write() -> None:
+        await asyncio.sleep(0)
+        written.append(True)
+
+    async def fail() -> None:
+        raise RuntimeError
+
+    flushes.start(write())
+    flushes.start(fail())
+    await flushes.wait()
+
+    assert written == [True]
+    assert not flushes.tasks
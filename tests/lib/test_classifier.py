@@ -0,0 +1,104 @@
+import numpy
+import pytest
+
+from lib import classifier
+
+
+@pytest.fixture
+def mock_model() -> classifier.Model:
+    return classifier.train(
+        [
+            "fuck you",
+            "shit head",
+            "you are a bitch",
+            "hello there",
+            "good game",
+            "nice",
+        ],
+        [True, True, True, False, False, False],
+        features=2**12,
+    )
+
+
+def test_ngram_features_are_stable() -> None:
+    result = classifier.ngram_features("abc", 2**12, (2,))
+
+    assert result == classifier.ngram_features("abc", 2**12, (2,))
+    assert len(result) == 4
+    assert all(0 <= index < 2**12 for index in result)
+
+
+def test_vectorize() -> None:
+    rows, columns, values = classifier.vectorize(["ab", "abc"], 2**12, (2,))
+
+    assert rows.tolist() == [0, 0, 0, 1, 1, 1, 1]
+    assert len(columns) == 7
+    assert values[:3].sum() == pytest.approx(1)
+
+
+def test_model_score_separates_classes(mock_model: classifier.Model) -> None:
+    result = mock_model.score(["fuck you", "hello there"])
+
+    assert result[0] > 0.5
+    assert result[1] < 0.5
+
+
+def test_model_save_and_load(mock_model: classifier.Model, tmp_path) -> None:
+    path = str(tmp_path / "model.npz")
+
+    mock_model.save(path)
+    result = classifier.Model.load(path)
+
+    assert result.ngram_sizes == mock_model.ngram_sizes
+    assert result.score(["fuck you"])[0] == pytest.approx(
+        mock_model.score(["fuck you"])[0], abs=1e-2
+    )
+
+
+@pytest.mark.asyncio
+async def test_classifier_pool_score(mock_model: classifier.Model, tmp_path) -> None:
+    path = str(tmp_path / "model.npz")
+    mock_model.save(path)
+    pool = classifier.ClassifierPool(path, workers=1)
+
+    result = await pool.score(["fuck you", "hello there"])
+    pool.close()
+
+    assert result[0] > 0.5
+    assert result[1] < 0.5
+
+
+def test_model_load_with_invalid_file(tmp_path) -> None:
+    path = tmp_path / "model.npz"
+    path.write_bytes(b"PK\x03\x04 not a model")
+
+    with pytest.raises(ValueError):
+        classifier.Model.load(str(path))
+
+
+def test_model_load_with_invalid_weights(tmp_path) -> None:
+    path = str(tmp_path / "model.npz")
+    classifier.Model(numpy.array([numpy.nan])).save(path)
+
+    with pytest.raises(ValueError):
+        classifier.Model.load(path)
+
+
+def test_classifier_pool_with_missing_model(tmp_path) -> None:
+    with pytest.raises(OSError):
+        classifier.ClassifierPool(str(tmp_path / "missing.npz"), workers=1)
+
+
+@pytest.mark.asyncio
+async def test_classifier_pool_counts_failed_batches(
+    mock_model: classifier.Model, tmp_path
+) -> None:
+    path = str(tmp_path / "model.npz")
+    mock_model.save(path)
+    pool = classifier.ClassifierPool(path, workers=1)
+    pool.close()
+
+    with pytest.raises(classifier.SCORING_ERRORS):
+        await pool.score(["hello there"])
+
+    assert pool.failed == 1
@@ -0,0 +1,168 @@
+import asyncio
+import hikari
+import pytest
+
+from lib import deletion
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def snowflake_at(age: timedelta, offset: int = 0) -> hikari.Snowflake:
+    return hikari.Snowflake(
+        hikari.Snowflake.from_datetime(datetime.now(timezone.utc) - age) + offset
+    )
+
+
+@pytest.fixture
+def mock_rest() -> MagicMock:
+    rest = MagicMock()
+    rest.delete_message = AsyncMock()
+    rest.delete_messages = AsyncMock()
+
+    return rest
+
+
+@pytest.fixture
+def mock_channel_id() -> hikari.Snowflake:
+    return hikari.Snowflake(123)
+
+
+def test_is_bulk_deletable_with_recent_message() -> None:
+    assert deletion.is_bulk_deletable(snowflake_at(timedelta(days=1)))
+
+
+def test_is_bulk_deletable_with_old_message() -> None:
+    assert not deletion.is_bulk_deletable(snowflake_at(timedelta(days=15)))
+
+
+@pytest.mark.asyncio
+async def test_deletion_coalescer_bulk_deletes_recent_messages(
+    mock_rest: MagicMock, mock_channel_id: hikari.Snowflake
+) -> None:
+    coalescer = deletion.DeletionCoalescer(mock_rest, delay=60)
+    message_ids = [snowflake_at(timedelta(minutes=1), offset) for offset in range(3)]
+
+    for message_id in message_ids:
+        coalescer.delete(mock_channel_id, message_id)
+
+    await coalescer.close()
+
+    mock_rest.delete_messages.assert_awaited_once_with(mock_channel_id, message_ids)
+    mock_rest.delete_message.assert_not_awaited()
+    assert coalescer.deleted == 3
+    assert coalescer.bulk_requests == 1
+
+
+@pytest.mark.asyncio
+async def test_deletion_coalescer_single_deletes_old_messages(
+    mock_rest: MagicMock, mock_channel_id: hikari.Snowflake
+) -> None:
+    coalescer = deletion.DeletionCoalescer(mock_rest, delay=60)
+    recent_id = snowflake_at(timedelta(minutes=1))
+    old_id = snowflake_at(timedelta(days=20))
+
+    coalescer.delete(mock_channel_id, recent_id)
+    coalescer.delete(mock_channel_id, old_id)
+    await coalescer.close()
+
+    mock_rest.delete_messages.assert_not_awaited()
+    assert mock_rest.delete_message.await_count == 2
+    assert coalescer.single_requests == 2
+
+
+@pytest.mark.asyncio
+async def test_deletion_coalescer_flushes_after_delay(
+    mock_rest: MagicMock, mock_channel_id: hikari.Snowflake
+) -> None:
+    coalescer = deletion.DeletionCoalescer(mock_rest, delay=0.01)
+    message_id = snowflake_at(timedelta(minutes=1))
+
+    coalescer.delete(mock_channel_id, message_id)
+    await asyncio.sleep(0.05)
+
+    mock_rest.delete_message.assert_awaited_once_with(mock_channel_id, message_id)
+    assert coalescer.pending == {}
+
+
+@pytest.fixture
+def mock_cache() -> MagicMock:
+    cache = MagicMock()
+    cache.get_thread.return_value = None
+    cache.get_guild_channel.return_value = MagicMock(spec=hikari.GuildTextChannel)
+
+    return cache
+
+
+@pytest.mark.parametrize(
+    "permissions, expected",
+    [
+        (hikari.Permissions.MANAGE_MESSAGES, True),
+        (hikari.Permissions.SEND_MESSAGES, False),
+    ],
+)
+def test_channel_permissions_can_delete(
+    mock_cache: MagicMock,
+    mock_channel_id: hikari.Snowflake,
+    permissions: hikari.Permissions,
+    expected: bool,
+) -> None:
+    channel_permissions = deletion.ChannelPermissions()
+
+    with patch("lib.deletion.permissions.permissions_in", return_value=permissions):
+        result = channel_permissions.can_delete(mock_cache, 1, mock_channel_id)
+
+    assert result is expected
+    assert channel_permissions.skipped == (not expected)
+
+
+def test_channel_permissions_are_memoized(
+    mock_cache: MagicMock, mock_channel_id: hikari.Snowflake
+) -> None:
+    channel_permissions = deletion.ChannelPermissions()
+
+    with patch("lib.deletion.permissions.permissions_in") as mock_permissions_in:
+        mock_permissions_in.return_value = hikari.Permissions.MANAGE_MESSAGES
+        channel_permissions.can_delete(mock_cache, 1, mock_channel_id)
+        channel_permissions.can_delete(mock_cache, 1, mock_channel_id)
+
+    mock_permissions_in.assert_called_once()
+
+
+def test_channel_permissions_use_thread_parent(mock_cache: MagicMock) -> None:
+    mock_cache.get_thread.return_value = MagicMock(parent_id=hikari.Snowflake(5))
+    channel_permissions = deletion.ChannelPermissions()
+
+    with patch(
+        "lib.deletion.permissions.permissions_in", return_value=hikari.Permissions.NONE
+    ):
+        channel_permissions.can_delete(mock_cache, 1, hikari.Snowflake(6))
+
+    mock_cache.get_guild_channel.assert_called_once_with(5)
+    assert list(channel_permissions.permissions) == [5]
+
+
+def test_channel_permissions_allow_uncached_channels(
+    mock_cache: MagicMock, mock_channel_id: hikari.Snowflake
+) -> None:
+    mock_cache.get_guild_channel.return_value = None
+    channel_permissions = deletion.ChannelPermissions()
+
+    assert channel_permissions.can_delete(mock_cache, 1, mock_channel_id)
+    assert not channel_permissions.permissions
+
+
+def test_channel_permissions_invalidate(
+    mock_cache: MagicMock, mock_channel_id: hikari.Snowflake
+) -> None:
+    channel_permissions = deletion.ChannelPermissions()
+
+    with patch(
+        "lib.deletion.permissions.permissions_in", return_value=hikari.Permissions.NONE
+    ):
+        channel_permissions.can_delete(mock_cache, 1, mock_channel_id)
+        channel_permissions.can_delete(mock_cache, 2, hikari.Snowflake(7))
+
+    channel_permissions.invalidate_channel(mock_channel_id)
+    channel_permissions.invalidate_guild(2)
+
+    assert not channel_permissions.permissions
@@ -0,0 +1,356 @@
+import asyncio
+import pytest
+
+from lib import moderation
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_full_window() -> None:
+    mock_handler = AsyncMock()
+    mock_handler.side_effect = lambda items: [item.upper() for item in items]
+
+    batcher = moderation.Batcher(mock_handler, max_size=2, max_delay=60)
+
+    result = await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+    assert result == ["A", "B"]
+    mock_handler.assert_awaited_once_with(["a", "b"])
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_after_delay() -> None:
+    mock_handler = AsyncMock()
+    mock_handler.side_effect = lambda items: [len(item) for item in items]
+
+    batcher = moderation.Batcher(mock_handler, max_size=10, max_delay=0.01)
+
+    result = await batcher.submit("abc")
+
+    assert result == 3
+    mock_handler.assert_awaited_once_with(["abc"])
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_handler_errors() -> None:
+    mock_handler = AsyncMock()
+    mock_handler.side_effect = ValueError
+
+    batcher = moderation.Batcher(mock_handler, max_size=2, max_delay=60)
+
+    result = await asyncio.gather(
+        batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+    )
+
+    assert all(isinstance(error, ValueError) for error in result)
+
+
+@pytest.mark.asyncio
+async def test_batcher_close_flushes_pending_window() -> None:
+    mock_handler = AsyncMock()
+    mock_handler.side_effect = lambda items: items
+
+    batcher = moderation.Batcher(mock_handler, max_size=10, max_delay=60)
+    waiter = asyncio.create_task(batcher.submit("a"))
+
+    await asyncio.sleep(0)
+    await batcher.close()
+
+    assert await waiter == "a"
+
+
+def test_verdict_cache_normalizes_content() -> None:
+    cache = moderation.VerdictCache()
+    cache.set("GG  well played", False)
+
+    assert cache.get("gg well played") is False
+    assert cache.hits == 1
+
+
+def test_verdict_cache_with_missing_content() -> None:
+    cache = moderation.VerdictCache()
+
+    assert cache.get("lol") is None
+    assert cache.misses == 1
+
+
+def test_verdict_cache_evicts_least_recently_used() -> None:
+    cache = moderation.VerdictCache(max_size=2)
+    cache.set("a", False)
+    cache.set("b", True)
+    cache.get("a")
+    cache.set("c", False)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is False
+    assert len(cache.entries) == 2
+    assert cache.evictions == 1
+
+
+@patch("lib.moderation.time")
+def test_verdict_cache_with_expired_verdict(mock_time: MagicMock) -> None:
+    cache = moderation.VerdictCache(ttl=60)
+
+    mock_time.monotonic.return_value = 0
+    cache.set("a", True)
+    mock_time.monotonic.return_value = 61
+
+    assert cache.get("a") is None
+    assert cache.entries == {}
+
+
+def test_fair_queue_alternates_between_flows() -> None:
+    queue = moderation.FairQueue(key=lambda item: item[0])
+
+    for item in ["a1", "a2", "a3", "b1", "c1"]:
+        queue.put_nowait(item)
+
+    result = [queue.get_nowait() for _ in range(5)]
+
+    assert result == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_fair_queue_serves_flows_by_weight() -> None:
+    queue = moderation.FairQueue(key=lambda item: item[0], weights={"a": 2})
+
+    for item in ["a1", "a2", "a3", "a4", "b1", "b2"]:
+        queue.put_nowait(item)
+
+    result = [queue.get_nowait() for _ in range(6)]
+
+    assert result == ["a1", "a2", "b1", "a3", "a4", "b2"]
+
+
+def test_fair_queue_caps_items_in_flight() -> None:
+    queue = moderation.FairQueue(key=lambda item: item[0], max_in_flight=1)
+
+    for item in ["a1", "a2", "b1"]:
+        queue.put_nowait(item)
+
+    assert queue.get_nowait() == "a1"
+    assert queue.get_nowait() == "b1"
+
+    with pytest.raises(asyncio.QueueEmpty):
+        queue.get_nowait()
+
+    queue.task_done("a1")
+
+    assert queue.get_nowait() == "a2"
+
+
+def test_fair_queue_drops_from_deepest_flow() -> None:
+    queue = moderation.FairQueue(key=lambda item: item[0])
+
+    for item in ["b1", "a1", "a2"]:
+        queue.put_nowait(item)
+
+    assert queue.drop_oldest() == "a1"
+    assert queue.depths() == {"a": 1, "b": 1}
+
+
+def test_fair_queue_requires_positive_weights() -> None:
+    with pytest.raises(ValueError):
+        moderation.FairQueue(weights={"a": 0})
+
+
+@pytest.mark.asyncio
+async def test_fair_queue_get_waits_for_item() -> None:
+    queue = moderation.FairQueue()
+    task = asyncio.create_task(queue.get())
+
+    await asyncio.sleep(0)
+    queue.put_nowait("a")
+
+    assert await task == "a"
+
+
+@pytest.mark.asyncio
+async def test_moderation_queue_processes_items() -> None:
+    mock_handler = AsyncMock()
+    queue = moderation.ModerationQueue(mock_handler, max_size=10, workers=2)
+
+    queue.start()
+    queue.put("a")
+    queue.put("b")
+    await queue.queue.join()
+    await queue.close()
+
+    assert mock_handler.await_count == 2
+    assert queue.processed == 2
+
+
+@pytest.mark.asyncio
+async def test_moderation_queue_counts_failures() -> None:
+    mock_handler = AsyncMock()
+    mock_handler.side_effect = ValueError
+    queue = moderation.ModerationQueue(mock_handler, max_size=10, workers=1)
+
+    queue.start()
+    queue.put("a")
+    await queue.queue.join()
+    await queue.close()
+
+    assert queue.failed == 1
+    assert queue.processed == 0
+
+
+def test_moderation_queue_drops_oldest_when_full() -> None:
+    queue = moderation.ModerationQueue(AsyncMock(), max_size=2)
+
+    queue.put("a")
+    queue.put("b")
+    result = queue.put("c")
+
+    assert result
+    assert queue.queue.get_nowait() == "b"
+    assert queue.metrics()["dropped"] == 1
+
+
+@patch("lib.moderation.random")
+def test_moderation_queue_samples_when_full(mock_random: MagicMock) -> None:
+    queue = moderation.ModerationQueue(
+        AsyncMock(), max_size=1, policy=moderation.OverloadPolicy.SAMPLE
+    )
+    mock_random.random.return_value = 0.5
+
+    queue.put("a")
+    result = queue.put("b")
+
+    assert not result
+    assert queue.queue.get_nowait() == "a"
+    assert queue.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_moderation_queue_falls_back_when_full() -> None:
+    mock_fallback = AsyncMock()
+    queue = moderation.ModerationQueue(
+        AsyncMock(),
+        max_size=1,
+        policy=moderation.OverloadPolicy.FALLBACK,
+        fallback=mock_fallback,
+    )
+
+    queue.put("a")
+    result = queue.put("b")
+    await asyncio.sleep(0)
+
+    assert not result
+    assert queue.fallbacks == 1
+    mock_fallback.assert_awaited_once_with("b")
+
+
+@pytest.mark.asyncio
+async def test_moderation_queue_bounds_fallbacks() -> None:
+    release = asyncio.Event()
+    handled = []
+
+    async def mock_fallback(item: str) -> None:
+        handled.append(item)
+        await release.wait()
+
+    queue = moderation.ModerationQueue(
+        AsyncMock(),
+        max_size=1,
+        policy=moderation.OverloadPolicy.FALLBACK,
+        fallback=mock_fallback,
+        max_fallbacks=1,
+    )
+
+    queue.put("a")
+    queue.put("b")
+    queue.put("c")
+    await asyncio.sleep(0)
+
+    assert queue.fallbacks == 1
+    assert queue.dropped == 1
+    assert handled == ["b"]
+    assert len(queue.fallback_tasks) == 1
+
+    release.set()
+    await asyncio.gather(*queue.tasks)
+
+    assert queue.fallback_tasks == set()
+
+
+def test_moderation_queue_fallback_policy_requires_handler() -> None:
+    with pytest.raises(ValueError):
+        moderation.ModerationQueue(
+            AsyncMock(), policy=moderation.OverloadPolicy.FALLBACK
+        )
+
+
+def test_message() -> None:
+    result = moderation.Message(1, 2, 3, "content", "Content")
+
+    assert result.guild_id == 1
+    assert result.channel_id == 2
+    assert result.message_id == 3
+    assert result.content == "content"
+    assert result.raw_content == "Content"
+
+
+def test_content_tracker_detects_changes() -> None:
+    tracker = moderation.ContentTracker()
+
+    assert tracker.update(1, "hello")
+    assert not tracker.update(1, "hello")
+    assert tracker.update(1, "hello there")
+
+
+def test_content_tracker_forgets_least_recently_seen() -> None:
+    tracker = moderation.ContentTracker(max_size=2)
+    tracker.update(1, "a")
+    tracker.update(2, "b")
+    tracker.update(1, "a")
+    tracker.update(3, "c")
+
+    assert list(tracker.hashes) == [1, 3]
+    assert tracker.update(2, "b")
+
+
+def test_repeat_window_finds_recent_verdicts() -> None:
+    window = moderation.RepeatWindow()
+
+    window.add(1, "spam", True)
+    window.add(1, "hello", False)
+
+    assert window.get(1, "spam") is True
+    assert window.get(1, "hello") is False
+    assert window.get(1, "other") is None
+    assert window.get(2, "spam") is None
+    assert window.profane_repeats == 1
+    assert window.clean_repeats == 1
+
+
+def test_repeat_window_keeps_latest_entries() -> None:
+    window = moderation.RepeatWindow(window_size=2)
+
+    window.add(1, "a", True)
+    window.add(1, "b", True)
+    window.add(1, "c", True)
+
+    assert window.get(1, "a") is None
+    assert len(window.windows[1]) == 2
+
+
+def test_repeat_window_forgets_least_recently_active_channel() -> None:
+    window = moderation.RepeatWindow(max_channels=2)
+
+    window.add(1, "a", True)
+    window.add(2, "a", True)
+    window.add(1, "b", True)
+    window.add(3, "a", True)
+
+    assert list(window.windows) == [1, 3]
+
+
+@patch("lib.moderation.time")
+def test_repeat_window_expires_entries(mock_time: MagicMock) -> None:
+    window = moderation.RepeatWindow(ttl=30)
+    mock_time.monotonic.return_value = 0
+    window.add(1, "spam", True)
+    mock_time.monotonic.return_value = 31
+
+    assert window.get(1, "spam") is None
+    assert 1 not in window.windows
@@ -1,7 +1,227 @@
+import pytest
+
 from lib import openai
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+@pytest.fixture
+def mock_session() -> MagicMock:
+    mock_response = MagicMock()
+    mock_response.raise_for_status = MagicMock()
+    mock_response.json = AsyncMock()
+    mock_response.json.return_value = {"choices": [{"message": {"content": "NO"}}]}
+
+    session = MagicMock()
+    session.closed = False
+    session.close = AsyncMock()
+    session.post.return_value.__aenter__.return_value = mock_response
+
+    return session
+
+
+def test_client() -> None:
+    result = openai.Client("key", "http://localhost/v1/", 4, 2.5)
+
+    assert result.api_key == "key"
+    assert result.base_url == "http://localhost/v1"
+    assert result.timeout.total == 2.5
+    assert result.session is None
+
+
+@pytest.mark.asyncio
+async def test_client_prompt(mock_session: MagicMock) -> None:
+    client = openai.Client("key")
+    client.session = mock_session
+
+    result = await client.prompt("Hello!")
+
+    assert result == "NO"
+
+    mock_session.post.assert_called_once_with(
+        f"{openai.API_BASE}/chat/completions",
+        json={
+            "model": openai.MODEL,
+            "messages": [{"role": "user", "content": "Hello!"}],
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_close(mock_session: MagicMock) -> None:
+    client = openai.Client("key")
+    client.session = mock_session
+
+    await client.close()
+
+    mock_session.close.assert_awaited_once()
+    assert client.session is None
+
+
+@pytest.mark.asyncio
+async def test_client_classify() -> None:
+    client = openai.Client("key")
+    client.prompt = AsyncMock()
+    client.prompt.return_value = '["YES", "no"]'
+
+    result = await client.classify(["bad", "good"])
+
+    assert result == [True, False]
+    assert '1. "bad"' in client.prompt.await_args.args[0]
+    assert '2. "good"' in client.prompt.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_client_classify_with_missing_verdicts() -> None:
+    client = openai.Client("key")
+    client.prompt = AsyncMock()
+    client.prompt.return_value = '["YES"]'
+
+    with pytest.raises(ValueError):
+        await client.classify(["bad", "good"])
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_passes_results_through() -> None:
+    breaker = openai.CircuitBreaker()
+    mock_function = AsyncMock()
+    mock_function.return_value = "YES"
+
+    result = await breaker.call(mock_function, "message")
+
+    assert result == "YES"
+    mock_function.assert_awaited_once_with("message")
+    assert breaker.state is openai.BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_on_failures() -> None:
+    breaker = openai.CircuitBreaker(min_calls=2, failure_rate=0.5)
+    mock_function = AsyncMock()
+    mock_function.side_effect = ValueError
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await breaker.call(mock_function)
+
+    with pytest.raises(openai.CircuitOpenError):
+        await breaker.call(mock_function)
+
+    assert breaker.state is openai.BreakerState.OPEN
+    assert mock_function.await_count == 2
+
+
+def test_circuit_breaker_counts_slow_calls_as_failures() -> None:
+    breaker = openai.CircuitBreaker(min_calls=1, slow_call=1.0)
+
+    breaker.record(True, 2.0)
+
+    assert breaker.state is openai.BreakerState.OPEN
+
+
+@patch("lib.openai.time")
+def test_circuit_breaker_half_opens_for_one_probe(mock_time: MagicMock) -> None:
+    breaker = openai.CircuitBreaker(min_calls=1, reset_timeout=30)
+
+    mock_time.monotonic.return_value = 0
+    breaker.record(True, 0.1)
+    mock_time.monotonic.return_value = 31
+
+    assert breaker.allow()
+    assert breaker.state is openai.BreakerState.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record(False, 0.1)
+
+    assert breaker.state is openai.BreakerState.CLOSED
+
+
+@patch("lib.openai.time")
+def test_circuit_breaker_reopens_on_failed_probe(mock_time: MagicMock) -> None:
+    breaker = openai.CircuitBreaker(min_calls=1, reset_timeout=30)
+
+    mock_time.monotonic.return_value = 0
+    breaker.record(True, 0.1)
+    mock_time.monotonic.return_value = 31
+    breaker.allow()
+    breaker.record(True, 0.1)
+
+    assert breaker.state is openai.BreakerState.OPEN
+    assert not breaker.allow()
+
+
+def test_estimate_tokens() -> None:
+    assert openai.estimate_tokens("") == 1
+    assert openai.estimate_tokens("a" * 40) == 11
+    assert openai.estimate_cost("a" * 40) == 11 * openai.PROMPT_TOKEN_PRICE
+
+
+@patch("lib.openai.time")
+def test_token_bucket_refills_up_to_capacity(mock_time: MagicMock) -> None:
+    mock_time.monotonic.return_value = 0
+    bucket = openai.TokenBucket(rate=10, capacity=100)
+    bucket.tokens = 0
+    mock_time.monotonic.return_value = 5
+
+    assert bucket.refill() == 50
+
+    mock_time.monotonic.return_value = 60
+
+    assert bucket.refill() == 100
+
+
+@patch("lib.openai.time")
+def test_budget_denies_guild_once_spent(mock_time: MagicMock) -> None:
+    mock_time.monotonic.return_value = 0
+    budget = openai.Budget(tokens_per_minute=1000, guild_tokens_per_minute=20)
+
+    assert budget.allow(1, "a" * 40)
+    assert not budget.allow(1, "a" * 40)
+    assert budget.allow(2, "a" * 40)
+    assert budget.spent == 22
+    assert budget.denied == 1
+
+
+@patch("lib.openai.time")
+def test_budget_denies_every_guild_once_global_bucket_is_spent(
+    mock_time: MagicMock,
+) -> None:
+    mock_time.monotonic.return_value = 0
+    budget = openai.Budget(tokens_per_minute=20, guild_tokens_per_minute=1000)
+
+    assert budget.allow(1, "a" * 40)
+    assert not budget.allow(2, "a" * 40)
+
+
+@patch("lib.openai.random")
+@patch("lib.openai.time")
+def test_budget_samples_spent_guild(
+    mock_time: MagicMock, mock_random: MagicMock
+) -> None:
+    mock_time.monotonic.return_value = 0
+    budget = openai.Budget(
+        tokens_per_minute=1000,
+        guild_tokens_per_minute=20,
+        policies={1: openai.BudgetPolicy.SAMPLE},
+        sample_rate=0.5,
+    )
+    budget.allow(1, "a" * 40)
+
+    mock_random.random.return_value = 0.2
+    assert budget.allow(1, "a" * 40)
+
+    mock_random.random.return_value = 0.8
+    assert not budget.allow(1, "a" * 40)
+    assert budget.sampled == 1
+
 
+@patch("lib.openai.time")
+def test_budget_metrics(mock_time: MagicMock) -> None:
+    mock_time.monotonic.return_value = 0
+    budget = openai.Budget()
 
-def test_prompt() -> None:
-    response = openai.prompt("Hello!")
+    budget.allow(1, "a" * 40)
+    result = budget.metrics()
 
-    assert response != ""
+    assert result["spent"] == 11
+    assert result["tokens_per_minute"] == 11
+    assert result["guild_tokens_per_minute"] == {"1": 11}
@@ -2,7 +2,7 @@ import hikari
 import pytest
 
 from lib import profanity
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock, AsyncMock, patch
 
 
 @pytest.fixture
@@ -88,3 +88,278 @@ async def test_disable_filter(mock_id: hikari.Snowflake) -> None:
     mock_collection.update_one.assert_awaited_once_with(
         {"guild_id": str(mock_id)}, {"$set": {"profanity_filter": False}}, upsert=True
     )
+
+
+def test_settings_cache(mock_id: hikari.Snowflake) -> None:
+    cache = profanity.SettingsCache(60)
+
+    assert cache.get(mock_id) is None
+
+    cache.set(mock_id, True)
+
+    assert cache.get(mock_id)
+
+    cache.invalidate(mock_id)
+
+    assert cache.get(mock_id) is None
+
+
+@patch("lib.profanity.time")
+def test_settings_cache_with_expired_entry(
+    mock_time: MagicMock, mock_id: hikari.Snowflake
+) -> None:
+    cache = profanity.SettingsCache(60)
+
+    mock_time.monotonic.return_value = 0
+    cache.set(mock_id, True)
+    mock_time.monotonic.return_value = 61
+
+    assert cache.get(mock_id) is None
+
+
+@pytest.mark.asyncio
+async def test_is_filter_enabled_with_cached_setting(
+    mock_id: hikari.Snowflake,
+) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one = AsyncMock()
+    cache = profanity.SettingsCache()
+    cache.set(mock_id, True)
+
+    result = await profanity.is_filter_enabled(mock_collection, mock_id, cache)
+
+    assert result
+    mock_collection.find_one.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_is_filter_enabled_populates_cache(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one = AsyncMock()
+    mock_collection.find_one.return_value = None
+    cache = profanity.SettingsCache()
+
+    await profanity.is_filter_enabled(mock_collection, mock_id, cache)
+
+    assert cache.get(mock_id) is False
+
+
+@pytest.mark.asyncio
+async def test_enable_filter_writes_through_cache(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.update_one = AsyncMock()
+    cache = profanity.SettingsCache()
+
+    await profanity.enable_filter(mock_collection, mock_id, cache)
+
+    assert cache.get(mock_id)
+
+
+@pytest.mark.asyncio
+async def test_disable_filter_writes_through_cache(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.update_one = AsyncMock()
+    cache = profanity.SettingsCache()
+    cache.set(mock_id, True)
+
+    await profanity.disable_filter(mock_collection, mock_id, cache)
+
+    assert cache.get(mock_id) is False
+
+
+def test_matcher_scan_with_clean_content() -> None:
+    matcher = profanity.Matcher(["fuck"], ["ass"])
+
+    assert matcher.scan("gg well played") is profanity.Verdict.CLEAN
+
+
+def test_matcher_scan_with_blocked_word() -> None:
+    matcher = profanity.Matcher(["fuck"], ["ass"])
+
+    assert matcher.scan("oh FUCK, no") is profanity.Verdict.PROFANE
+
+
+def test_matcher_scan_with_blocked_term_inside_word() -> None:
+    matcher = profanity.Matcher(["cunt"], [])
+
+    assert matcher.scan("scunthorpe united") is profanity.Verdict.AMBIGUOUS
+
+
+def test_matcher_scan_with_suspect_term() -> None:
+    matcher = profanity.Matcher(["fuck"], ["ass"])
+
+    assert matcher.scan("what an ass") is profanity.Verdict.AMBIGUOUS
+
+
+def test_matcher_scan_with_suspect_term_inside_word() -> None:
+    matcher = profanity.Matcher(["fuck"], ["ass"])
+
+    assert matcher.scan("first class") is profanity.Verdict.CLEAN
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["hello", "first class", "pass", "shell", "assignment", "skill", "shoe", "strasse"],
+)
+def test_matcher_scan_with_clean_words(content: str) -> None:
+    assert profanity.DEFAULT_MATCHER.scan(content) is profanity.Verdict.CLEAN
+
+
+def test_matcher_scan_with_overlapping_terms() -> None:
+    matcher = profanity.Matcher(["she", "hers"], ["he"])
+
+    assert matcher.scan("ushers") is profanity.Verdict.AMBIGUOUS
+    assert matcher.scan("it is hers") is profanity.Verdict.PROFANE
+
+
+def test_matcher_scan_without_whole_words() -> None:
+    matcher = profanity.Matcher(["cunt"], ["ass"])
+
+    assert matcher.scan("scunthorpe", whole_words=False) is profanity.Verdict.PROFANE
+    assert matcher.scan("first class", whole_words=False) is profanity.Verdict.CLEAN
+
+
+def test_guild_matchers_compile_with_custom_lists(mock_id: hikari.Snowflake) -> None:
+    matchers = profanity.GuildMatchers()
+
+    result = matchers.compile(mock_id, ["Noob"], ["damn", "shit"])
+
+    assert matchers.get(mock_id) is result
+    assert result.scan("what a noob") is profanity.Verdict.PROFANE
+    assert result.scan("shit, damn") is profanity.Verdict.CLEAN
+    assert result.scan("oh fuck") is profanity.Verdict.PROFANE
+
+
+def test_guild_matchers_compile_without_custom_lists(
+    mock_id: hikari.Snowflake,
+) -> None:
+    matchers = profanity.GuildMatchers()
+
+    result = matchers.compile(mock_id, [], [])
+
+    assert result is profanity.DEFAULT_MATCHER
+
+
+def test_guild_matchers_invalidate(mock_id: hikari.Snowflake) -> None:
+    matchers = profanity.GuildMatchers()
+    matchers.compile(mock_id, [], [])
+
+    matchers.invalidate(mock_id)
+
+    assert matchers.get(mock_id) is None
+
+
+@pytest.mark.asyncio
+async def test_get_matcher_loads_word_lists_once(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one = AsyncMock()
+    mock_collection.find_one.return_value = {"banned_words": ["noob"]}
+    matchers = profanity.GuildMatchers()
+
+    first = await profanity.get_matcher(mock_collection, mock_id, matchers)
+    second = await profanity.get_matcher(mock_collection, mock_id, matchers)
+
+    assert first is second
+    assert first.scan("noob") is profanity.Verdict.PROFANE
+    mock_collection.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_ban_word(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update = AsyncMock()
+    mock_collection.find_one_and_update.return_value = {"banned_words": ["noob"]}
+    matchers = profanity.GuildMatchers()
+
+    result = await profanity.ban_word(mock_collection, mock_id, " Noob ", matchers)
+
+    assert result == {"banned_words": ["noob"], "allowed_words": []}
+    assert mock_collection.find_one_and_update.await_args.args == (
+        {"guild_id": str(mock_id)},
+        {"$addToSet": {"banned_words": "noob"}, "$pull": {"allowed_words": "noob"}},
+    )
+    assert matchers.get(mock_id).scan("noob") is profanity.Verdict.PROFANE
+
+
+@pytest.mark.asyncio
+async def test_allow_word(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update = AsyncMock()
+    mock_collection.find_one_and_update.return_value = {"allowed_words": ["hell"]}
+    matchers = profanity.GuildMatchers()
+
+    await profanity.allow_word(mock_collection, mock_id, "hell", matchers)
+
+    assert mock_collection.find_one_and_update.await_args.args == (
+        {"guild_id": str(mock_id)},
+        {"$addToSet": {"allowed_words": "hell"}, "$pull": {"banned_words": "hell"}},
+    )
+    assert matchers.get(mock_id).scan("hell") is profanity.Verdict.CLEAN
+
+
+@pytest.mark.asyncio
+async def test_remove_word(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update = AsyncMock()
+    mock_collection.find_one_and_update.return_value = {}
+
+    await profanity.remove_word(mock_collection, mock_id, "Grrr")
+
+    assert mock_collection.find_one_and_update.await_args.args == (
+        {"guild_id": str(mock_id)},
+        {"$pull": {"banned_words": "gr", "allowed_words": "gr"}},
+    )
+
+
+def test_guild_matchers_compile_normalizes_terms(mock_id: hikari.Snowflake) -> None:
+    matchers = profanity.GuildMatchers()
+
+    result = matchers.compile(mock_id, ["grrr", "$cam"], ["ＤＡＭＮ"])
+
+    assert result.scan(profanity.normalize("grrrrr")) is profanity.Verdict.PROFANE
+    assert result.scan(profanity.normalize("what a $cam")) is profanity.Verdict.PROFANE
+    assert result.scan(profanity.normalize("damn")) is profanity.Verdict.CLEAN
+
+
+def test_normalize_does_not_cache_long_content() -> None:
+    content = "a" + "b" * profanity.NORMALIZE_CACHE_MAX_LENGTH
+    misses = profanity.normalize_cached.cache_info().misses
+
+    assert profanity.normalize(content) == "ab"
+    assert profanity.normalize_cached.cache_info().misses == misses
+
+
+def test_normalize_folds_compatibility_characters() -> None:
+    assert profanity.normalize("ＦＵＣＫ") == "fuck"
+
+
+def test_normalize_strips_combining_marks() -> None:
+    assert profanity.normalize("fück") == "fuck"
+    assert profanity.normalize("s\u0336h\u0336i\u0336t\u0336") == "shit"
+
+
+def test_fold_leet() -> None:
+    assert profanity.fold_leet("sh1t 4 y0u") == "shit a you"
+    assert profanity.fold_leet("sh!t d|ck shit!") == "shit dick shit!"
+
+
+def test_matcher_scan_with_leetspeak() -> None:
+    matcher = profanity.Matcher(["shit"], ["ass"])
+
+    assert matcher.scan("sh1t") is profanity.Verdict.PROFANE
+    assert matcher.scan("sh!t!") is profanity.Verdict.PROFANE
+    assert matcher.scan("4ss") is profanity.Verdict.AMBIGUOUS
+
+
+def test_normalize_strips_zero_width_characters() -> None:
+    assert profanity.normalize("sh\u200bi\u200dt") == "shit"
+
+
+def test_normalize_folds_confusables() -> None:
+    assert profanity.normalize("ѕhіt") == "shit"
+    assert profanity.normalize("$h1t") == "sh1t"
+
+
+def test_normalize_collapses_repeated_characters() -> None:
+    assert profanity.normalize("fuuuuuck") == "fuck"
+    assert profanity.normalize("hello") == "hello"
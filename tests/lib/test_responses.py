@@ -101,6 +101,61 @@ async def test_paginated_info(
     mock_ButtonNavigator.return_value.run.assert_awaited_once_with(mock_context)
 
 
+async def iterate(items: list):
+    for item in items:
+        yield item
+
+
+@pytest.mark.asyncio
+async def test_lazy_navigator_loads_pages_on_demand() -> None:
+    navigator = responses.LazyNavigator(iterate(["a", "b"]), buttons=[])
+
+    assert await navigator.load_page()
+    assert navigator.pages == ["a"]
+
+    await responses.lazy_prev_page(navigator, MagicMock())
+    assert navigator.current_page_index == 0
+
+    await responses.lazy_next_page(navigator, MagicMock())
+    assert navigator.pages == ["a", "b"]
+    assert navigator.current_page_index == 1
+
+    await responses.lazy_next_page(navigator, MagicMock())
+    assert navigator.exhausted
+    assert navigator.current_page_index == 0
+
+    await responses.lazy_prev_page(navigator, MagicMock())
+    assert navigator.current_page_index == 1
+
+
+@pytest.mark.asyncio
+async def test_lazy_navigator_without_pages() -> None:
+    navigator = responses.LazyNavigator(iterate([]), buttons=[])
+
+    with pytest.raises(ValueError):
+        await navigator.run(MagicMock())
+
+
+@patch("lib.responses.LazyNavigator", return_value=AsyncMock())
+@pytest.mark.asyncio
+async def test_lazy_paginated_info(
+    mock_LazyNavigator: AsyncMock, mock_embed_title: str, mock_embed_description: str
+) -> None:
+    mock_context = MagicMock()
+
+    await responses.lazy_paginated_info(
+        mock_context, mock_embed_title, mock_embed_description, iterate([["a"]])
+    )
+
+    mock_LazyNavigator.return_value.run.assert_awaited_once_with(mock_context)
+
+    pages = mock_LazyNavigator.call_args.args[0]
+    page = await anext(pages)
+
+    assert page.description == f"{mock_embed_description} ```a```"
+    assert page.footer.text == "Page 1"
+
+
 @patch("lib.responses.build_embed", return_value=MagicMock())
 @pytest.mark.asyncio
 async def test_error(mock_build_embed: MagicMock, mock_embed_description: str) -> None:
@@ -0,0 +1,167 @@
+import hikari
+import pytest
+
+from lib import rules
+from unittest.mock import AsyncMock, MagicMock
+
+
+@pytest.fixture
+def mock_id() -> hikari.Snowflake:
+    return hikari.Snowflake(123)
+
+
+@pytest.fixture
+def mock_event() -> MagicMock:
+    event = MagicMock()
+    event.is_bot = False
+    event.is_webhook = False
+    event.channel_id = hikari.Snowflake(1)
+    event.member.role_ids = [hikari.Snowflake(2)]
+    event.message.content = "hello there"
+
+    return event
+
+
+def test_rule_set_from_document() -> None:
+    result = rules.RuleSet.from_document(
+        {"ignored_channels": ["1"], "ignored_roles": ["2"], "min_length": 3}
+    )
+
+    assert result.ignored_channels == {1}
+    assert result.ignored_roles == {2}
+    assert result.min_length == 3
+    assert result.ignore_bots
+
+
+def test_rule_set_from_missing_document() -> None:
+    result = rules.RuleSet.from_document(None)
+
+    assert result.ignored_channels == frozenset()
+    assert result.min_length == 0
+
+
+def test_is_emoji_only() -> None:
+    assert rules.is_emoji_only("😂😂 <:pog:123456> 👍🏽")
+    assert not rules.is_emoji_only("😂 lol")
+
+
+def test_is_link_only() -> None:
+    assert rules.is_link_only("https://example.com <https://example.org/a?b=c>")
+    assert not rules.is_link_only("look https://example.com")
+
+
+def test_rule_engine_passes_ordinary_message(mock_event: MagicMock) -> None:
+    engine = rules.RuleEngine(rules.CONTENT_RULES + rules.GUILD_RULES)
+
+    assert engine.evaluate(mock_event) is None
+
+
+@pytest.mark.parametrize(
+    "attribute, value, rule_name",
+    [
+        ("is_webhook", True, "webhook"),
+        ("is_bot", True, "bot_author"),
+    ],
+)
+def test_rule_engine_skips_by_author(
+    mock_event: MagicMock, attribute: str, value: bool, rule_name: str
+) -> None:
+    engine = rules.RuleEngine(rules.CONTENT_RULES + rules.GUILD_RULES)
+    setattr(mock_event, attribute, value)
+
+    assert engine.evaluate(mock_event) == rule_name
+    assert engine.skipped[rule_name] == 1
+
+
+@pytest.mark.parametrize(
+    "content, rule_name",
+    [
+        (None, "no_text"),
+        ("   ", "no_text"),
+        ("🔥", "emoji_only"),
+        ("http://a.b", "link_only"),
+    ],
+)
+def test_rule_engine_skips_by_content(
+    mock_event: MagicMock, content: str | None, rule_name: str
+) -> None:
+    engine = rules.RuleEngine(rules.CONTENT_RULES)
+    mock_event.message.content = content
+
+    assert engine.evaluate(mock_event) == rule_name
+
+
+def test_rule_engine_skips_by_guild_rules(mock_event: MagicMock) -> None:
+    engine = rules.RuleEngine(rules.GUILD_RULES)
+
+    assert engine.evaluate(mock_event, rules.RuleSet([1])) == "ignored_channel"
+    assert engine.evaluate(mock_event, rules.RuleSet([], [2])) == "ignored_role"
+    assert engine.evaluate(mock_event, rules.RuleSet(min_length=50)) == "min_length"
+
+
+@pytest.mark.parametrize("member", [None, hikari.UNDEFINED])
+def test_has_ignored_role_without_member(mock_event: MagicMock, member) -> None:
+    mock_event.member = member
+
+    assert not rules.has_ignored_role(mock_event, rules.RuleSet([], [2]))
+
+
+@pytest.mark.asyncio
+async def test_get_rule_set_loads_once(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one = AsyncMock()
+    mock_collection.find_one.return_value = {"min_length": 5}
+    guild_rules = rules.GuildRules()
+
+    first = await rules.get_rule_set(mock_collection, mock_id, guild_rules)
+    second = await rules.get_rule_set(mock_collection, mock_id, guild_rules)
+
+    assert first is second
+    assert first.min_length == 5
+    mock_collection.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_ignore_channel(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update = AsyncMock()
+    mock_collection.find_one_and_update.return_value = {"ignored_channels": ["1"]}
+    guild_rules = rules.GuildRules()
+
+    result = await rules.ignore_channel(mock_collection, mock_id, 1, True, guild_rules)
+
+    assert result.ignored_channels == {1}
+    assert guild_rules.get(mock_id) is result
+    assert mock_collection.find_one_and_update.await_args.args == (
+        {"guild_id": str(mock_id)},
+        {"$addToSet": {"ignored_channels": "1"}},
+    )
+
+
+@pytest.mark.asyncio
+async def test_ignore_role(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update = AsyncMock()
+    mock_collection.find_one_and_update.return_value = {}
+
+    await rules.ignore_role(mock_collection, mock_id, 2, False)
+
+    assert mock_collection.find_one_and_update.await_args.args == (
+        {"guild_id": str(mock_id)},
+        {"$pull": {"ignored_roles": "2"}},
+    )
+
+
+@pytest.mark.asyncio
+async def test_set_min_length(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.find_one_and_update = AsyncMock()
+    mock_collection.find_one_and_update.return_value = {"min_length": 4}
+
+    result = await rules.set_min_length(mock_collection, mock_id, 4)
+
+    assert result.min_length == 4
+    assert mock_collection.find_one_and_update.await_args.args == (
+        {"guild_id": str(mock_id)},
+        {"$set": {"min_length": 4}},
+    )
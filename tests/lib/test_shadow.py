@@ -0,0 +1,133 @@
+import json
+import pytest
+
+from lib import profanity, shadow
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+@pytest.fixture
+def mock_backend() -> shadow.Backend:
+    mock_classify = AsyncMock()
+    mock_classify.return_value = [True]
+
+    return shadow.Backend("mock", mock_classify, cost=lambda content: 0.5)
+
+
+@pytest.fixture
+def mock_primary() -> shadow.Backend:
+    mock_classify = AsyncMock()
+    mock_classify.return_value = [False]
+
+    return shadow.Backend("primary", mock_classify, cost=lambda content: 0.01)
+
+
+def test_backend_stats_report() -> None:
+    stats = shadow.BackendStats()
+
+    stats.record(True, True, 0.1, 1.0)
+    stats.record(False, True, 0.3, 1.0)
+
+    result = stats.report()
+
+    assert result["calls"] == 2
+    assert result["agreement"] == 0.5
+    assert result["confusion"] == {"profane/profane": 1, "clean/profane": 1}
+    assert result["cost"] == 2.0
+
+
+def test_backend_stats_report_without_calls() -> None:
+    result = shadow.BackendStats().report()
+
+    assert result["agreement"] is None
+    assert result["latency_p50_ms"] is None
+
+
+@pytest.mark.asyncio
+async def test_lexicon_backend() -> None:
+    matchers = profanity.GuildMatchers()
+    matchers.compile(1, ["grr"], [])
+    backend = shadow.lexicon_backend(matchers)
+
+    assert await backend.classify(["grrreat", "hello"], 1) == [True, False]
+    assert await backend.classify(["grrreat", "scunthorpe"], 2) == [False, True]
+
+
+@pytest.mark.asyncio
+@patch("lib.shadow.random")
+async def test_shadow_evaluator_records_agreement(
+    mock_random: MagicMock,
+    mock_primary: shadow.Backend,
+    mock_backend: shadow.Backend,
+    tmp_path,
+) -> None:
+    path = str(tmp_path / "report.json")
+    evaluator = shadow.ShadowEvaluator(mock_primary, [mock_backend], 0.5, path)
+    mock_random.random.return_value = 0.1
+
+    result = evaluator.sample("content", 1)
+    await evaluator.close()
+
+    assert result
+    mock_primary.classify.assert_awaited_once_with(["content"], 1)
+    mock_backend.classify.assert_awaited_once_with(["content"], 1)
+
+    with open(path) as file:
+        report = json.load(file)
+
+    assert report["sampled"] == 1
+    assert report["primary"]["calls"] == 1
+    assert report["backends"]["mock"]["confusion"] == {"clean/profane": 1}
+    assert report["backends"]["mock"]["cost"] == 0.5
+
+
+@patch("lib.shadow.random")
+def test_shadow_evaluator_skips_unsampled_content(
+    mock_random: MagicMock, mock_primary: shadow.Backend, mock_backend: shadow.Backend
+) -> None:
+    evaluator = shadow.ShadowEvaluator(mock_primary, [mock_backend], 0.5)
+    mock_random.random.return_value = 0.9
+
+    assert not evaluator.sample("content", 1)
+    assert evaluator.sampled == 0
+    mock_primary.classify.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("lib.shadow.random")
+async def test_shadow_evaluator_counts_backend_errors(
+    mock_random: MagicMock, mock_primary: shadow.Backend, tmp_path
+) -> None:
+    mock_classify = AsyncMock()
+    mock_classify.side_effect = ValueError
+    backend = shadow.Backend("broken", mock_classify)
+    evaluator = shadow.ShadowEvaluator(
+        mock_primary, [backend], 1.0, str(tmp_path / "report.json")
+    )
+    mock_random.random.return_value = 0.0
+
+    evaluator.sample("content", 1)
+    await evaluator.close()
+
+    assert evaluator.stats["broken"].errors == 1
+    assert evaluator.stats["broken"].calls == 0
+
+
+@pytest.mark.asyncio
+@patch("lib.shadow.random")
+async def test_shadow_evaluator_without_primary_verdict(
+    mock_random: MagicMock, mock_backend: shadow.Backend, tmp_path
+) -> None:
+    mock_classify = AsyncMock()
+    mock_classify.side_effect = ValueError
+    primary = shadow.Backend("primary", mock_classify)
+    evaluator = shadow.ShadowEvaluator(
+        primary, [mock_backend], 1.0, str(tmp_path / "report.json")
+    )
+    mock_random.random.return_value = 0.0
+
+    evaluator.sample("content", 1)
+    await evaluator.close()
+
+    assert evaluator.primary.errors == 1
+    assert evaluator.stats["mock"].calls == 1
+    assert not evaluator.stats["mock"].confusion
@@ -1,8 +1,11 @@
+import asyncio
 import hikari
 import pytest
 
 from lib import tags
 from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
 from unittest.mock import MagicMock, AsyncMock, patch
 
 
@@ -116,82 +119,6 @@ async def test_get_tag_with_invalid_tag(
     assert result is None
 
 
-@pytest.mark.asyncio
-async def test_get_tags_with_some_tags(
-    mock_tag_name: str,
-    mock_tag_content: str,
-    mock_id: hikari.Snowflake,
-    mock_date: datetime,
-    mock_document: dict,
-) -> None:
-    mock_collection = MagicMock()
-    mock_collection.find = MagicMock()
-    mock_collection.find.return_value = AsyncIterator([mock_document, mock_document])
-
-    result = await tags.get_tags(mock_collection, mock_id)
-
-    assert result != []
-
-    for tag in result:
-        assert isinstance(tag, tags.Tag)
-        assert tag.name == mock_tag_name
-        assert tag.content == mock_tag_content
-        assert tag.guild_id == mock_id
-        assert tag.author_id == mock_id
-        assert tag.created_date == mock_date
-        assert tag.modified_date == mock_date
-        assert tag.uses == 0
-
-
-@pytest.mark.asyncio
-async def test_get_tags_with_no_tags(mock_id: hikari.Snowflake) -> None:
-    mock_collection = MagicMock()
-    mock_collection.find = MagicMock()
-    mock_collection.find.return_value = AsyncIterator([])
-
-    result = await tags.get_tags(mock_collection, mock_id)
-
-    assert result == []
-
-
-@pytest.mark.asyncio
-async def test_get_tags_by_author_with_some_tags(
-    mock_tag_name: str,
-    mock_tag_content: str,
-    mock_id: hikari.Snowflake,
-    mock_date: datetime,
-    mock_document: dict,
-) -> None:
-    mock_collection = MagicMock()
-    mock_collection.find = MagicMock()
-    mock_collection.find.return_value = AsyncIterator([mock_document, mock_document])
-
-    result = await tags.get_tags_by_author(mock_collection, mock_id, mock_id)
-
-    assert result != []
-
-    for tag in result:
-        assert isinstance(tag, tags.Tag)
-        assert tag.name == mock_tag_name
-        assert tag.content == mock_tag_content
-        assert tag.guild_id == mock_id
-        assert tag.author_id == mock_id
-        assert tag.created_date == mock_date
-        assert tag.modified_date == mock_date
-        assert tag.uses == 0
-
-
-@pytest.mark.asyncio
-async def test_get_tags_by_author_with_no_tags(mock_id: hikari.Snowflake) -> None:
-    mock_collection = MagicMock()
-    mock_collection.find = MagicMock()
-    mock_collection.find.return_value = AsyncIterator([])
-
-    result = await tags.get_tags_by_author(mock_collection, mock_id, mock_id)
-
-    assert result == []
-
-
 @patch("lib.tags.datetime", return_value=MagicMock())
 @pytest.mark.asyncio
 async def test_create_tag(
@@ -203,10 +130,11 @@ async def test_create_tag(
     mock_collection = MagicMock()
     mock_collection.insert_one = AsyncMock()
 
-    await tags.create_tag(
+    result = await tags.create_tag(
         mock_collection, mock_tag_name, mock_tag_content, mock_id, mock_id
     )
 
+    assert result
     mock_collection.insert_one.assert_awaited_once_with(
         {
             "name": mock_tag_name,
@@ -266,13 +194,392 @@ async def test_delete_all_tags(mock_id: hikari.Snowflake) -> None:
     mock_collection.delete_many.assert_awaited_once_with({"guild_id": str(mock_id)})
 
 
+def test_tag_cache_evicts_least_recently_used_tag(mock_document: dict) -> None:
+    cache = tags.TagCache(max_tags_per_guild=2)
+
+    for name in ["a", "b", "c"]:
+        cache.set(tags.Tag({**mock_document, "name": name}))
+
+    assert cache.get("a", mock_document["guild_id"]) is None
+    assert cache.get("c", mock_document["guild_id"]) is not None
+
+
+def test_tag_cache_evicts_least_recently_used_guild(mock_document: dict) -> None:
+    cache = tags.TagCache(max_guilds=2)
+
+    for guild_id in [1, 2, 3]:
+        cache.set(tags.Tag({**mock_document, "guild_id": guild_id}))
+
+    assert list(cache.guilds) == ["2", "3"]
+
+
+def test_tag_cache_metrics(mock_document: dict, mock_tag_name: str) -> None:
+    cache = tags.TagCache()
+    cache.set(tags.Tag(mock_document))
+
+    cache.get(mock_tag_name, mock_document["guild_id"])
+    cache.get("missing", mock_document["guild_id"])
+
+    assert cache.metrics() == {
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+        "guilds": 1,
+        "tags": 1,
+    }
+
+
 @pytest.mark.asyncio
-async def test_increment_tag(mock_tag_name: str, mock_id: hikari.Snowflake) -> None:
+async def test_get_tag_reads_through_cache(
+    mock_tag_name: str, mock_id: hikari.Snowflake, mock_document: dict
+) -> None:
     mock_collection = MagicMock()
+    mock_collection.find_one = AsyncMock()
+    mock_collection.find_one.return_value = mock_document
+    cache = tags.TagCache()
+
+    first = await tags.get_tag(mock_collection, mock_tag_name, mock_id, cache)
+    second = await tags.get_tag(mock_collection, mock_tag_name, mock_id, cache)
+
+    assert first is second
+    mock_collection.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_tag_writes_go_through_cache(
+    mock_tag_name: str, mock_id: hikari.Snowflake
+) -> None:
+    mock_collection = MagicMock()
+    mock_collection.insert_one = AsyncMock()
     mock_collection.update_one = AsyncMock()
+    mock_collection.delete_one = AsyncMock()
+    mock_collection.delete_many = AsyncMock()
+    cache = tags.TagCache()
 
-    await tags.increment_tag(mock_collection, mock_tag_name, mock_id)
+    await tags.create_tag(mock_collection, mock_tag_name, "a", mock_id, mock_id, cache)
+    await tags.edit_tag(mock_collection, mock_tag_name, "b", mock_id, cache)
 
-    mock_collection.update_one.assert_awaited_once_with(
-        {"name": mock_tag_name, "guild_id": str(mock_id)}, {"$inc": {"uses": 1}}
+    tag = cache.peek(mock_tag_name, mock_id)
+
+    assert tag.content == "b"
+
+    await tags.delete_tag(mock_collection, mock_tag_name, mock_id, cache)
+
+    assert cache.peek(mock_tag_name, mock_id) is None
+
+    await tags.create_tag(mock_collection, mock_tag_name, "a", mock_id, mock_id, cache)
+    await tags.delete_all_tags(mock_collection, mock_id, cache)
+
+    assert not cache.guilds
+
+
+@pytest.mark.asyncio
+async def test_usage_counter_batches_increments(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.bulk_write = AsyncMock()
+    usage = tags.UsageCounter(mock_collection, flush_delay=60)
+
+    usage.increment("a", mock_id)
+    usage.increment("a", mock_id)
+    usage.increment("b", mock_id)
+
+    assert usage.pending("a", mock_id) == 2
+
+    await usage.close()
+
+    mock_collection.bulk_write.assert_awaited_once_with(
+        [
+            UpdateOne({"name": "a", "guild_id": str(mock_id)}, {"$inc": {"uses": 2}}),
+            UpdateOne({"name": "b", "guild_id": str(mock_id)}, {"$inc": {"uses": 1}}),
+        ],
+        ordered=False,
+    )
+    assert usage.written == 3
+    assert usage.pending("a", mock_id) == 0
+
+
+@pytest.mark.asyncio
+async def test_usage_counter_flushes_after_delay(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.bulk_write = AsyncMock()
+    usage = tags.UsageCounter(mock_collection, flush_delay=0.01)
+
+    usage.increment("a", mock_id)
+    await asyncio.sleep(0.05)
+
+    mock_collection.bulk_write.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_usage_counter_updates_cached_tag(
+    mock_tag_name: str, mock_id: hikari.Snowflake, mock_document: dict
+) -> None:
+    mock_collection = MagicMock()
+    mock_collection.bulk_write = AsyncMock()
+    cache = tags.TagCache()
+    cache.set(tags.Tag(mock_document))
+    usage = tags.UsageCounter(mock_collection, cache)
+
+    usage.increment(mock_tag_name, mock_id)
+    await usage.close()
+
+    assert cache.peek(mock_tag_name, mock_id).uses == 1
+
+
+@pytest.mark.asyncio
+async def test_usage_counter_discards_deleted_tags(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.bulk_write = AsyncMock()
+    usage = tags.UsageCounter(mock_collection, flush_delay=60)
+
+    usage.increment("a", mock_id)
+    usage.increment("b", mock_id)
+    usage.increment("c", hikari.Snowflake(456))
+    usage.discard("a", mock_id)
+    usage.discard_guild(456)
+    await usage.close()
+
+    assert len(mock_collection.bulk_write.await_args.args[0]) == 1
+
+
+@pytest.mark.asyncio
+async def test_usage_counter_counts_failed_writes(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.bulk_write = AsyncMock()
+    mock_collection.bulk_write.side_effect = PyMongoError
+    usage = tags.UsageCounter(mock_collection)
+
+    usage.increment("a", mock_id)
+    await usage.close()
+
+    assert usage.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_create_indexes() -> None:
+    mock_collection = MagicMock()
+    mock_collection.create_index = AsyncMock()
+
+    result = await tags.create_indexes(mock_collection)
+
+    assert result
+    mock_collection.aggregate.assert_not_called()
+    assert mock_collection.create_index.await_args_list[0].args == (
+        [("guild_id", 1), ("name", 1)],
+    )
+    assert mock_collection.create_index.await_args_list[0].kwargs == {"unique": True}
+    assert mock_collection.create_index.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_create_indexes_with_duplicate_tags() -> None:
+    mock_collection = MagicMock()
+    mock_collection.aggregate.return_value = AsyncIterator([{"ids": [1, 2]}])
+    mock_collection.delete_many = AsyncMock()
+    mock_collection.create_index = AsyncMock(
+        side_effect=[OperationFailure("duplicate", code=11000), None, None]
+    )
+
+    result = await tags.create_indexes(mock_collection)
+
+    assert result
+    mock_collection.delete_many.assert_awaited_once_with({"_id": {"$in": [2]}})
+    assert mock_collection.create_index.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_create_indexes_with_failed_unique_index() -> None:
+    mock_collection = MagicMock()
+    mock_collection.create_index = AsyncMock(side_effect=OperationFailure("failed"))
+
+    result = await tags.create_indexes(mock_collection)
+
+    assert not result
+    mock_collection.aggregate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_remove_duplicate_tags() -> None:
+    mock_collection = MagicMock()
+    mock_collection.aggregate.return_value = AsyncIterator(
+        [{"ids": [1, 2, 3]}, {"ids": [4, 5]}]
+    )
+    mock_collection.delete_many = AsyncMock()
+
+    result = await tags.remove_duplicate_tags(mock_collection)
+
+    assert result == 3
+    mock_collection.delete_many.assert_awaited_once_with({"_id": {"$in": [2, 3, 5]}})
+
+
+@pytest.mark.asyncio
+async def test_create_tag_with_existing_name(
+    mock_tag_name: str, mock_tag_content: str, mock_id: hikari.Snowflake
+) -> None:
+    mock_collection = MagicMock()
+    mock_collection.insert_one = AsyncMock()
+    mock_collection.insert_one.side_effect = DuplicateKeyError("duplicate")
+    cache = tags.TagCache()
+
+    result = await tags.create_tag(
+        mock_collection, mock_tag_name, mock_tag_content, mock_id, mock_id, cache
+    )
+
+    assert not result
+    assert cache.peek(mock_tag_name, mock_id) is None
+
+
+@pytest.mark.asyncio
+async def test_count_tags_by_author(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_collection.count_documents = AsyncMock(return_value=3)
+
+    result = await tags.count_tags(mock_collection, mock_id, mock_id)
+
+    assert result == 3
+    mock_collection.count_documents.assert_awaited_once_with(
+        {"guild_id": str(mock_id), "author_id": str(mock_id)}
     )
+
+
+@pytest.mark.asyncio
+async def test_get_tag_names_after_name(mock_id: hikari.Snowflake) -> None:
+    mock_collection = MagicMock()
+    mock_cursor = mock_collection.find.return_value.sort.return_value
+    mock_cursor.limit.return_value = AsyncIterator([{"name": "b"}, {"name": "c"}])
+
+    result = await tags.get_tag_names(mock_collection, mock_id, after="a", limit=2)
+
+    assert result == ["b", "c"]
+    mock_collection.find.assert_called_once_with(
+        {"guild_id": str(mock_id), "name": {"$gt": "a"}}, {"name": 1, "_id": 0}
+    )
+    mock_collection.find.return_value.sort.assert_called_once_with("name", 1)
+    mock_cursor.limit.assert_called_once_with(2)
+
+
+@patch("lib.tags.get_tag_names")
+@pytest.mark.asyncio
+async def test_iter_tag_names(
+    mock_get_tag_names: AsyncMock, mock_id: hikari.Snowflake
+) -> None:
+    mock_get_tag_names.side_effect = [["a", "b"], ["c"]]
+
+    pages = tags.iter_tag_names(MagicMock(), mock_id, page_size=2)
+
+    assert await anext(pages) == ["a", "b"]
+    assert mock_get_tag_names.await_count == 1
+    assert [page async for page in pages] == [["c"]]
+    assert mock_get_tag_names.await_args_list[1].args[3] == "b"
+
+
+@patch("lib.tags.get_tag_names")
+@pytest.mark.asyncio
+async def test_iter_tag_names_with_no_tags(
+    mock_get_tag_names: AsyncMock, mock_id: hikari.Snowflake
+) -> None:
+    mock_get_tag_names.return_value = []
+
+    pages = tags.iter_tag_names(MagicMock(), mock_id)
+
+    assert [page async for page in pages] == []
+
+
+@pytest.fixture
+def mock_names_collection() -> MagicMock:
+    mock_collection = MagicMock()
+    mock_collection.find.side_effect = lambda *args: AsyncIterator(
+        [{"name": "beta"}, {"name": "Alpha"}, {"name": "alpine"}, {"name": "gamma"}]
+    )
+
+    return mock_collection
+
+
+@pytest.mark.asyncio
+async def test_name_index_search(
+    mock_names_collection: MagicMock, mock_id: hikari.Snowflake
+) -> None:
+    names = tags.NameIndex(mock_names_collection, limit=1)
+
+    assert await names.search("al", mock_id) == ["Alpha"]
+    assert await names.search("ALP", mock_id) == ["Alpha"]
+    assert await names.search("z", mock_id) == []
+
+    names.limit = 10
+
+    assert await names.search("alp", mock_id) == ["Alpha", "alpine"]
+    assert await names.search("", mock_id) == ["Alpha", "alpine", "beta", "gamma"]
+    mock_names_collection.find.assert_called_once_with(
+        {"guild_id": str(mock_id)}, {"name": 1, "_id": 0}
+    )
+
+
+@pytest.mark.asyncio
+async def test_name_index_shares_concurrent_loads(
+    mock_names_collection: MagicMock, mock_id: hikari.Snowflake
+) -> None:
+    names = tags.NameIndex(mock_names_collection)
+
+    await asyncio.gather(names.search("a", mock_id), names.search("b", mock_id))
+
+    assert mock_names_collection.find.call_count == 1
+    assert names.loading == {}
+
+
+@pytest.mark.asyncio
+async def test_name_index_add_and_remove(
+    mock_names_collection: MagicMock, mock_id: hikari.Snowflake
+) -> None:
+    names = tags.NameIndex(mock_names_collection)
+
+    names.add("beta2", mock_id)
+    assert names.guilds == {}
+
+    await names.search("", mock_id)
+    names.add("beta2", mock_id)
+    names.add("beta2", mock_id)
+    names.remove("gamma", mock_id)
+    names.remove("missing", mock_id)
+
+    assert await names.search("", mock_id) == ["Alpha", "alpine", "beta", "beta2"]
+
+
+@pytest.mark.asyncio
+async def test_name_index_discards_stale_load(
+    mock_names_collection: MagicMock, mock_id: hikari.Snowflake
+) -> None:
+    names = tags.NameIndex(mock_names_collection)
+
+    search = asyncio.create_task(names.search("", mock_id))
+    await asyncio.sleep(0)
+    names.add("delta", mock_id)
+    await search
+
+    assert names.guilds == {}
+    assert names.stale == set()
+
+
+@pytest.mark.asyncio
+async def test_name_index_evicts_least_recently_used_guild(
+    mock_names_collection: MagicMock,
+) -> None:
+    names = tags.NameIndex(mock_names_collection, max_guilds=1)
+
+    await names.search("", hikari.Snowflake(1))
+    await names.search("", hikari.Snowflake(2))
+
+    assert list(names.guilds) == ["2"]
+
+
+@pytest.mark.asyncio
+async def test_delete_tag_removes_indexed_name(
+    mock_names_collection: MagicMock, mock_id: hikari.Snowflake
+) -> None:
+    mock_collection = MagicMock()
+    mock_collection.delete_one = AsyncMock()
+    names = tags.NameIndex(mock_names_collection)
+    await names.search("", mock_id)
+
+    await tags.delete_tag(mock_collection, "beta", mock_id, names=names)
+
+    assert await names.search("b", mock_id) == []